@@ -13,6 +13,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from app.routers import (
+    admin_router,
     config_router,
     embedding_router,
     health_router,
@@ -22,7 +23,11 @@ from app.routers import (
     tts_router,
     video_router,
 )
+from app.services.hf_client import close_async_hf_client
+from app.services.http_pool import close_connection_pool
 from app.utils import AIServiceException, Config, get_logger, setup_logging
+from app.utils.deadline import request_deadline, timeout_from_headers
+from app.utils.response_cache import cache_control
 
 # Set up logging
 setup_logging()
@@ -45,9 +50,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Model-Used", "Retry-After"],
 )
 
 
+# Request deadline middleware
+@app.middleware("http")
+async def apply_request_deadline(request: Request, call_next):
+    """Run each request under its endpoint's deadline, shortened by client headers."""
+    with request_deadline(timeout_from_headers(request.headers, request.url.path)):
+        return await call_next(request)
+
+
+# Response cache middleware
+@app.middleware("http")
+async def apply_cache_control(request: Request, call_next):
+    """Honor the request's Cache-Control directives for cached upstream calls."""
+    with cache_control(request.headers):
+        return await call_next(request)
+
+
 # Request logging middleware
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
@@ -87,6 +109,7 @@ async def ai_service_exception_handler(request: Request, exc: AIServiceException
             "details": exc.details,
             "timestamp": datetime.utcnow().isoformat() + "Z",
         },
+        headers=exc.headers,
     )
 
 
@@ -116,6 +139,7 @@ app.include_router(llm_router.router)
 app.include_router(embedding_router.router)
 app.include_router(video_router.router)
 app.include_router(config_router.router)
+app.include_router(admin_router.router)
 
 
 # Root endpoint
@@ -144,6 +168,8 @@ async def startup_event():
 async def shutdown_event():
     """Run on application shutdown."""
     logger.info("AI Platform Backend shutting down")
+    await close_async_hf_client()
+    await close_connection_pool()
 
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
 """API routers for the AI Platform backend."""
 
-from app.routers import config_router, embedding_router, health_router, image_router, llm_router, stt_router, tts_router, video_router
+from app.routers import admin_router, config_router, embedding_router, health_router, image_router, llm_router, stt_router, tts_router, video_router
 
 __all__ = [
     "health_router",
@@ -11,4 +11,5 @@ __all__ = [
     "embedding_router",
     "video_router",
     "config_router",
+    "admin_router",
 ]
@@ -0,0 +1,74 @@
+"""
+Admin router.
+
+This module provides operational endpoints for inspecting the state of the
+upstream resilience layers and adjusting provider routing.
+"""
+
+from fastapi import APIRouter
+
+from app.services.provider_router import get_provider_router
+from app.utils.circuit_breaker import get_circuit_breakers
+from app.utils.logging import get_logger
+from app.utils.validation import ProviderRouteOverride
+
+logger = get_logger(__name__)
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/circuit-breakers")
+async def circuit_breaker_states() -> dict:
+    """
+    Get the state of every upstream circuit breaker.
+    
+    Returns:
+        dict: Breakers with their state, error rate and failure counters
+    """
+    logger.debug("Received request for circuit breaker states")
+    return {"breakers": get_circuit_breakers().stats()}
+
+
+@router.get("/provider-routes")
+async def provider_routes() -> dict:
+    """
+    Get the provider routing table.
+    
+    Returns:
+        dict: Per-model providers, best first, with latency, error rate and breaker state
+    """
+    logger.debug("Received request for provider routes")
+    return get_provider_router().dump()
+
+
+@router.put("/provider-routes/{model:path}")
+async def override_provider_route(model: str, request: ProviderRouteOverride) -> dict:
+    """
+    Pin a model to the given providers, bypassing latency ranking.
+    
+    Args:
+        model: Model ID
+        request: Providers to use, preferred first
+        
+    Returns:
+        dict: The model's updated route
+    """
+    router_table = get_provider_router()
+    router_table.set_override(model, request.providers)
+    return {"model": model, "providers": router_table.rank(model), "overridden": True}
+
+
+@router.delete("/provider-routes/{model:path}")
+async def clear_provider_route(model: str) -> dict:
+    """
+    Return a model to latency-ranked provider routing.
+    
+    Args:
+        model: Model ID
+        
+    Returns:
+        dict: The model's route and whether an override was removed
+    """
+    router_table = get_provider_router()
+    cleared = router_table.clear_override(model)
+    return {"model": model, "providers": router_table.rank(model), "cleared": cleared}
@@ -4,29 +4,103 @@ Embeddings router.
 This module provides endpoints for generating text embeddings.
 """
 
-from fastapi import APIRouter, HTTPException
+import asyncio
+import codecs
+import json
+from typing import Any, AsyncIterator, Optional, Union
 
+import numpy as np
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+
+from app.services.corpus_analysis import get_corpus_analyzer
+from app.services.embedding_projection import get_embedding_projector
 from app.services.embedding_service import get_embedding_service
-from app.utils.exceptions import AIServiceException
+from app.services.vector_index import get_vector_index
+from app.utils.config import Config
+from app.utils.embedding_codec import OCTET_STREAM, encode_binary, encode_json, wants_binary
+from app.utils.exceptions import AIServiceException, FileSizeError, InvalidFormatError, ValidationError
 from app.utils.logging import get_logger
-from app.utils.validation import EmbeddingRequest, EmbeddingResponse
+from app.utils.validation import (
+    DocumentEmbeddingResponse,
+    EmbeddingBatchRequest,
+    EmbeddingBatchResponse,
+    EmbeddingEncodingOptions,
+    EmbeddingRequest,
+    EmbeddingResponse,
+    IndexUpsertRequest,
+    IndexUpsertResponse,
+    ProjectionFitRequest,
+    ProjectionFitResponse,
+    SearchRequest,
+    SearchResponse,
+    SimilarityRequest,
+    SimilarityResponse,
+)
 
 logger = get_logger(__name__)
 
 router = APIRouter(prefix="/api", tags=["embedding"])
 
 
+def _encoded_response(
+    matrix: np.ndarray,
+    options: EmbeddingEncodingOptions,
+    accept: Optional[str],
+    metadata: dict[str, Any],
+    batch: bool,
+) -> Optional[Response]:
+    """
+    Build a binary or compact JSON response if the client asked for one.
+
+    Args:
+        matrix: (count, dim) float32 embeddings
+        options: Requested dtype and JSON encoding
+        accept: Accept header value
+        metadata: Response fields other than the vectors
+        batch: Whether the response holds a list of vectors
+
+    Returns:
+        Response: The encoded response, or None for the default float32 JSON
+    """
+    headers = {"X-Model-Used": metadata["model"]}
+    if wants_binary(accept):
+        body, layout = encode_binary(matrix, options.dtype)
+        return Response(content=body, media_type=OCTET_STREAM, headers={**headers, **layout})
+    if options.default_encoding:
+        return None
+    encoded = encode_json(matrix, options.dtype, options.encoding_format)
+    content = dict(metadata, dtype=encoded["dtype"], encoding_format=encoded["encoding_format"])
+    if batch:
+        content["embeddings"] = encoded["vectors"]
+        if "scales" in encoded:
+            content["scales"] = encoded["scales"]
+    else:
+        content["embedding"] = encoded["vectors"][0]
+        if "scales" in encoded:
+            content["scale"] = encoded["scales"][0]
+    return JSONResponse(content=content, headers=headers)
+
+
 @router.post("/embedding", response_model=EmbeddingResponse)
-async def generate_embedding(request: EmbeddingRequest) -> EmbeddingResponse:
+async def generate_embedding(request: EmbeddingRequest, response: Response, http_request: Request) -> Any:
     logger.debug(f"Received request to generate embedding for model: {request.model}")
     """
     Generate embeddings for text.
     
+    The vector is returned as raw little-endian bytes when the client sends
+    'Accept: application/octet-stream', and as base64 or quantized values
+    when the request sets encoding_format or dtype. Setting dimensions
+    shortens it by Matryoshka truncation or PCA projection.
+    
     Args:
-        request: EmbeddingRequest with text and optional model
+        request: EmbeddingRequest with text, optional model, dimension and encoding options
+        response: Response used to report the serving model in X-Model-Used
+        http_request: Incoming request, for content negotiation
         
     Returns:
-        EmbeddingResponse with embedding vector and metadata
+        EmbeddingResponse with embedding vector and metadata, or its encoded form
         
     Raises:
         HTTPException: If embedding generation fails
@@ -34,23 +108,480 @@ async def generate_embedding(request: EmbeddingRequest) -> EmbeddingResponse:
     try:
         service = get_embedding_service()
         
-        result = service.embed(
+        result = await service.embed(
             text=request.text,
             model=request.model,
+            dimensions=request.dimensions,
+            projection=request.projection,
+        )
+        
+        metadata = {key: value for key, value in result.items() if key != "embedding"}
+        encoded = _encoded_response(
+            result["embedding"][None, :],
+            request,
+            http_request.headers.get("accept"),
+            metadata,
+            batch=False,
         )
+        if encoded is not None:
+            return encoded
         
+        response.headers["X-Model-Used"] = result["model"]
         return EmbeddingResponse(
-            embedding=result["embedding"],
+            embedding=result["embedding"].tolist(),
             dimension=result["dimension"],
             model=result["model"],
             tokens_used=result.get("tokens_used"),
+            projection=result.get("projection"),
         )
         logger.debug(f"Successfully generated embedding for model: {request.model}")
     
     except AIServiceException as e:
         logger.error(f"Embedding error: {e.message}")
-        raise HTTPException(status_code=e.status_code, detail=e.message)
+        raise HTTPException(status_code=e.status_code, detail=e.message, headers=e.headers)
     
     except Exception as e:
         logger.error(f"Unexpected error in embedding: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/embedding/batch", response_model=EmbeddingBatchResponse)
+async def generate_embeddings_batch(
+    request: EmbeddingBatchRequest,
+    response: Response,
+    http_request: Request,
+) -> Any:
+    """
+    Generate embeddings for a list of texts.
+    
+    Identical texts are embedded once and upstream calls are batched. The
+    same dimension and encoding options as /embedding apply.
+    
+    Args:
+        request: EmbeddingBatchRequest with texts, optional model, dimension and encoding options
+        response: Response used to report the serving model in X-Model-Used
+        http_request: Incoming request, for content negotiation
+        
+    Returns:
+        EmbeddingBatchResponse with one embedding vector per text, in input
+        order, or its encoded form
+        
+    Raises:
+        HTTPException: If embedding generation fails
+    """
+    logger.debug(f"Received request to embed {len(request.texts)} texts for model: {request.model}")
+    try:
+        service = get_embedding_service()
+        
+        result = await service.embed_batch(
+            texts=request.texts,
+            model=request.model,
+            dimensions=request.dimensions,
+            projection=request.projection,
+        )
+        
+        metadata = {key: value for key, value in result.items() if key != "embeddings"}
+        encoded = _encoded_response(
+            result["embeddings"],
+            request,
+            http_request.headers.get("accept"),
+            metadata,
+            batch=True,
+        )
+        if encoded is not None:
+            return encoded
+        
+        response.headers["X-Model-Used"] = result["model"]
+        return EmbeddingBatchResponse(embeddings=result["embeddings"].tolist(), **metadata)
+    
+    except AIServiceException as e:
+        logger.error(f"Batch embedding error: {e.message}")
+        raise HTTPException(status_code=e.status_code, detail=e.message, headers=e.headers)
+    
+    except Exception as e:
+        logger.error(f"Unexpected error in batch embedding: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+async def _request_text(http_request: Request, max_size: int, file_type: str) -> AsyncIterator[str]:
+    """
+    Decode a UTF-8 request body as it streams in.
+    
+    Args:
+        http_request: Incoming request
+        max_size: Maximum body size in bytes
+        file_type: What the body holds, used in errors
+        
+    Yields:
+        str: Decoded pieces of the body
+        
+    Raises:
+        FileSizeError: If the body exceeds max_size
+        InvalidFormatError: If the body is not UTF-8 text
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    size = 0
+    try:
+        async for data in http_request.stream():
+            size += len(data)
+            if size > max_size:
+                raise FileSizeError(size, max_size, file_type)
+            yield decoder.decode(data)
+        yield decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise InvalidFormatError(file_type, "non-UTF-8", ["UTF-8 text"])
+
+
+async def _corpus_items(http_request: Request) -> AsyncIterator[tuple[Optional[Union[str, int]], str]]:
+    """
+    Parse an NDJSON corpus as it streams in.
+    
+    Each line is a JSON string, or an object with 'text' and an optional
+    'id' (string or integer); blank lines are skipped.
+    
+    Args:
+        http_request: Incoming request
+        
+    Yields:
+        tuple: (id or None, text) per line
+        
+    Raises:
+        ValidationError: If a line is not a valid item
+    """
+    line_number = 0
+    rest = ""
+    async for piece in _request_text(http_request, Config.MAX_CORPUS_SIZE, "corpus"):
+        lines = (rest + piece).split("\n")
+        rest = lines.pop()
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield _corpus_item(line, line_number)
+    if rest.strip():
+        yield _corpus_item(rest, line_number + 1)
+
+
+def _corpus_item(line: str, line_number: int) -> tuple[Optional[Union[str, int]], str]:
+    """Parse and validate one NDJSON corpus line."""
+    try:
+        value = json.loads(line)
+    except ValueError:
+        raise ValidationError(f"Line {line_number} is not valid JSON")
+    item_id = None
+    if isinstance(value, dict):
+        item_id, value = value.get("id"), value.get("text")
+        if item_id is not None and (isinstance(item_id, bool) or not isinstance(item_id, (str, int))):
+            raise ValidationError(f"Line {line_number}: 'id' must be a string or an integer")
+    if not isinstance(value, str) or not value or len(value) > 5000:
+        raise ValidationError(f"Line {line_number}: text must be a string of 1 to 5000 characters")
+    return item_id, value
+
+
+async def _ndjson_events(events: AsyncIterator[dict]) -> AsyncIterator[str]:
+    """
+    Serialize events as NDJSON, reporting a failure as a final error event.
+    
+    Lines are sent in chunks of about Config.STREAM_CHUNK_SIZE characters;
+    progress events are sent at once.
+    
+    Args:
+        events: Events to serialize
+        
+    Yields:
+        str: Groups of NDJSON lines
+    """
+    lines: list[str] = []
+    size = 0
+    try:
+        async for event in events:
+            line = json.dumps(event, separators=(",", ":")) + "\n"
+            lines.append(line)
+            size += len(line)
+            if size >= Config.STREAM_CHUNK_SIZE or event["type"] == "progress":
+                yield "".join(lines)
+                lines, size = [], 0
+    except AIServiceException as e:
+        logger.error(f"Corpus analysis error: {e.message}")
+        lines.append(json.dumps({"type": "error", "error_code": e.error_code, "detail": e.message}) + "\n")
+    except Exception as e:
+        logger.error(f"Unexpected error in corpus analysis: {str(e)}")
+        lines.append(json.dumps({"type": "error", "error_code": "internal_error", "detail": "Internal server error"}) + "\n")
+    if lines:
+        yield "".join(lines)
+
+
+@router.post("/embedding/projection", response_model=ProjectionFitResponse)
+async def fit_projection(request: ProjectionFitRequest) -> ProjectionFitResponse:
+    """
+    Fit (or refit) a model's PCA projection from its stored embeddings.
+    
+    Projections are otherwise fitted on first use; refitting after the
+    embedding store has grown keeps them representative.
+    
+    Args:
+        request: ProjectionFitRequest with optional model and sample size
+        
+    Returns:
+        ProjectionFitResponse with the fitted rows and the variance kept
+        
+    Raises:
+        HTTPException: If too few embeddings of the model are stored
+    """
+    model = request.model or Config.DEFAULT_EMBEDDING_MODEL
+    logger.debug(f"Received request to fit a projection for model: {model}")
+    try:
+        projector = get_embedding_projector()
+        await asyncio.to_thread(projector.fit, model, request.sample)
+        return ProjectionFitResponse(model=model, **projector.stats()["models"][model])
+    
+    except AIServiceException as e:
+        logger.error(f"Projection fit error: {e.message}")
+        raise HTTPException(status_code=e.status_code, detail=e.message, headers=e.headers)
+    
+    except Exception as e:
+        logger.error(f"Unexpected error in projection fit: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/embedding/document", response_model=DocumentEmbeddingResponse)
+async def generate_document_embedding(
+    http_request: Request,
+    response: Response,
+    model: Optional[str] = Query(None, description="Model to use (optional, uses default if not specified)"),
+    window: Optional[int] = Query(None, ge=16, le=8192, description="Tokens per window (at most the model's input limit)"),
+    overlap: Optional[int] = Query(None, ge=0, description="Tokens shared by consecutive windows"),
+    pooling: str = Query("mean", description="'mean' or 'weighted' (by tokens per window)"),
+    output: str = Query("pooled", description="'pooled', 'chunks' or 'both'"),
+) -> DocumentEmbeddingResponse:
+    """
+    Embed a long document sent as the raw (UTF-8 text) request body.
+    
+    The body is chunked into overlapping token windows as it streams in,
+    so it is never held as one string; the windows are embedded through
+    the batch path.
+    
+    Args:
+        http_request: Incoming request carrying the document
+        response: Response used to report the serving model in X-Model-Used
+        model: Model to use (optional)
+        window: Tokens per window (optional)
+        overlap: Tokens shared by consecutive windows (optional)
+        pooling: How window vectors are pooled into the document vector
+        output: Whether to return the pooled vector, the windows, or both
+        
+    Returns:
+        DocumentEmbeddingResponse with the pooled vector and/or window vectors
+        
+    Raises:
+        HTTPException: If the document is too large or embedding fails
+    """
+    logger.debug(f"Received request to embed a document with model: {model}")
+    try:
+        service = get_embedding_service()
+        
+        result = await service.embed_document(
+            _request_text(http_request, Config.MAX_DOCUMENT_SIZE, "document"),
+            model=model,
+            window=window,
+            overlap=overlap,
+            pooling=pooling,
+            output=output,
+        )
+        
+        response.headers["X-Model-Used"] = result["model"]
+        embedding = result.pop("embedding")
+        chunks = result.pop("chunks")
+        return DocumentEmbeddingResponse(
+            embedding=embedding.tolist() if embedding is not None else None,
+            chunks=[dict(chunk, embedding=chunk["embedding"].tolist()) for chunk in chunks] if chunks is not None else None,
+            **result,
+        )
+    
+    except AIServiceException as e:
+        logger.error(f"Document embedding error: {e.message}")
+        raise HTTPException(status_code=e.status_code, detail=e.message, headers=e.headers)
+    
+    except Exception as e:
+        logger.error(f"Unexpected error in document embedding: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/embedding/corpus", response_class=StreamingResponse)
+async def analyze_corpus(
+    http_request: Request,
+    model: Optional[str] = Query(None, description="Model to use (optional, uses default if not specified)"),
+    clusters: Optional[int] = Query(None, ge=1, le=65536, description="Number of clusters (default: sqrt(items / 2))"),
+    threshold: float = Query(0.95, ge=0.0, le=1.0, description="Minimum cosine similarity of near-duplicates"),
+    assignments: bool = Query(True, description="Emit the cluster of every item"),
+    duplicates: bool = Query(True, description="Find near-duplicate pairs"),
+) -> StreamingResponse:
+    """
+    Cluster a corpus and find near-duplicate texts.
+    
+    The corpus is the NDJSON request body, one JSON string or
+    {"id": ..., "text": ...} object per line, read as it streams in. Results
+    are streamed back as NDJSON events: progress, cluster, assignment,
+    duplicate, and a final summary (or error).
+    
+    Args:
+        http_request: Incoming request carrying the corpus
+        model: Model to use (optional)
+        clusters: Number of clusters (optional)
+        threshold: Minimum cosine similarity of near-duplicates
+        assignments: Whether to emit the cluster of every item
+        duplicates: Whether to run the near-duplicate pass
+        
+    Returns:
+        StreamingResponse: NDJSON events
+        
+    Raises:
+        HTTPException: If the corpus is invalid or its first items fail to embed
+    """
+    logger.debug(f"Received corpus analysis request for model: {model}")
+    events = get_corpus_analyzer().analyze(
+        _corpus_items(http_request),
+        model=model,
+        clusters=clusters,
+        threshold=threshold,
+        assignments=assignments,
+        duplicates=duplicates,
+    )
+    try:
+        # Errors before the first event (invalid input, upstream failures)
+        # are still reported with an HTTP status
+        first = await events.__anext__()
+    
+    except AIServiceException as e:
+        logger.error(f"Corpus analysis error: {e.message}")
+        raise HTTPException(status_code=e.status_code, detail=e.message, headers=e.headers)
+    
+    except Exception as e:
+        logger.error(f"Unexpected error in corpus analysis: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    
+    async def stream() -> AsyncIterator[dict]:
+        yield first
+        async for event in events:
+            yield event
+    
+    return StreamingResponse(
+        _ndjson_events(stream()),
+        media_type="application/x-ndjson",
+        # Release the spooled vectors if the client goes away mid-stream
+        background=BackgroundTask(events.aclose),
+    )
+
+
+@router.post("/embedding/similarity", response_model=SimilarityResponse)
+async def score_similarity(request: SimilarityRequest) -> SimilarityResponse:
+    """
+    Rank candidates by similarity to a query in one round trip.
+    
+    Texts are embedded together in one batch, reusing stored embeddings,
+    and all candidates are scored with one matrix product.
+    
+    Args:
+        request: SimilarityRequest with the query, candidates, top_k and metric
+        
+    Returns:
+        SimilarityResponse with the candidates best first
+        
+    Raises:
+        HTTPException: If embedding or scoring fails
+    """
+    logger.debug(f"Received similarity request for model: {request.model}")
+    try:
+        service = get_embedding_service()
+        result = await service.similarity(
+            query=request.query,
+            candidates=request.candidates,
+            query_vector=request.query_vector,
+            candidate_vectors=request.candidate_vectors,
+            model=request.model,
+            top_k=request.top_k,
+            metric=request.metric,
+        )
+        return SimilarityResponse(**result)
+    
+    except AIServiceException as e:
+        logger.error(f"Similarity error: {e.message}")
+        raise HTTPException(status_code=e.status_code, detail=e.message, headers=e.headers)
+    
+    except Exception as e:
+        logger.error(f"Unexpected error in similarity: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/embedding/index", response_model=IndexUpsertResponse)
+async def upsert_index_items(request: IndexUpsertRequest) -> IndexUpsertResponse:
+    """
+    Insert or replace items in a vector collection.
+    
+    Item texts are embedded (served from the embedding store when possible)
+    unless a precomputed vector is given. The collection is created on first
+    use and keeps the model and dimension of its first items.
+    
+    Args:
+        request: IndexUpsertRequest with collection, optional model and items
+        
+    Returns:
+        IndexUpsertResponse with the collection size after the upsert
+        
+    Raises:
+        HTTPException: If embedding or indexing fails
+    """
+    logger.debug(f"Received request to index {len(request.items)} items into {request.collection}")
+    try:
+        result = await get_vector_index().upsert(
+            request.collection,
+            [item.model_dump() for item in request.items],
+            model=request.model,
+        )
+        return IndexUpsertResponse(**result)
+    
+    except AIServiceException as e:
+        logger.error(f"Index upsert error: {e.message}")
+        raise HTTPException(status_code=e.status_code, detail=e.message, headers=e.headers)
+    
+    except Exception as e:
+        logger.error(f"Unexpected error in index upsert: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/embedding/search", response_model=SearchResponse)
+async def search_index(request: SearchRequest) -> SearchResponse:
+    """
+    Find the nearest neighbours of one or more queries in a vector collection.
+    
+    Query texts are embedded with the collection's model in one batch, and
+    all queries are scored together.
+    
+    Args:
+        request: SearchRequest with collection, queries, top_k and metric
+        
+    Returns:
+        SearchResponse with the hits of each query, best first
+        
+    Raises:
+        HTTPException: If embedding or search fails
+    """
+    logger.debug(f"Received search request for collection {request.collection}")
+    try:
+        result = await get_vector_index().search(
+            request.collection,
+            queries=request.query_texts,
+            vectors=request.vectors or [],
+            top_k=request.top_k,
+            metric=request.metric,
+            exact=request.exact,
+            nprobe=request.nprobe,
+        )
+        return SearchResponse(**result)
+    
+    except AIServiceException as e:
+        logger.error(f"Search error: {e.message}")
+        raise HTTPException(status_code=e.status_code, detail=e.message, headers=e.headers)
+    
+    except Exception as e:
+        logger.error(f"Unexpected error in search: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
@@ -8,6 +8,20 @@ from datetime import datetime
 
 from fastapi import APIRouter
 
+from app.services.corpus_analysis import get_corpus_analyzer
+from app.services.embedding_projection import get_embedding_projector
+from app.services.embedding_service import get_embedding_service
+from app.services.embedding_store import get_embedding_store
+from app.services.fallback_executor import get_fallback_executor
+from app.services.http_pool import get_connection_pool
+from app.services.vector_index import get_vector_index
+from app.utils.coalescing import get_request_coalescer
+from app.utils.concurrency import get_concurrency_governor
+from app.utils.hedging import get_hedging_policy
+from app.utils.latency import get_latency_tracker
+from app.utils.rate_limiter import get_rate_limiter
+from app.utils.response_cache import get_response_cache
+from app.utils.retry import get_retry_budget
 from app.utils.validation import HealthResponse
 
 router = APIRouter(tags=["health"])
@@ -25,3 +39,165 @@ async def health_check() -> HealthResponse:
         status="healthy",
         timestamp=datetime.utcnow().isoformat() + "Z"
     )
+
+
+@router.get("/health/connections")
+async def connection_pool_stats() -> dict:
+    """
+    Upstream connection pool statistics.
+    
+    Returns:
+        dict: Open, idle, active and waiting connections per provider
+    """
+    return get_connection_pool().stats()
+
+
+@router.get("/health/coalescing")
+async def coalescing_stats() -> dict:
+    """
+    Request coalescing counters.
+    
+    Returns:
+        dict: Executed and coalesced upstream calls per task
+    """
+    return get_request_coalescer().stats()
+
+
+@router.get("/health/concurrency")
+async def concurrency_stats() -> dict:
+    """
+    Upstream concurrency governor statistics.
+    
+    Returns:
+        dict: Active and queued calls, rejections, queue depth and wait time
+        histograms per model/provider key
+    """
+    return get_concurrency_governor().stats()
+
+
+@router.get("/health/rate-limits")
+async def rate_limit_stats() -> dict:
+    """
+    Outbound rate limiter statistics.
+    
+    Returns:
+        dict: Shared backend, configured rates, and per-provider acquire,
+        delay, rejection and 429 penalty counts with wait time histograms
+    """
+    return await get_rate_limiter().stats()
+
+
+@router.get("/health/latency")
+async def latency_stats() -> dict:
+    """
+    Observed upstream latencies and the timeouts derived from them.
+    
+    Returns:
+        dict: p50/p95/p99 latency and current timeout per task and model
+    """
+    return get_latency_tracker().stats()
+
+
+@router.get("/health/hedging")
+async def hedging_stats() -> dict:
+    """
+    Hedged request metrics.
+    
+    Returns:
+        dict: Hedge budget and per-task hedge and win counters
+    """
+    return get_hedging_policy().stats()
+
+
+@router.get("/health/retries")
+async def retry_budget_stats() -> dict:
+    """
+    Retry budget consumption.
+    
+    Returns:
+        dict: First attempts, retries and remaining allowance in the sliding
+        window, lifetime totals including denied retries, and per-function counters
+    """
+    return get_retry_budget().stats()
+
+
+@router.get("/health/cache")
+async def response_cache_stats() -> dict:
+    """
+    Response cache statistics.
+    
+    Returns:
+        dict: Per-task hits (by tier), misses, bypasses and hit rate, and
+        per-tier size and eviction counts
+    """
+    return get_response_cache().stats()
+
+
+@router.get("/health/embedding-store")
+async def embedding_store_stats() -> dict:
+    """
+    Embedding store statistics.
+    
+    Returns:
+        dict: Per-model row count, dimension, dtype, disk usage, index fill,
+        and hit/miss/store counts
+    """
+    return get_embedding_store().stats()
+
+
+@router.get("/health/batching")
+async def batching_stats() -> dict:
+    """
+    Embedding micro-batching statistics.
+    
+    Returns:
+        dict: Window and size settings, batch and item counts, and batch
+        size and added latency histograms
+    """
+    return get_embedding_service().batching_stats()
+
+
+@router.get("/health/vector-index")
+async def vector_index_stats() -> dict:
+    """
+    Vector index statistics.
+    
+    Returns:
+        dict: Per-collection model, dimension, size, IVF list count and
+        queries served
+    """
+    return get_vector_index().stats()
+
+
+@router.get("/health/corpus")
+async def corpus_analysis_stats() -> dict:
+    """
+    Corpus analysis statistics.
+    
+    Returns:
+        dict: Jobs started and running, items analyzed and duplicate pairs found
+    """
+    return get_corpus_analyzer().stats()
+
+
+@router.get("/health/projections")
+async def projection_stats() -> dict:
+    """
+    Embedding dimension reduction statistics.
+    
+    Returns:
+        dict: Matryoshka models, vectors projected, and per fitted model the
+        rows it was fitted on and the variance kept at common dimensions
+    """
+    return get_embedding_projector().stats()
+
+
+@router.get("/health/fallbacks")
+async def fallback_stats() -> dict:
+    """
+    Model fallback counters.
+    
+    Returns:
+        dict: Requests served per task and model, and how many used a fallback
+    """
+    return get_fallback_executor().stats()
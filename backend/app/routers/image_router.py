@@ -36,7 +36,7 @@ async def generate_image(request: ImageGenerationRequest):
     try:
         service = get_image_service()
         
-        image_bytes = service.generate_image(
+        image_bytes, model_used = await service.generate_image(
             prompt=request.prompt,
             model=request.model,
             negative_prompt=request.negative_prompt,
@@ -44,18 +44,22 @@ async def generate_image(request: ImageGenerationRequest):
             width=request.width,
             num_inference_steps=request.num_inference_steps,
             guidance_scale=request.guidance_scale,
+            seed=request.seed,
         )
         
         logger.debug(f"Successfully processed request for model: {request.model}")
         return StreamingResponse(
             io.BytesIO(image_bytes),
             media_type="image/png",
-            headers={"Content-Disposition": "attachment; filename=generated_image.png"}
+            headers={
+                "Content-Disposition": "attachment; filename=generated_image.png",
+                "X-Model-Used": model_used,
+            }
         )
     
     except AIServiceException as e:
         logger.error(f"Image generation error: {e.message}")
-        raise HTTPException(status_code=e.status_code, detail=e.message)
+        raise HTTPException(status_code=e.status_code, detail=e.message, headers=e.headers)
     
     except Exception as e:
         logger.error(f"Unexpected error in image generation: {str(e)}")
@@ -82,7 +86,7 @@ async def edit_image(request: ImageEditingRequest):
     try:
         service = get_image_service()
         
-        image_bytes = service.edit_image(
+        image_bytes, model_used = await service.edit_image(
             image_data=request.image,
             prompt=request.prompt,
             mask_data=request.mask,
@@ -97,12 +101,15 @@ async def edit_image(request: ImageEditingRequest):
         return StreamingResponse(
             io.BytesIO(image_bytes),
             media_type="image/png",
-            headers={"Content-Disposition": "attachment; filename=edited_image.png"}
+            headers={
+                "Content-Disposition": "attachment; filename=edited_image.png",
+                "X-Model-Used": model_used,
+            }
         )
     
     except AIServiceException as e:
         logger.error(f"Image editing error: {e.message}")
-        raise HTTPException(status_code=e.status_code, detail=e.message)
+        raise HTTPException(status_code=e.status_code, detail=e.message, headers=e.headers)
     
     except Exception as e:
         logger.error(f"Unexpected error in image editing: {str(e)}")
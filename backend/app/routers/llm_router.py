@@ -4,7 +4,7 @@ Large Language Model router.
 This module provides endpoints for text generation and conversation.
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 
 from app.services.llm_service import get_llm_service
 from app.utils.exceptions import AIServiceException
@@ -17,13 +17,14 @@ router = APIRouter(prefix="/api", tags=["llm"])
 
 
 @router.post("/llm", response_model=LLMResponse)
-async def generate_text(request: LLMRequest) -> LLMResponse:
+async def generate_text(request: LLMRequest, response: Response) -> LLMResponse:
     logger.debug(f"Received request to generate text for model: {request.model}")
     """
     Generate text based on conversation messages.
     
     Args:
         request: LLMRequest with messages and optional parameters
+        response: Response used to report the serving model in X-Model-Used
         
     Returns:
         LLMResponse with generated text and metadata
@@ -34,7 +35,7 @@ async def generate_text(request: LLMRequest) -> LLMResponse:
     try:
         service = get_llm_service()
         
-        result = service.generate(
+        result = await service.generate(
             messages=request.messages,
             model=request.model,
             max_tokens=request.max_tokens,
@@ -43,6 +44,7 @@ async def generate_text(request: LLMRequest) -> LLMResponse:
             top_k=request.top_k,
         )
         
+        response.headers["X-Model-Used"] = result["model"]
         return LLMResponse(
             response=result["response"],
             model=result["model"],
@@ -53,7 +55,7 @@ async def generate_text(request: LLMRequest) -> LLMResponse:
     
     except AIServiceException as e:
         logger.error(f"LLM error: {e.message}")
-        raise HTTPException(status_code=e.status_code, detail=e.message)
+        raise HTTPException(status_code=e.status_code, detail=e.message, headers=e.headers)
     
     except Exception as e:
         logger.error(f"Unexpected error in LLM: {str(e)}")
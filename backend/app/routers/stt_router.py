@@ -4,7 +4,7 @@ Speech-to-text router.
 This module provides endpoints for converting speech to text.
 """
 
-from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from fastapi import APIRouter, File, Form, HTTPException, Response, UploadFile
 from pydantic import BaseModel
 
 from app.services.stt_service import get_stt_service
@@ -27,6 +27,7 @@ class STTResponse(BaseModel):
 
 @router.post("/stt", response_model=STTResponse)
 async def speech_to_text(
+    response: Response,
     audio: UploadFile = File(...),
     model: str | None = Form(None),
     language: str | None = Form(None),
@@ -36,6 +37,7 @@ async def speech_to_text(
     Convert speech to text.
     
     Args:
+        response: Response used to report the serving model in X-Model-Used
         audio: Audio file (WAV, MP3, etc.)
         model: Model to use (optional)
         language: Language code (optional)
@@ -60,23 +62,24 @@ async def speech_to_text(
         
         service = get_stt_service()
         
-        result = service.transcribe(
+        result = await service.transcribe(
             audio_bytes=audio_bytes,
             model=model,
             language=language,
         )
         
+        response.headers["X-Model-Used"] = result["model"]
         return STTResponse(
             text=result.get("text", ""),
             language=result.get("language", language),
             confidence=result.get("confidence"),
-            model=result.get("model", model or Config.DEFAULT_STT_MODEL),
+            model=result["model"],
         )
         logger.debug(f"Successfully transcribed audio with model: {model}")
     
     except AIServiceException as e:
         logger.error(f"STT error: {e.message}")
-        raise HTTPException(status_code=e.status_code, detail=e.message)
+        raise HTTPException(status_code=e.status_code, detail=e.message, headers=e.headers)
     
     except Exception as e:
         logger.error(f"Unexpected error in STT: {str(e)}")
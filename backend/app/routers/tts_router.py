@@ -36,7 +36,7 @@ async def text_to_speech(request: TTSRequest):
     try:
         service = get_tts_service()
         
-        audio_bytes, sample_rate = service.synthesize(
+        audio_bytes, sample_rate, model_used = await service.synthesize(
             text=request.text,
             model=request.model,
             speaker_id=request.speaker_id,
@@ -48,12 +48,15 @@ async def text_to_speech(request: TTSRequest):
         return StreamingResponse(
             io.BytesIO(audio_bytes),
             media_type="audio/wav",
-            headers={"Content-Disposition": "attachment; filename=speech.wav"}
+            headers={
+                "Content-Disposition": "attachment; filename=speech.wav",
+                "X-Model-Used": model_used,
+            }
         )
     
     except AIServiceException as e:
         logger.error(f"TTS error: {e.message}")
-        raise HTTPException(status_code=e.status_code, detail=e.message)
+        raise HTTPException(status_code=e.status_code, detail=e.message, headers=e.headers)
     
     except Exception as e:
         logger.error(f"Unexpected error in TTS: {str(e)}")
@@ -11,6 +11,7 @@ from typing import Optional
 
 from fastapi import APIRouter, File, Form, UploadFile, HTTPException
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
 from app.services.video_service import get_video_service
 from app.utils.validation import (
@@ -20,6 +21,7 @@ from app.utils.validation import (
     ErrorResponse,
 )
 from app.utils.exceptions import (
+    AIServiceException,
     ValidationError,
     HuggingFaceAPIError,
     ProcessingError,
@@ -34,6 +36,35 @@ router = APIRouter(prefix="/api/video", tags=["video"])
 video_service = get_video_service()
 
 
+def _video_response(video_data: dict) -> StreamingResponse:
+    """Build the streaming response for a generated video.
+    
+    Args:
+        video_data: Video stream and metadata from the video service
+        
+    Returns:
+        StreamingResponse: MP4 video relayed chunk by chunk
+    """
+    stream = video_data["stream"]
+    headers = {
+        "Content-Disposition": 'attachment; filename="video.mp4"',
+        "X-Video-Model": video_data["model"],
+        "X-Model-Used": video_data["model"],
+        "X-Generation-Time": str(video_data["generation_time"]),
+    }
+    if video_data["video_size"] is not None:
+        headers["Content-Length"] = str(video_data["video_size"])
+    if video_data["artifact"]:
+        headers["X-Video-Artifact"] = video_data["artifact"]
+    return StreamingResponse(
+        stream,
+        media_type=stream.media_type if (stream.media_type or "").startswith("video/") else "video/mp4",
+        headers=headers,
+        # Release the upstream connection once the response has been sent
+        background=BackgroundTask(stream.aclose),
+    )
+
+
 @router.post(
     "/text-to-video",
     response_class=StreamingResponse,
@@ -85,16 +116,8 @@ async def text_to_video(
             num_inference_steps=request.num_inference_steps,
         )
 
-        # Return video as streaming response
-        return StreamingResponse(
-            iter([video_data["video_bytes"]]),
-            media_type="video/mp4",
-            headers={
-                "Content-Disposition": 'attachment; filename="video.mp4"',
-                "X-Video-Model": video_data["model"],
-                "X-Generation-Time": str(video_data["generation_time"]),
-            },
-        )
+        # Relay the upstream video as it arrives
+        return _video_response(video_data)
 
     except ValidationError as e:
         logger.warning(f"Validation error in text-to-video: {str(e)}")
@@ -146,6 +169,17 @@ async def text_to_video(
                 "details": e.details,
             },
         )
+    except AIServiceException as e:
+        logger.warning(f"Service error in text-to-video: {str(e)}")
+        raise HTTPException(
+            status_code=e.status_code,
+            detail={
+                "error": e.error_code,
+                "message": str(e),
+                "details": e.details,
+            },
+            headers=e.headers,
+        )
     except Exception as e:
         logger.error(f"Unexpected error in text-to-video: {str(e)}")
         raise HTTPException(
@@ -222,16 +256,8 @@ async def image_to_video(
             num_inference_steps=num_inference_steps,
         )
 
-        # Return video as streaming response
-        return StreamingResponse(
-            iter([video_data["video_bytes"]]),
-            media_type="video/mp4",
-            headers={
-                "Content-Disposition": 'attachment; filename="video.mp4"',
-                "X-Video-Model": video_data["model"],
-                "X-Generation-Time": str(video_data["generation_time"]),
-            },
-        )
+        # Relay the upstream video as it arrives
+        return _video_response(video_data)
 
     except ValidationError as e:
         logger.warning(f"Validation error in image-to-video: {str(e)}")
@@ -283,6 +309,17 @@ async def image_to_video(
                 "details": e.details,
             },
         )
+    except AIServiceException as e:
+        logger.warning(f"Service error in image-to-video: {str(e)}")
+        raise HTTPException(
+            status_code=e.status_code,
+            detail={
+                "error": e.error_code,
+                "message": str(e),
+                "details": e.details,
+            },
+            headers=e.headers,
+        )
     except Exception as e:
         logger.error(f"Unexpected error in image-to-video: {str(e)}")
         raise HTTPException(
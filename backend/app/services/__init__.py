@@ -1,9 +1,17 @@
 """Service layer for the AI Platform backend."""
 
 from app.services.embedding_service import EmbeddingService, get_embedding_service
-from app.services.hf_client import HuggingFaceClient, get_hf_client
+from app.services.fallback_executor import FallbackExecutor, get_fallback_executor
+from app.services.hf_client import (
+    AsyncHuggingFaceClient,
+    HuggingFaceClient,
+    get_async_hf_client,
+    get_hf_client,
+)
+from app.services.http_pool import ProviderConnectionPool, get_connection_pool
 from app.services.image_service import ImageService, get_image_service
 from app.services.llm_service import LLMService, get_llm_service
+from app.services.provider_router import ProviderRouter, get_provider_router
 from app.services.stt_service import STTService, get_stt_service
 from app.services.tts_service import TTSService, get_tts_service
 from app.services.video_service import VideoService, get_video_service
@@ -11,6 +19,14 @@ from app.services.video_service import VideoService, get_video_service
 __all__ = [
     "HuggingFaceClient",
     "get_hf_client",
+    "AsyncHuggingFaceClient",
+    "get_async_hf_client",
+    "FallbackExecutor",
+    "get_fallback_executor",
+    "ProviderConnectionPool",
+    "get_connection_pool",
+    "ProviderRouter",
+    "get_provider_router",
     "ImageService",
     "get_image_service",
     "TTSService",
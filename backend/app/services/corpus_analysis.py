@@ -0,0 +1,220 @@
+"""
+Bulk corpus analysis.
+
+This module embeds a corpus of texts through the embedding service (reusing
+the embedding store), clusters it with mini-batch k-means and finds
+near-duplicate pairs. Vectors are spooled to a temporary file and
+memory-mapped, so memory use is bounded by block sizes rather than corpus
+size, and results are produced as a stream of events.
+"""
+
+import asyncio
+import math
+import tempfile
+import time
+from typing import Any, AsyncIterator, Optional, Union
+
+import numpy as np
+
+from app.services.embedding_service import get_embedding_service
+from app.utils.clustering import assign_clusters, minibatch_kmeans, near_duplicate_pairs
+from app.utils.config import Config
+from app.utils.exceptions import ProcessingError, ValidationError
+from app.utils.logging import get_logger
+from app.utils.similarity import normalize_rows
+
+logger = get_logger(__name__)
+
+ItemId = Union[str, int]
+
+
+class CorpusAnalyzer:
+    """Cluster corpora and find near-duplicate texts."""
+
+    def __init__(self):
+        """Initialize the analyzer."""
+        self.embedding_service = get_embedding_service()
+        self.jobs = 0
+        self.active = 0
+        self.items = 0
+        self.pairs = 0
+
+    async def analyze(
+        self,
+        items: AsyncIterator[tuple[Optional[ItemId], str]],
+        model: Optional[str] = None,
+        clusters: Optional[int] = None,
+        threshold: float = 0.95,
+        assignments: bool = True,
+        duplicates: bool = True,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Embed, cluster and deduplicate a corpus.
+
+        Events are dicts with a 'type' of 'progress' (stage and item count),
+        'cluster' (id, size and the id of the item closest to its centroid),
+        'assignment' (item index and id, cluster and similarity to the
+        centroid), 'duplicate' (the two items' indices and ids and their
+        similarity) and finally 'summary'.
+
+        Args:
+            items: (id or None, text) per item; items without an id are
+                identified by their position
+            model: Model to use (uses default if None)
+            clusters: Number of clusters (default: sqrt(items / 2))
+            threshold: Minimum cosine similarity of near-duplicates
+            assignments: Emit the cluster of every item
+            duplicates: Run the near-duplicate pass
+
+        Yields:
+            dict: Events, in order
+
+        Raises:
+            ValidationError: If the corpus is empty or too large
+            HuggingFaceAPIError: If embedding fails
+        """
+        started = time.monotonic()
+        model = model or Config.DEFAULT_EMBEDDING_MODEL
+        self.jobs += 1
+        self.active += 1
+        try:
+            with tempfile.TemporaryFile(dir=Config.EMBEDDING_CORPUS_TEMP_DIR or None) as spool:
+                ids: list[ItemId] = []
+                embedded: dict[str, Any] = {"model": None, "dimension": 0, "stored": 0}
+                pending: list[str] = []
+                group_size = max(1, Config.EMBEDDING_BATCH_SIZE * Config.EMBEDDING_BATCH_CONCURRENCY)
+
+                async for item_id, text in items:
+                    if len(ids) >= Config.EMBEDDING_CORPUS_MAX_ITEMS:
+                        raise ValidationError(f"Corpus exceeds {Config.EMBEDDING_CORPUS_MAX_ITEMS} items")
+                    ids.append(len(ids) if item_id is None else item_id)
+                    pending.append(text)
+                    if len(pending) >= group_size:
+                        await self._spool(spool, pending, model, embedded)
+                        pending = []
+                        yield {"type": "progress", "stage": "embedding", "items": len(ids)}
+                if pending:
+                    await self._spool(spool, pending, model, embedded)
+                    yield {"type": "progress", "stage": "embedding", "items": len(ids)}
+                if not ids:
+                    raise ValidationError("Corpus contains no items")
+
+                count = len(ids)
+                self.items += count
+                spool.flush()
+                vectors = np.memmap(spool, dtype="<f4", mode="r", shape=(count, embedded["dimension"]))
+
+                yield {"type": "progress", "stage": "clustering", "items": count}
+                k = min(count, clusters or max(1, int(math.sqrt(count / 2))))
+                centroids = await asyncio.to_thread(minibatch_kmeans, vectors, k)
+                # Near-duplicates are searched within finer clusters of about
+                # sqrt(items) members, unless the requested ones are as fine
+                lists = max(1, int(math.sqrt(count)))
+                labels, scores = await asyncio.to_thread(assign_clusters, vectors, centroids, 2 if k >= lists else 1)
+
+                sizes = np.bincount(labels[:, 0], minlength=k)
+                # The first item of each cluster when sorted by cluster, then
+                # by descending similarity, is its representative
+                order = np.lexsort((-scores[:, 0], labels[:, 0]))
+                firsts = order[np.searchsorted(labels[order, 0], np.arange(k))[sizes > 0]]
+                representatives = dict(zip(labels[firsts, 0].tolist(), firsts.tolist()))
+                for cluster, size in enumerate(sizes.tolist()):
+                    representative = representatives.get(cluster)
+                    yield {
+                        "type": "cluster",
+                        "cluster": cluster,
+                        "size": size,
+                        "representative": ids[representative] if representative is not None else None,
+                    }
+                if assignments:
+                    for index, (cluster, score) in enumerate(zip(labels[:, 0].tolist(), scores[:, 0].tolist())):
+                        yield {"type": "assignment", "index": index, "id": ids[index], "cluster": cluster, "score": score}
+
+                pair_count = 0
+                truncated = False
+                if duplicates:
+                    yield {"type": "progress", "stage": "duplicates", "items": count}
+                    if k < lists:
+                        fine = await asyncio.to_thread(minibatch_kmeans, vectors, lists, seed=1)
+                        labels, _ = await asyncio.to_thread(assign_clusters, vectors, fine, 2)
+                    pairs = near_duplicate_pairs(vectors, labels, threshold)
+                    while not truncated:
+                        found = await asyncio.to_thread(next, pairs, None)
+                        if found is None:
+                            break
+                        for first, second, score in zip(*(values.tolist() for values in found)):
+                            if pair_count >= Config.EMBEDDING_CORPUS_MAX_PAIRS:
+                                truncated = True
+                                break
+                            pair_count += 1
+                            yield {
+                                "type": "duplicate",
+                                "first": first,
+                                "second": second,
+                                "first_id": ids[first],
+                                "second_id": ids[second],
+                                "score": score,
+                            }
+                    self.pairs += pair_count
+                del vectors
+
+            elapsed = time.monotonic() - started
+            logger.info(
+                "Corpus analysis completed",
+                extra={"items": count, "clusters": k, "duplicates": pair_count, "elapsed": elapsed}
+            )
+            yield {
+                "type": "summary",
+                "items": count,
+                "clusters": k,
+                "duplicates": pair_count if duplicates else None,
+                "truncated": truncated,
+                "threshold": threshold,
+                "model": embedded["model"],
+                "dimension": embedded["dimension"],
+                "stored": embedded["stored"],
+                "elapsed": round(elapsed, 3),
+            }
+        finally:
+            self.active -= 1
+
+    async def _spool(self, spool: Any, texts: list[str], model: str, embedded: dict[str, Any]) -> None:
+        """Embed a group of texts and append their unit-norm vectors to the spool file."""
+        result = await self.embedding_service.embed_batch(texts, embedded["model"] or model)
+        if embedded["model"] is not None and result["model"] != embedded["model"]:
+            # Every item must be embedded in the same vector space
+            raise ProcessingError(
+                f"Corpus items were embedded by both {embedded['model']} and {result['model']}",
+                "embedding",
+            )
+        embedded["model"] = result["model"]
+        embedded["dimension"] = result["dimension"]
+        embedded["stored"] += result["stored"]
+        data = normalize_rows(result["embeddings"]).astype("<f4").tobytes()
+        await asyncio.to_thread(spool.write, data)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get analysis statistics.
+
+        Returns:
+            dict: Jobs started and running, items analyzed and pairs found
+        """
+        return {"jobs": self.jobs, "active": self.active, "items": self.items, "pairs": self.pairs}
+
+
+# Global analyzer instance
+_corpus_analyzer: Optional[CorpusAnalyzer] = None
+
+
+def get_corpus_analyzer() -> CorpusAnalyzer:
+    """
+    Get or create the global corpus analyzer.
+
+    Returns:
+        CorpusAnalyzer: The global analyzer instance
+    """
+    global _corpus_analyzer
+    if _corpus_analyzer is None:
+        _corpus_analyzer = CorpusAnalyzer()
+    return _corpus_analyzer
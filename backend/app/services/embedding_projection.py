@@ -0,0 +1,264 @@
+"""
+Embedding dimension reduction.
+
+This module shortens embedding vectors, either by truncating them to their
+first dimensions (for Matryoshka-trained models, whose leading dimensions
+carry most of the information) or with a PCA projection learned from the
+model's vectors in the embedding store. Either way a whole batch is reduced
+with one slice or one matrix product and the rows are renormalized to unit
+length.
+
+Each model's PCA is saved under Config.EMBEDDING_PROJECTION_DIR as
+<model>.npz with the mean, the principal components (most variance first)
+and their explained variance, so it is fitted once and shared by all
+workers.
+"""
+
+import asyncio
+import os
+import threading
+from typing import Any, NamedTuple, Optional
+
+import numpy as np
+
+from app.services.embedding_store import get_embedding_store
+from app.utils.config import Config
+from app.utils.exceptions import ValidationError
+from app.utils.logging import get_logger
+from app.utils.similarity import normalize_rows
+
+logger = get_logger(__name__)
+
+# Ways of reducing dimensions ('auto' truncates Matryoshka models, else PCA)
+PROJECTION_METHODS = ("auto", "truncate", "pca")
+
+# Rows accumulated per block when fitting
+FIT_BLOCK_ROWS = 65536
+
+
+class Projection(NamedTuple):
+    """A fitted PCA projection."""
+
+    mean: np.ndarray  # (dim,)
+    components: np.ndarray  # (dim, dim), one component per row, most variance first
+    explained_variance: np.ndarray  # (dim,)
+    rows: int  # vectors it was fitted on
+    mtime: float  # modification time of its file
+
+
+def fit_pca(vectors: np.ndarray, sample: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Fit a PCA of unit-normalized vectors.
+
+    Args:
+        vectors: (rows, dim) vectors (may be memory-mapped)
+        sample: Maximum rows to fit on (a random sample of them)
+        seed: Random seed for the sample
+
+    Returns:
+        tuple: (mean, components, explained variance), components as rows,
+        most variance first
+    """
+    count, dim = vectors.shape
+    rows = np.arange(count)
+    if count > sample:
+        rows = np.sort(np.random.default_rng(seed).choice(count, size=sample, replace=False))
+    total = np.zeros(dim, dtype=np.float64)
+    scatter = np.zeros((dim, dim), dtype=np.float64)
+    for start in range(0, len(rows), FIT_BLOCK_ROWS):
+        block = normalize_rows(np.asarray(vectors[rows[start:start + FIT_BLOCK_ROWS]], dtype=np.float32))
+        total += block.sum(axis=0, dtype=np.float64)
+        scatter += block.T.astype(np.float64) @ block
+    mean = total / len(rows)
+    covariance = scatter / len(rows) - np.outer(mean, mean)
+    variance, components = np.linalg.eigh(covariance)
+    order = np.argsort(variance)[::-1]
+    return (
+        mean.astype(np.float32),
+        np.ascontiguousarray(components[:, order].T, dtype=np.float32),
+        np.maximum(variance[order], 0.0).astype(np.float32),
+    )
+
+
+class EmbeddingProjector:
+    """Reduce embedding dimensions per model."""
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Initialize the projector.
+
+        Args:
+            directory: Directory of fitted projections
+        """
+        self.directory = directory or Config.EMBEDDING_PROJECTION_DIR
+        self._projections: dict[str, Projection] = {}
+        self._lock = threading.Lock()
+        self._fit_lock = asyncio.Lock()
+        self.projected = 0
+
+    def _path(self, model: str) -> str:
+        return os.path.join(self.directory, model.replace("/", "--") + ".npz")
+
+    def load(self, model: str) -> Optional[Projection]:
+        """
+        Get a model's fitted projection, picking up refits by other workers.
+
+        Args:
+            model: Model ID
+
+        Returns:
+            Projection: The projection, or None if the model has none
+        """
+        path = self._path(model)
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            projection = self._projections.get(model)
+        if projection is not None and projection.mtime == mtime:
+            return projection
+        with np.load(path) as data:
+            projection = Projection(
+                data["mean"], data["components"], data["explained_variance"], int(data["rows"]), mtime
+            )
+        with self._lock:
+            self._projections[model] = projection
+        return projection
+
+    def fit(self, model: str, sample: Optional[int] = None) -> Projection:
+        """
+        Fit and save a model's PCA projection from its stored embeddings.
+
+        Args:
+            model: Model ID
+            sample: Maximum vectors to fit on (Config.EMBEDDING_PROJECTION_SAMPLE)
+
+        Returns:
+            Projection: The fitted projection
+
+        Raises:
+            ValidationError: If fewer than Config.EMBEDDING_PROJECTION_MIN_ROWS
+                vectors of the model are stored
+        """
+        vectors = get_embedding_store().for_model(model).vectors()
+        if len(vectors) < max(Config.EMBEDDING_PROJECTION_MIN_ROWS, 2):
+            raise ValidationError(
+                f"PCA for '{model}' needs at least {Config.EMBEDDING_PROJECTION_MIN_ROWS} stored embeddings, "
+                f"found {len(vectors)}",
+                details={"model": model, "stored": len(vectors)},
+            )
+        sample = sample or Config.EMBEDDING_PROJECTION_SAMPLE
+        mean, components, explained_variance = fit_pca(vectors, sample)
+        rows = min(len(vectors), sample)
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(model)
+        temp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(temp_path, mean=mean, components=components, explained_variance=explained_variance, rows=rows)
+        os.replace(temp_path, path)
+        logger.info(f"Fitted PCA projection for {model} on {rows} vectors")
+        return self.load(model)
+
+    async def project(
+        self,
+        model: str,
+        matrix: np.ndarray,
+        dimensions: Optional[int],
+        method: str = "auto",
+    ) -> tuple[np.ndarray, Optional[str]]:
+        """
+        Reduce a batch of embeddings to a number of dimensions.
+
+        A model without a saved PCA is fitted on first use.
+
+        Args:
+            model: Model that produced the vectors
+            matrix: (count, dim) float32 embeddings
+            dimensions: Output dimensions (None or >= dim keeps the vectors)
+            method: 'auto', 'truncate' or 'pca'
+
+        Returns:
+            tuple: (reduced unit-norm vectors, method used or None)
+
+        Raises:
+            ValidationError: If the model does not support the method
+        """
+        if dimensions is None or dimensions >= matrix.shape[1]:
+            return matrix, None
+        matryoshka = model in Config.EMBEDDING_MATRYOSHKA_MODELS
+        if method == "auto":
+            method = "truncate" if matryoshka else "pca"
+        if method == "truncate":
+            if not matryoshka:
+                raise ValidationError(
+                    f"Model '{model}' is not Matryoshka-trained; truncating it would lose information. "
+                    "Use projection 'pca' or add it to EMBEDDING_MATRYOSHKA_MODELS",
+                    details={"model": model},
+                )
+            self.projected += len(matrix)
+            return normalize_rows(matrix[:, :dimensions]), method
+
+        projection = await asyncio.to_thread(self.load, model)
+        if projection is None:
+            async with self._fit_lock:
+                projection = await asyncio.to_thread(self.load, model) or await asyncio.to_thread(self.fit, model)
+        if len(projection.mean) != matrix.shape[1]:
+            raise ValidationError(
+                f"PCA for '{model}' was fitted on {len(projection.mean)}-dimensional vectors, "
+                f"not {matrix.shape[1]}",
+                details={"model": model},
+            )
+        weights = projection.components[:dimensions].T
+        # (x - mean) @ W as one product plus a precomputable offset
+        reduced = normalize_rows(matrix) @ weights - projection.mean @ weights
+        self.projected += len(matrix)
+        return normalize_rows(reduced), method
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get projection statistics.
+
+        Returns:
+            dict: Directory, Matryoshka models, vectors projected by this
+            process, and per loaded model the fitted rows and the share of
+            variance kept at common dimensions
+        """
+        with self._lock:
+            projections = dict(self._projections)
+        models = {}
+        for model, projection in projections.items():
+            total = float(projection.explained_variance.sum()) or 1.0
+            cumulative = np.cumsum(projection.explained_variance) / total
+            models[model] = {
+                "rows": projection.rows,
+                "dimension": len(projection.mean),
+                "variance_kept": {
+                    str(dimensions): round(float(cumulative[dimensions - 1]), 4)
+                    for dimensions in (64, 128, 256, 512)
+                    if dimensions < len(cumulative)
+                },
+            }
+        return {
+            "directory": self.directory,
+            "matryoshka_models": Config.EMBEDDING_MATRYOSHKA_MODELS,
+            "projected": self.projected,
+            "models": models,
+        }
+
+
+# Global projector instance
+_embedding_projector: Optional[EmbeddingProjector] = None
+
+
+def get_embedding_projector() -> EmbeddingProjector:
+    """
+    Get or create the global embedding projector.
+
+    Returns:
+        EmbeddingProjector: The global projector instance
+    """
+    global _embedding_projector
+    if _embedding_projector is None:
+        _embedding_projector = EmbeddingProjector()
+    return _embedding_projector
@@ -4,41 +4,140 @@ Embeddings service.
 This module handles generating text embeddings using HuggingFace models.
 """
 
-from typing import Optional
+import asyncio
+from typing import Any, AsyncIterator, Optional
 
-from app.services.hf_client import get_hf_client
+import numpy as np
+
+from app.services.embedding_projection import get_embedding_projector
+from app.services.embedding_store import get_embedding_store
+from app.services.fallback_executor import get_fallback_executor
+from app.services.hf_client import get_async_hf_client
+from app.utils.batching import MicroBatcher
+from app.utils.chunking import Chunk, WindowChunker, load_tokenizer, max_window_tokens
 from app.utils.config import Config
-from app.utils.exceptions import HuggingFaceAPIError, ProcessingError
+from app.utils.exceptions import AIServiceException, ProcessingError, ValidationError
 from app.utils.logging import get_logger
+from app.utils.response_cache import cache_lookup_allowed, cache_store_allowed
+from app.utils.similarity import normalize_rows, select_top_k, similarity_scores
 
 logger = get_logger(__name__)
 
+# How chunk vectors are pooled into a document vector
+DOCUMENT_POOLING = ("mean", "weighted")
+
+# Parts of a document embedding to return
+DOCUMENT_OUTPUTS = ("pooled", "chunks", "both")
+
+
+def split_vectors(response: Any, count: int) -> np.ndarray:
+    """
+    Normalize a feature-extraction response into one vector per input text.
+
+    Providers return a single vector, a (texts, dim) matrix, or per-token
+    (texts, tokens, dim) outputs, of which the first token's vector is used.
+
+    Args:
+        response: Upstream response (nested lists or array)
+        count: Number of input texts
+
+    Returns:
+        np.ndarray: (count, dim) float32 matrix
+
+    Raises:
+        ProcessingError: If the response does not hold one vector per text
+    """
+    vectors = np.asarray(response, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    elif vectors.ndim == 3:
+        vectors = vectors[:, 0, :]
+    if count == 1 and vectors.ndim == 2:
+        # Per-token output of a single text
+        vectors = vectors[:1]
+    if vectors.ndim != 2 or len(vectors) != count:
+        raise ProcessingError(
+            f"Expected {count} embedding vectors, got an array of shape {vectors.shape}",
+            "embedding",
+        )
+    return vectors
+
+
+def plan_batches(texts: list[str], model: str) -> list[list[str]]:
+    """
+    Split texts into upstream batches sized for a model.
+
+    Batches hold at most Config.EMBEDDING_BATCH_SIZES[model] texts
+    (Config.EMBEDDING_BATCH_SIZE for unlisted models) and, unless a single
+    text exceeds it, at most Config.EMBEDDING_BATCH_MAX_CHARS characters.
+
+    Args:
+        texts: Texts to embed
+        model: Model ID
+
+    Returns:
+        list: Batches of texts, in input order
+    """
+    max_texts = max(1, Config.EMBEDDING_BATCH_SIZES.get(model, Config.EMBEDDING_BATCH_SIZE))
+    batches: list[list[str]] = []
+    batch: list[str] = []
+    chars = 0
+    for text in texts:
+        if batch and (len(batch) >= max_texts or chars + len(text) > Config.EMBEDDING_BATCH_MAX_CHARS):
+            batches.append(batch)
+            batch, chars = [], 0
+        batch.append(text)
+        chars += len(text)
+    if batch:
+        batches.append(batch)
+    return batches
+
 
 class EmbeddingService:
     """Service for generating text embeddings."""
     
     def __init__(self):
         """Initialize the embedding service."""
-        self.hf_client = get_hf_client()
+        self.hf_client = get_async_hf_client()
+        self.fallback = get_fallback_executor()
+        self.store = get_embedding_store() if Config.EMBEDDING_STORE_ENABLED else None
+        self.projector = get_embedding_projector()
+        self.batcher: Optional[MicroBatcher] = None
+        if Config.EMBEDDING_MICROBATCH_ENABLED:
+            self.batcher = MicroBatcher(
+                "feature_extraction",
+                self._embed_micro_batch,
+                Config.EMBEDDING_MICROBATCH_MAX_SIZE,
+                Config.EMBEDDING_MICROBATCH_WINDOW,
+            )
     
-    def embed(
+    async def embed(
         self,
         text: str,
         model: Optional[str] = None,
+        dimensions: Optional[int] = None,
+        projection: str = "auto",
     ) -> dict:
         """
         Generate embeddings for text.
         
+        Embeddings already in the embedding store are served from it; new
+        ones are added to it. Concurrent calls for the same model are merged
+        into batched upstream calls by the micro-batcher.
+        
         Args:
             text: Text to embed
             model: Model to use (uses default if None)
+            dimensions: Reduce the vector to this many dimensions (optional)
+            projection: 'auto', 'truncate' or 'pca' (see EmbeddingProjector)
             
         Returns:
-            dict: Embedding result with 'embedding' vector and metadata
+            dict: Embedding result with the 'embedding' float32 vector and metadata
             
         Raises:
             HuggingFaceAPIError: If embedding fails
             ProcessingError: If text processing fails
+            ValidationError: If the model does not support the projection
         """
         model = model or Config.DEFAULT_EMBEDDING_MODEL
         
@@ -48,35 +147,437 @@ class EmbeddingService:
                 extra={"text_length": len(text), "model": model}
             )
             
-            # Call HuggingFace API
-            embedding = self.hf_client.feature_extraction(
-                text=text,
-                model=model,
-            )
+            stored = None
+            if self.store is not None and cache_lookup_allowed():
+                [stored] = await self.store.lookup(model, [text])
+            
+            if stored is not None:
+                embedding, model_used = stored, model
+            elif self.batcher is not None:
+                # The batch stores the vector unless this request forbids it
+                embedding, model_used = await self.batcher.submit(model, (text, cache_store_allowed()))
+            else:
+                # Call HuggingFace API (fallback models produce vectors in a
+                # different space, so they are only tried when explicitly enabled)
+                embedding, model_used = await self.fallback.execute(
+                    "feature_extraction",
+                    model,
+                    Config.EMBEDDING_FALLBACK_MODELS if Config.EMBEDDING_FALLBACK_ENABLED else [],
+                    lambda candidate: self.hf_client.feature_extraction(
+                        text=text,
+                        model=candidate,
+                    ),
+                )
+                embedding = split_vectors(embedding, 1)[0]
+                if self.store is not None and cache_store_allowed():
+                    await self.store.save(model_used, [text], embedding[None, :])
             
-            # Handle different response formats
-            if isinstance(embedding, list) and len(embedding) > 0:
-                if isinstance(embedding[0], list):
-                    # Multiple embeddings, take the first one
-                    embedding = embedding[0]
+            reduced, method = await self.projector.project(model_used, embedding[None, :], dimensions, projection)
+            embedding = reduced[0]
             
             logger.info(
                 f"Embeddings generated successfully",
-                extra={"embedding_dimension": len(embedding), "model": model}
+                extra={"embedding_dimension": len(embedding), "model": model_used}
             )
             
             return {
                 "embedding": embedding,
                 "dimension": len(embedding),
-                "model": model,
+                "model": model_used,
                 "tokens_used": None,
+                "projection": method,
             }
         
-        except HuggingFaceAPIError:
+        except AIServiceException:
             raise
         except Exception as e:
             logger.error(f"Error generating embeddings: {str(e)}")
             raise ProcessingError(f"Failed to generate embeddings: {str(e)}", "embedding")
+    
+    async def embed_batch(
+        self,
+        texts: list[str],
+        model: Optional[str] = None,
+        dimensions: Optional[int] = None,
+        projection: str = "auto",
+    ) -> dict:
+        """
+        Generate embeddings for a list of texts.
+        
+        Identical texts are embedded once, texts in the embedding store are
+        served from it, and the rest are sent upstream in batches sized for
+        the model, up to Config.EMBEDDING_BATCH_CONCURRENCY at a time. A
+        dimension reduction is applied to the whole matrix at once.
+        
+        Args:
+            texts: Texts to embed
+            model: Model to use (uses default if None)
+            dimensions: Reduce the vectors to this many dimensions (optional)
+            projection: 'auto', 'truncate' or 'pca' (see EmbeddingProjector)
+            
+        Returns:
+            dict: 'embeddings' as a (texts, dim) float32 matrix in input order,
+            plus dimension, model, unique/stored text counts and projection
+            
+        Raises:
+            HuggingFaceAPIError: If embedding fails
+            ProcessingError: If text processing fails
+            ValidationError: If the model does not support the projection
+        """
+        model = model or Config.DEFAULT_EMBEDDING_MODEL
+        unique = list(dict.fromkeys(texts))
+        
+        try:
+            logger.info(
+                f"Generating batch embeddings with model {model}",
+                extra={"texts": len(texts), "unique_texts": len(unique), "model": model}
+            )
+            
+            vectors: dict[str, np.ndarray] = {}
+            if self.store is not None and cache_lookup_allowed():
+                for text, stored in zip(unique, await self.store.lookup(model, unique)):
+                    if stored is not None:
+                        vectors[text] = stored
+            stored_count = len(vectors)
+            
+            missing = [text for text in unique if text not in vectors]
+            model_used = model
+            if missing:
+                computed, model_used = await self._embed_upstream(missing, model)
+                if model_used != model and stored_count:
+                    # Stored vectors belong to the requested model's space
+                    rest = [text for text in unique if text not in computed]
+                    computed.update((await self._embed_upstream(rest, model_used, pinned=True))[0])
+                    stored_count = 0
+                vectors.update(computed)
+                if self.store is not None and cache_store_allowed():
+                    new_texts = list(computed)
+                    await self.store.save(model_used, new_texts, np.stack([computed[text] for text in new_texts]))
+            
+            widths = {len(vector) for vector in vectors.values()}
+            if len(widths) > 1:
+                raise ProcessingError(f"Embedding dimensions differ within the batch: {sorted(widths)}", "embedding")
+            
+            logger.info(
+                f"Batch embeddings generated successfully",
+                extra={"texts": len(texts), "computed": len(unique) - stored_count, "model": model_used}
+            )
+            
+            embeddings, method = await self.projector.project(
+                model_used, np.stack([vectors[text] for text in texts]), dimensions, projection
+            )
+            
+            return {
+                "embeddings": embeddings,
+                "dimension": embeddings.shape[1],
+                "model": model_used,
+                "count": len(texts),
+                "unique": len(unique),
+                "stored": stored_count,
+                "projection": method,
+            }
+        
+        except AIServiceException:
+            raise
+        except Exception as e:
+            logger.error(f"Error generating batch embeddings: {str(e)}")
+            raise ProcessingError(f"Failed to generate embeddings: {str(e)}", "embedding")
+    
+    async def similarity(
+        self,
+        query: Optional[str] = None,
+        candidates: Optional[list[str]] = None,
+        query_vector: Optional[list[float]] = None,
+        candidate_vectors: Optional[list[list[float]]] = None,
+        model: Optional[str] = None,
+        top_k: Optional[int] = None,
+        metric: str = "cosine",
+    ) -> dict:
+        """
+        Score candidates against a query and rank them.
+        
+        The query and candidate texts are embedded together in one batch
+        (so stored texts are not sent upstream), then every candidate is
+        scored with a single matrix-vector product.
+        
+        Args:
+            query: Query text (or query_vector)
+            candidates: Candidate texts (or candidate_vectors)
+            query_vector: Precomputed query embedding
+            candidate_vectors: Precomputed candidate embeddings
+            model: Model to use for texts (uses default if None)
+            top_k: Number of candidates to return (all if None)
+            metric: 'cosine' or 'dot'
+            
+        Returns:
+            dict: 'results' as (index, score, text) dicts best first, plus
+            model, metric, candidate count and stored text count
+            
+        Raises:
+            ValidationError: If vector dimensions differ
+            HuggingFaceAPIError: If embedding fails
+        """
+        texts = ([query] if query is not None else []) + (candidates or [])
+        embedded = np.zeros((0, 0), dtype=np.float32)
+        model_used = None
+        stored = 0
+        if texts:
+            result = await self.embed_batch(texts, model)
+            embedded, model_used, stored = result["embeddings"], result["model"], result["stored"]
+        
+        try:
+            query_matrix = embedded[:1] if query is not None else np.asarray([query_vector], dtype=np.float32)
+            if candidates is not None:
+                candidate_matrix = embedded[len(texts) - len(candidates):]
+            else:
+                candidate_matrix = np.asarray(candidate_vectors, dtype=np.float32)
+        except ValueError:
+            raise ValidationError("Candidate vectors must all have the same dimension")
+        if candidate_matrix.ndim != 2 or query_matrix.shape[1] != candidate_matrix.shape[1]:
+            raise ValidationError(
+                "Query and candidate vectors must have the same dimension",
+                details={"query_dimension": query_matrix.shape[1]},
+            )
+        
+        scores = similarity_scores(query_matrix, candidate_matrix, metric)
+        positions, selected = select_top_k(scores, top_k or len(candidate_matrix))
+        return {
+            "results": [
+                {
+                    "index": int(position),
+                    "score": float(score),
+                    "text": candidates[position] if candidates is not None else None,
+                }
+                for position, score in zip(positions[0], selected[0])
+            ],
+            "model": model_used,
+            "metric": metric,
+            "count": len(candidate_matrix),
+            "stored": stored,
+        }
+    
+    async def embed_document(
+        self,
+        pieces: AsyncIterator[str],
+        model: Optional[str] = None,
+        window: Optional[int] = None,
+        overlap: Optional[int] = None,
+        pooling: str = "mean",
+        output: str = "pooled",
+    ) -> dict:
+        """
+        Embed a long document in overlapping token windows.
+        
+        The document is chunked as it arrives; every
+        EMBEDDING_BATCH_SIZE x EMBEDDING_BATCH_CONCURRENCY windows are
+        embedded through embed_batch and folded into a running pooled sum,
+        so only the vectors (or, for pooled output, a single vector) are kept.
+        
+        Args:
+            pieces: The document text, in pieces
+            model: Model to use (uses default if None)
+            window: Tokens per window (Config.EMBEDDING_DOCUMENT_WINDOW if None,
+                capped at the model's maximum input length)
+            overlap: Tokens shared by consecutive windows
+                (Config.EMBEDDING_DOCUMENT_OVERLAP if None)
+            pooling: 'mean', or 'weighted' by the tokens in each window
+            output: 'pooled', 'chunks' or 'both'
+            
+        Returns:
+            dict: 'embedding' (unit-norm pooled vector) and/or 'chunks'
+            (offsets, token count and vector per window), plus dimension,
+            model, pooling, chunk/token counts and stored window count
+            
+        Raises:
+            ValidationError: If the options are invalid, the window exceeds the
+                model's maximum input length or the document is empty
+            HuggingFaceAPIError: If embedding fails
+        """
+        model = model or Config.DEFAULT_EMBEDDING_MODEL
+        requested_window = window
+        window = window or Config.EMBEDDING_DOCUMENT_WINDOW
+        overlap = Config.EMBEDDING_DOCUMENT_OVERLAP if overlap is None else overlap
+        if pooling not in DOCUMENT_POOLING:
+            raise ValidationError(f"Invalid pooling '{pooling}'. Must be one of {DOCUMENT_POOLING}")
+        if output not in DOCUMENT_OUTPUTS:
+            raise ValidationError(f"Invalid output '{output}'. Must be one of {DOCUMENT_OUTPUTS}")
+        if not 0 <= overlap < window:
+            raise ValidationError(f"Overlap must be between 0 and window - 1 ({window - 1}) tokens")
+        
+        try:
+            tokenizer, exact = await asyncio.to_thread(load_tokenizer, model)
+            # Longer windows would be silently truncated by the model
+            limit = await asyncio.to_thread(max_window_tokens, model, tokenizer, exact)
+            if limit is not None and window > limit:
+                if requested_window is not None:
+                    raise ValidationError(
+                        f"Window of {window} tokens exceeds the {limit}-token input limit of {model}",
+                        details={"max_window": limit},
+                    )
+                window = limit
+                if overlap >= window:
+                    raise ValidationError(f"Overlap must be between 0 and window - 1 ({window - 1}) tokens")
+            chunker = WindowChunker(tokenizer, window, overlap, exact)
+            group_size = max(1, Config.EMBEDDING_BATCH_SIZE * Config.EMBEDDING_BATCH_CONCURRENCY)
+            keep_chunks = output != "pooled"
+            chunks: list[dict] = []
+            pooled: Optional[np.ndarray] = None
+            total_weight = 0.0
+            model_used: Optional[str] = None
+            stored = 0
+            chunk_count = 0
+            
+            async def embed_group(group: list[Chunk]) -> None:
+                nonlocal pooled, total_weight, model_used, stored, chunk_count
+                result = await self.embed_batch([chunk.text for chunk in group], model_used or model)
+                if model_used is not None and result["model"] != model_used:
+                    # Every window must be embedded in the same vector space
+                    raise ProcessingError(
+                        f"Document windows were embedded by both {model_used} and {result['model']}",
+                        "embedding",
+                    )
+                model_used = result["model"]
+                stored += result["stored"]
+                matrix = result["embeddings"]
+                if pooling == "weighted":
+                    weights = np.array([chunk.tokens for chunk in group], dtype=np.float32)
+                else:
+                    weights = np.ones(len(group), dtype=np.float32)
+                pooled = weights @ matrix if pooled is None else pooled + weights @ matrix
+                total_weight += float(weights.sum())
+                if keep_chunks:
+                    chunks.extend(
+                        {"index": chunk_count + position, "start": chunk.start, "end": chunk.end,
+                         "tokens": chunk.tokens, "embedding": vector}
+                        for position, (chunk, vector) in enumerate(zip(group, matrix))
+                    )
+                chunk_count += len(group)
+            
+            pending: list[Chunk] = []
+            async for piece in pieces:
+                pending.extend(await asyncio.to_thread(chunker.feed, piece))
+                while len(pending) >= group_size:
+                    await embed_group(pending[:group_size])
+                    pending = pending[group_size:]
+            pending.extend(await asyncio.to_thread(chunker.finish))
+            for start in range(0, len(pending), group_size):
+                await embed_group(pending[start:start + group_size])
+            
+            if pooled is None:
+                raise ValidationError("Document contains no text")
+            
+            logger.info(
+                f"Document embeddings generated successfully",
+                extra={"chunks": chunk_count, "tokens": chunker.tokens, "model": model_used}
+            )
+            
+            return {
+                "embedding": normalize_rows((pooled / total_weight)[None, :])[0] if output != "chunks" else None,
+                "chunks": chunks if keep_chunks else None,
+                "dimension": len(pooled),
+                "model": model_used,
+                "pooling": pooling,
+                "chunk_count": chunk_count,
+                "tokens": chunker.tokens,
+                "approximate_tokens": not exact,
+                "stored": stored,
+            }
+        
+        except AIServiceException:
+            raise
+        except Exception as e:
+            logger.error(f"Error generating document embeddings: {str(e)}")
+            raise ProcessingError(f"Failed to generate embeddings: {str(e)}", "embedding")
+    
+    async def _embed_micro_batch(
+        self,
+        model: str,
+        items: list[tuple[str, bool]],
+    ) -> list[tuple[np.ndarray, str]]:
+        """
+        Embed a micro-batch of single-text requests.
+        
+        Args:
+            model: Requested model
+            items: (text, whether the request allows storing it) per request
+            
+        Returns:
+            list: (vector, model that served it) per request, in order
+        """
+        texts = list(dict.fromkeys(text for text, _ in items))
+        computed, model_used = await self._embed_upstream(texts, model)
+        if self.store is not None:
+            to_store = list(dict.fromkeys(text for text, allowed in items if allowed))
+            if to_store:
+                await self.store.save(model_used, to_store, np.stack([computed[text] for text in to_store]))
+        return [(computed[text], model_used) for text, _ in items]
+    
+    def batching_stats(self) -> dict:
+        """
+        Get micro-batching statistics.
+        
+        Returns:
+            dict: Batcher statistics, or {'enabled': False}
+        """
+        if self.batcher is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.batcher.stats()}
+    
+    async def _embed_upstream(
+        self,
+        texts: list[str],
+        model: str,
+        pinned: bool = False,
+    ) -> tuple[dict[str, np.ndarray], str]:
+        """
+        Embed unique texts upstream in concurrent batches.
+        
+        With fallback enabled, the first batch picks the serving model and
+        the remaining batches are pinned to it, so all vectors share a space.
+        
+        Args:
+            texts: Unique texts to embed
+            model: Requested model
+            pinned: Never fall back to another model
+            
+        Returns:
+            tuple: (vector per text, model that served the batches)
+        """
+        batches = plan_batches(texts, model)
+        semaphore = asyncio.Semaphore(max(1, Config.EMBEDDING_BATCH_CONCURRENCY))
+        
+        async def run(batch: list[str], serving: str, fallbacks: list[str]) -> tuple[list[str], np.ndarray, str]:
+            async with semaphore:
+                response, served = await self.fallback.execute(
+                    "feature_extraction",
+                    serving,
+                    fallbacks,
+                    lambda candidate: self.hf_client.feature_extraction_batch(
+                        texts=batch,
+                        model=candidate,
+                    ),
+                )
+            return batch, split_vectors(response, len(batch)), served
+        
+        fallbacks = [] if pinned or not Config.EMBEDDING_FALLBACK_ENABLED else Config.EMBEDDING_FALLBACK_MODELS
+        results = []
+        if fallbacks:
+            results.append(await run(batches[0], model, fallbacks))
+            model = results[0][2]
+            batches = batches[1:]
+        tasks = [asyncio.ensure_future(run(batch, model, [])) for batch in batches]
+        try:
+            results.extend(await asyncio.gather(*tasks))
+        except BaseException:
+            # Do not keep spending upstream capacity on a failed request
+            for task in tasks:
+                task.cancel()
+            raise
+        
+        computed: dict[str, np.ndarray] = {}
+        for batch, matrix, _ in results:
+            computed.update(zip(batch, matrix))
+        return computed, model
 
 
 # Global service instance
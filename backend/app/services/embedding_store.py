@@ -0,0 +1,452 @@
+"""
+Persistent embedding store.
+
+This module keeps every embedding the service has computed in an append-only,
+memory-mapped matrix per model, so texts that are embedded again (e.g. the
+same chunks in repeated RAG ingestion runs) are served from disk instead of
+the upstream API. Opening a store only maps its files, so start-up time does
+not grow with the number of vectors, and every worker process on the node
+reads the same files concurrently.
+
+Each model directory holds:
+
+- vectors.bin: rows of float32 (or float16) values, in insertion order
+- digests.bin: the SHA-256 of each row's text, in the same order
+- index.bin: an open-addressing hash table of (key, row) slots, where the key
+  is the first 8 bytes of the digest; it is derived from digests.bin and
+  rebuilt at twice the size when it fills up
+- meta.json: dimension and dtype
+
+Writers append under an exclusive file lock; readers never lock and pick up
+other processes' rows when they next miss.
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Optional, Sequence
+
+import numpy as np
+
+from app.utils.config import Config
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Index slot layout; a key of 0 marks an empty slot
+_SLOT = np.dtype([("key", "<u8"), ("row", "<u8")])
+
+# SHA-256 digest size
+DIGEST_SIZE = 32
+
+# Index slots of a new store (must be a power of two)
+INITIAL_SLOTS = 1024
+
+# Index load factor that triggers a rebuild at twice the size
+MAX_LOAD = 0.7
+
+SUPPORTED_DTYPES = ("float32", "float16")
+
+
+def text_digest(text: str) -> bytes:
+    """
+    Get the content address of a text.
+
+    Args:
+        text: Input text
+
+    Returns:
+        bytes: SHA-256 digest of the UTF-8 encoded text
+    """
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+def _slot_key(digest: bytes) -> int:
+    return int.from_bytes(digest[:8], "little") | 1
+
+
+def _build_table(keys: np.ndarray, capacity: int) -> np.ndarray:
+    """
+    Build an index table for the given row keys with vectorized linear probing.
+
+    Args:
+        keys: Slot key of each row, in row order
+        capacity: Number of slots (a power of two)
+
+    Returns:
+        np.ndarray: Index table
+    """
+    table = np.zeros(capacity, dtype=_SLOT)
+    mask = np.uint64(capacity - 1)
+    slots = keys & mask
+    pending = np.arange(len(keys))
+    while pending.size:
+        candidates = slots[pending]
+        free = table["key"][candidates] == 0
+        free_slots, first = np.unique(candidates[free], return_index=True)
+        winners = pending[free][first]
+        table["key"][free_slots] = keys[winners]
+        table["row"][free_slots] = winners
+        # Every remaining row's candidate slot is now taken; probe the next one
+        pending = pending[~np.isin(pending, winners)]
+        slots[pending] = (slots[pending] + np.uint64(1)) & mask
+    return table
+
+
+class ModelEmbeddingStore:
+    """Memory-mapped embeddings of one model."""
+
+    def __init__(self, directory: str, dtype: str = "float32"):
+        """
+        Open (or create) a model's store.
+
+        Args:
+            directory: Directory of the model's files
+            dtype: Storage dtype for a new store ('float32' or 'float16');
+                an existing store keeps the dtype it was created with
+        """
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported embedding store dtype '{dtype}'")
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._vectors_path = os.path.join(directory, "vectors.bin")
+        self._digests_path = os.path.join(directory, "digests.bin")
+        self._index_path = os.path.join(directory, "index.bin")
+        self._meta_path = os.path.join(directory, "meta.json")
+        self._lock_path = os.path.join(directory, ".lock")
+
+        self.dim: Optional[int] = None
+        self.dtype = np.dtype(dtype)
+        self._read_meta()
+
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None
+        self._digests: Optional[np.ndarray] = None
+        self._keys: Optional[np.ndarray] = None
+        self._rows: Optional[np.ndarray] = None
+        self._index_id: Optional[tuple[int, int]] = None
+        self.rows = 0
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        with self._lock:
+            self._refresh()
+
+    def _read_meta(self) -> None:
+        try:
+            with open(self._meta_path) as file:
+                meta = json.load(file)
+        except FileNotFoundError:
+            return
+        self.dim = int(meta["dim"])
+        self.dtype = np.dtype(meta["dtype"])
+
+    def _write_meta(self, dim: int) -> None:
+        temp_path = f"{self._meta_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump({"dim": dim, "dtype": self.dtype.name}, file)
+        os.replace(temp_path, self._meta_path)
+        self.dim = dim
+
+    @staticmethod
+    def _size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def _committed_rows(self) -> int:
+        if self.dim is None:
+            return 0
+        row_bytes = self.dim * self.dtype.itemsize
+        return min(self._size(self._vectors_path) // row_bytes, self._size(self._digests_path) // DIGEST_SIZE)
+
+    def _refresh(self) -> None:
+        """Remap the files if another process (or this one) changed them."""
+        if self.dim is None:
+            self._read_meta()
+            if self.dim is None:
+                return
+        rows = self._committed_rows()
+        if rows != self.rows or self._vectors is None:
+            self.rows = rows
+            if rows:
+                self._vectors = np.memmap(self._vectors_path, dtype=self.dtype, mode="r", shape=(rows, self.dim))
+                self._digests = np.memmap(self._digests_path, dtype=np.uint8, mode="r", shape=(rows, DIGEST_SIZE))
+        try:
+            stat = os.stat(self._index_path)
+        except FileNotFoundError:
+            self._keys = self._rows = None
+            self._index_id = None
+            return
+        index_id = (stat.st_ino, stat.st_size)
+        if index_id != self._index_id and stat.st_size:
+            table = np.memmap(self._index_path, dtype=_SLOT, mode="r+")
+            self._keys, self._rows = table["key"], table["row"]
+            self._index_id = index_id
+
+    def _find(self, digest: bytes) -> Optional[int]:
+        if self._keys is None or not self.rows:
+            return None
+        key = _slot_key(digest)
+        mask = len(self._keys) - 1
+        slot = key & mask
+        while True:
+            slot_key = int(self._keys[slot])
+            if slot_key == 0:
+                return None
+            if slot_key == key:
+                row = int(self._rows[slot])
+                if row < self.rows and self._digests[row].tobytes() == digest:
+                    return row
+            slot = (slot + 1) & mask
+
+    def get_many(self, texts: Sequence[str]) -> list[Optional[np.ndarray]]:
+        """
+        Look up stored embeddings.
+
+        Args:
+            texts: Input texts
+
+        Returns:
+            list: A float32 vector per text, or None where it is not stored
+        """
+        digests = [text_digest(text) for text in texts]
+        with self._lock:
+            rows = [self._find(digest) for digest in digests]
+            if None in rows:
+                # Another process may have added them since the last remap
+                self._refresh()
+                rows = [row if row is not None else self._find(digest) for row, digest in zip(rows, digests)]
+            results = [
+                np.array(self._vectors[row], dtype=np.float32) if row is not None else None
+                for row in rows
+            ]
+        found = sum(result is not None for result in results)
+        self.hits += found
+        self.misses += len(results) - found
+        return results
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> int:
+        """
+        Append embeddings that are not stored yet.
+
+        Args:
+            texts: Input texts
+            vectors: Embedding of each text
+
+        Returns:
+            int: Number of rows added
+
+        Raises:
+            ValueError: If the vectors' dimension differs from the store's
+        """
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or len(matrix) != len(texts):
+            raise ValueError("Expected one embedding vector per text")
+        with self._lock, open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                return self._append(texts, matrix)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _append(self, texts: Sequence[str], matrix: np.ndarray) -> int:
+        self._refresh()
+        if self.dim is None:
+            self._write_meta(matrix.shape[1])
+        elif matrix.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match stored dimension {self.dim}")
+
+        new_digests: list[bytes] = []
+        new_rows: list[int] = []
+        seen: set[bytes] = set()
+        for position, text in enumerate(texts):
+            digest = text_digest(text)
+            if digest not in seen and self._find(digest) is None:
+                seen.add(digest)
+                new_digests.append(digest)
+                new_rows.append(position)
+        if not new_digests:
+            return 0
+
+        # Drop rows a crashed writer left half-written
+        rows = self._committed_rows()
+        row_bytes = self.dim * self.dtype.itemsize
+        for path, size in ((self._vectors_path, rows * row_bytes), (self._digests_path, rows * DIGEST_SIZE)):
+            if self._size(path) > size:
+                os.truncate(path, size)
+
+        with open(self._vectors_path, "ab") as file:
+            file.write(matrix[new_rows].astype(self.dtype).tobytes())
+        with open(self._digests_path, "ab") as file:
+            file.write(b"".join(new_digests))
+
+        total = rows + len(new_digests)
+        capacity = len(self._keys) if self._keys is not None else 0
+        if total > capacity * MAX_LOAD:
+            self._rebuild_index(total)
+        else:
+            mask = capacity - 1
+            for offset, digest in enumerate(new_digests):
+                key = _slot_key(digest)
+                slot = key & mask
+                while int(self._keys[slot]) != 0:
+                    slot = (slot + 1) & mask
+                # Write the row before the key, which publishes the slot
+                self._rows[slot] = rows + offset
+                self._keys[slot] = key
+        self._refresh()
+        self.stored += len(new_digests)
+        return len(new_digests)
+
+    def _rebuild_index(self, total: int) -> None:
+        capacity = INITIAL_SLOTS
+        while total > capacity * MAX_LOAD:
+            capacity *= 2
+        digests = np.fromfile(self._digests_path, dtype=np.uint8, count=total * DIGEST_SIZE)
+        keys = digests.reshape(total, DIGEST_SIZE)[:, :8].copy().view("<u8").ravel() | np.uint64(1)
+        table = _build_table(keys, capacity)
+        temp_path = f"{self._index_path}.{os.getpid()}.tmp"
+        table.tofile(temp_path)
+        # Readers keep the old table mapped until they notice the new file
+        os.replace(temp_path, self._index_path)
+        logger.info(f"Rebuilt embedding index in {self.directory} with {capacity} slots for {total} rows")
+
+    def vectors(self) -> np.ndarray:
+        """
+        Get a read-only view of all stored vectors.
+
+        Returns:
+            np.ndarray: (rows, dim) memory-mapped matrix in the storage dtype
+        """
+        with self._lock:
+            self._refresh()
+            if not self.rows:
+                return np.zeros((0, self.dim or 0), dtype=self.dtype)
+            return self._vectors
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get store statistics.
+
+        Returns:
+            dict: Rows, dimension, dtype, file sizes, index fill, and this
+            process's hit/miss/store counts
+        """
+        capacity = len(self._keys) if self._keys is not None else 0
+        return {
+            "rows": self.rows,
+            "dim": self.dim,
+            "dtype": self.dtype.name,
+            "bytes": self._size(self._vectors_path) + self._size(self._digests_path) + self._size(self._index_path),
+            "index_slots": capacity,
+            "index_load": round(self.rows / capacity, 3) if capacity else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stored": self.stored,
+        }
+
+
+class EmbeddingStore:
+    """Embedding stores of every model under one directory."""
+
+    def __init__(self, directory: Optional[str] = None, dtype: Optional[str] = None):
+        """
+        Initialize the store.
+
+        Args:
+            directory: Root directory (one subdirectory per model)
+            dtype: Storage dtype for new models ('float32' or 'float16')
+        """
+        self.directory = directory or Config.EMBEDDING_STORE_DIR
+        self.dtype = dtype or Config.EMBEDDING_STORE_DTYPE
+        self._models: dict[str, ModelEmbeddingStore] = {}
+        self._lock = threading.Lock()
+
+    def for_model(self, model: str) -> ModelEmbeddingStore:
+        """
+        Get a model's store, opening it on first use.
+
+        Args:
+            model: Model ID
+
+        Returns:
+            ModelEmbeddingStore: The model's store
+        """
+        with self._lock:
+            store = self._models.get(model)
+            if store is None:
+                path = os.path.join(self.directory, model.replace("/", "--"))
+                store = self._models[model] = ModelEmbeddingStore(path, self.dtype)
+            return store
+
+    async def lookup(self, model: str, texts: Sequence[str]) -> list[Optional[np.ndarray]]:
+        """
+        Look up stored embeddings without failing the request on storage errors.
+
+        Args:
+            model: Model ID
+            texts: Input texts
+
+        Returns:
+            list: A float32 vector per text, or None where it is not stored
+        """
+        try:
+            return await asyncio.to_thread(lambda: self.for_model(model).get_many(texts))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Embedding store lookup failed for {model}: {str(e)}")
+            return [None] * len(texts)
+
+    async def save(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> int:
+        """
+        Store computed embeddings without failing the request on storage errors.
+
+        Args:
+            model: Model ID that produced the vectors
+            texts: Input texts
+            vectors: Embedding of each text
+
+        Returns:
+            int: Number of rows added
+        """
+        try:
+            return await asyncio.to_thread(lambda: self.for_model(model).put_many(texts, vectors))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Embedding store write failed for {model}: {str(e)}")
+            return 0
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get statistics of every model opened by this process.
+
+        Returns:
+            dict: Directory, default dtype, and per-model store statistics
+        """
+        with self._lock:
+            models = dict(self._models)
+        return {
+            "directory": self.directory,
+            "dtype": self.dtype,
+            "models": {model: store.stats() for model, store in models.items()},
+        }
+
+
+# Global store instance
+_embedding_store: Optional[EmbeddingStore] = None
+
+
+def get_embedding_store() -> EmbeddingStore:
+    """
+    Get or create the global embedding store.
+
+    Returns:
+        EmbeddingStore: The global store instance
+    """
+    global _embedding_store
+    if _embedding_store is None:
+        _embedding_store = EmbeddingStore()
+    return _embedding_store
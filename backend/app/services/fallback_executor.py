@@ -0,0 +1,197 @@
+"""
+Model fallback executor.
+
+This module runs a service call against a chain of candidate models (the
+requested or default model followed by the Config fallback list), ordered
+by live health and latency, and reports which model actually served the
+request.
+"""
+
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from app.services.hf_client import get_provider_for_model
+from app.utils.circuit_breaker import get_circuit_breakers
+from app.utils.config import Config
+from app.utils.deadline import check_deadline
+from app.utils.exceptions import (
+    AIServiceException,
+    CircuitOpenError,
+    HuggingFaceAPIError,
+    ModelNotFoundError,
+    RateLimitError,
+    ServiceUnavailableError,
+    TimeoutError,
+)
+from app.utils.latency import get_latency_tracker
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# Errors after which the next model in the chain is tried
+FALLBACK_ERRORS = (
+    HuggingFaceAPIError,
+    ModelNotFoundError,
+    TimeoutError,
+    RateLimitError,
+    ServiceUnavailableError,
+)
+
+
+def should_fall_back(exception: Exception) -> bool:
+    """
+    Determine if a failed call should move on to the next model.
+
+    Validation, size and local processing errors would fail the same way on
+    every model, so they stop the chain.
+
+    Args:
+        exception: The exception raised by the call
+
+    Returns:
+        bool: True if another model should be tried
+    """
+    if not isinstance(exception, FALLBACK_ERRORS):
+        return False
+    # Client errors (bad payload, auth) are not fixed by switching models
+    status = exception.details.get("upstream_status")
+    if status is not None and 400 <= status < 500 and status not in (404, 408, 429):
+        return False
+    return True
+
+
+class FallbackExecutor:
+    """Run calls across a health-ranked chain of fallback models."""
+
+    def __init__(self):
+        """Initialize the executor."""
+        self._served: dict[str, dict[str, int]] = {}
+        self._fallbacks: dict[str, int] = {}
+
+    @staticmethod
+    def rank_models(task: str, preferred: str, fallbacks: list[str]) -> list[str]:
+        """
+        Build the chain of models to try for a call.
+
+        The preferred model leads unless its breaker is open; the remaining
+        candidates are ordered by recent error rate, then p50 latency (models
+        without latency data keep their configured order after measured ones).
+        Models whose breaker is open are moved to the end of the chain.
+
+        Args:
+            task: Inference task name
+            preferred: Requested or default model
+            fallbacks: Configured fallback models
+
+        Returns:
+            list: Models to try, in order, capped at Config.FALLBACK_MAX_MODELS
+        """
+        breakers = get_circuit_breakers()
+        latency = get_latency_tracker()
+
+        candidates = [preferred] + [model for model in fallbacks if model != preferred]
+
+        def score(position: int, model: str) -> tuple:
+            provider = get_provider_for_model(model, task)
+            p50 = latency.percentile(task, model, 50)
+            return (
+                breakers.is_open(provider, model),
+                model != preferred,
+                round(breakers.get(provider, model).error_rate(), 1),
+                p50 is None,
+                p50 or 0.0,
+                position,
+            )
+
+        ranked = [model for _, model in sorted(
+            ((score(position, model), model) for position, model in enumerate(candidates)),
+            key=lambda scored: scored[0],
+        )]
+        return ranked[:max(1, Config.FALLBACK_MAX_MODELS)]
+
+    async def execute(
+        self,
+        task: str,
+        preferred: str,
+        fallbacks: list[str],
+        call: Callable[[str], Awaitable[T]],
+    ) -> tuple[T, str]:
+        """
+        Run a call, falling back to other models on upstream failures.
+
+        Args:
+            task: Inference task name
+            preferred: Requested or default model
+            fallbacks: Configured fallback models
+            call: Coroutine factory receiving the model to use
+
+        Returns:
+            tuple: (result, model that served the request)
+
+        Raises:
+            AIServiceException: The last error if every model failed, or the
+                first error that switching models cannot fix
+        """
+        chain = self.rank_models(task, preferred, fallbacks)
+        last_error: Optional[Exception] = None
+
+        for model in chain:
+            # Raises once the request deadline has passed, ending the chain
+            check_deadline(f"{task} with model {model}")
+            provider = get_provider_for_model(model, task)
+            if get_circuit_breakers().is_open(provider, model) and model != chain[-1]:
+                logger.info(f"Skipping {model} for {task}: circuit open")
+                last_error = last_error or CircuitOpenError(model, provider)
+                continue
+
+            try:
+                result = await call(model)
+            except AIServiceException as e:
+                last_error = e
+                if not should_fall_back(e):
+                    raise
+                logger.warning(
+                    f"{task} failed with model {model}, trying next fallback",
+                    extra={"model": model, "error": str(e)},
+                )
+                continue
+
+            served = self._served.setdefault(task, {})
+            served[model] = served.get(model, 0) + 1
+            if model != preferred:
+                self._fallbacks[task] = self._fallbacks.get(task, 0) + 1
+                logger.info(f"{task} served by fallback model {model} instead of {preferred}")
+            return result, model
+
+        logger.error(f"All models failed for {task}", extra={"models": chain})
+        raise last_error or HuggingFaceAPIError(f"No model available for {task}")
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get fallback counters.
+
+        Returns:
+            dict: Requests served per task and model, and fallback counts per task
+        """
+        return {
+            "served": {task: dict(models) for task, models in self._served.items()},
+            "fallbacks": dict(self._fallbacks),
+        }
+
+
+# Global executor instance
+_fallback_executor: Optional[FallbackExecutor] = None
+
+
+def get_fallback_executor() -> FallbackExecutor:
+    """
+    Get or create the global fallback executor.
+
+    Returns:
+        FallbackExecutor: The global executor instance
+    """
+    global _fallback_executor
+    if _fallback_executor is None:
+        _fallback_executor = FallbackExecutor()
+    return _fallback_executor
@@ -7,41 +7,72 @@ with support for retry logic, model fallback, and comprehensive error handling.
 
 # The InferenceClient handles model routing automatically.
 # Overriding the endpoint can cause non-LLM tasks to fail.
+import asyncio
+import base64
+import io
+import math
 import os
+import time
 
-from typing import Any, Optional
+from typing import Any, Awaitable, Callable, Optional, TypeVar
 
-from app.schemas.validation import LLMRequestMessage
-
-from huggingface_hub import InferenceClient
+from huggingface_hub import AsyncInferenceClient, InferenceClient, InferenceTimeoutError
 
+from app.services.http_pool import PooledAsyncInferenceClient, get_connection_pool
+from app.services.provider_router import get_provider_router
+from app.services.upstream_stream import (
+    UpstreamStream,
+    find_media_url,
+    is_json_response,
+    open_streaming_request,
+    read_json,
+)
+from app.utils.circuit_breaker import get_circuit_breakers
+from app.utils.coalescing import coalesce
+from app.utils.concurrency import get_concurrency_governor
 from app.utils.config import Config
-from app.utils.exceptions import HuggingFaceAPIError, ModelNotFoundError, TimeoutError
+from app.utils.deadline import bound_timeout, can_finish_within, check_deadline
+from app.utils.error_classifier import classify_upstream_error
+from app.utils.exceptions import (
+    AIServiceException,
+    DeadlineExceededError,
+    HuggingFaceAPIError,
+    ModelNotFoundError,
+    TimeoutError,
+)
+from app.utils.hedging import get_hedging_policy
+from app.utils.latency import get_latency_tracker
 from app.utils.logging import get_logger
-from app.utils.retry import retry
-
-# Mapping of models that require a specific provider
-# Based on HuggingFace Inference API documentation for specific models
-MODEL_PROVIDER_MAP = {
-    # Video Models (Require 'novita' provider)
-    "Wan-AI/Wan2.1-T2V-14B": "novita",
-    "Wan-AI/Wan2.2-TI2V-5B": "novita",
-    "Wan-AI/Wan2.2-T2V-A14B": "novita",
-    "tencent/HunyuanVideo-1.5": "novita",
-    "meituan-longcat/LongCat-Video": "novita", # Based on similar model type and provider pattern
-
-    # TTS Models (Require 'fal' provider)
-    "hexgrad/Kokoro-82M": "fal",
-    "microsoft/VibeVoice-Realtime-0.5B": "fal", # Based on similar model type and provider pattern
-    "ResembleAI/chatterbox": "fal", # Based on similar model type and provider pattern
-
-    # Image Models (Require 'fal' provider)
-    "black-forest-labs/FLUX.1-dev": "fal",
+from app.utils.rate_limiter import get_rate_limiter
+from app.utils.response_cache import cached
+from app.utils.retry import async_retry, retry
+from app.utils.validation import Message as LLMRequestMessage
+
+T = TypeVar("T")
+
+# Upstream statuses passed through to the client; others become a 500
+UPSTREAM_STATUS_MAP = {
+    404: 404,
+    422: 422,
+    429: 429,
+    503: 503,
+}
+
+# Interchangeable models a hedge request may be sent to, per task.
+# Tasks not listed here (e.g. feature_extraction) hedge against the same model.
+HEDGE_FALLBACK_MODELS = {
+    "automatic_speech_recognition": Config.STT_FALLBACK_MODELS,
+    "text_generation": Config.LLM_FALLBACK_MODELS,
 }
 
-def get_provider_for_model(model: str) -> Optional[str]:
-    """Returns the required provider for a given model, or None if not required."""
-    return MODEL_PROVIDER_MAP.get(model)
+def get_provider_for_model(model: str, task: Optional[str] = None) -> Optional[str]:
+    """
+    Returns the provider a model is currently routed to, or None for the default routing.
+    
+    Without a task (or for tasks outside Config.PROVIDER_ROUTED_TASKS) this is
+    the model's primary provider; routed tasks get the best-ranked provider.
+    """
+    return get_provider_router().best(task, model)
 
 logger = get_logger(__name__)
 
@@ -640,6 +671,895 @@ class HuggingFaceClient:
             raise HuggingFaceAPIError(f"Failed to generate embeddings: {str(e)}")
 
 
+
+def _image_to_png_bytes(image: Any) -> bytes:
+    """Serialize a PIL Image returned by the Inference API to PNG bytes."""
+    if isinstance(image, (bytes, bytearray)):
+        return bytes(image)
+    image_bytes = io.BytesIO()
+    image.save(image_bytes, format="PNG")
+    return image_bytes.getvalue()
+
+
+class AsyncHuggingFaceClient:
+    """
+    Asyncio wrapper around HuggingFace AsyncInferenceClient.
+    
+    Mirrors the HuggingFaceClient interface, but every method is a coroutine
+    so a single worker can multiplex many concurrent upstream calls without
+    blocking the event loop.
+    """
+    
+    def __init__(self, api_key: str = Config.HF_API_KEY):
+        """
+        Initialize the async HuggingFace client.
+        
+        Args:
+            api_key: HuggingFace API key
+            
+        Raises:
+            ValueError: If API key is not provided
+        """
+        if not api_key:
+            raise ValueError("HuggingFace API key is required")
+        
+        self.api_key = api_key
+        # Share keep-alive connections across calls before the client is created
+        get_connection_pool().install()
+        self.client = PooledAsyncInferenceClient(token=api_key, timeout=Config.REQUEST_TIMEOUT)
+        # Providers are fixed per InferenceClient, so keep one client per provider
+        self._provider_clients: dict[str, AsyncInferenceClient] = {}
+        if Config.HF_INFERENCE_ENDPOINT:
+            logger.info(f"Async HuggingFace client initialized with endpoint: {Config.HF_INFERENCE_ENDPOINT}")
+        else:
+            logger.info("Async HuggingFace client initialized")
+    
+    async def _invoke(
+        self,
+        task: str,
+        model: str,
+        call: Callable[[str, Optional[str]], Awaitable[T]],
+        description: str,
+        hedge: bool = False,
+        latency_task: Optional[str] = None,
+    ) -> T:
+        """
+        Run an upstream call, hedging it when enabled for the task.
+        
+        Args:
+            task: Inference task name (e.g. 'text_to_image')
+            model: Model the call is made against
+            call: Coroutine factory receiving the model and provider to use
+            description: Human-readable action used in error messages
+            hedge: Whether this call is eligible for hedging
+            latency_task: Key latencies and timeouts are tracked under
+                (defaults to task), for calls much slower than the task's usual ones
+            
+        Returns:
+            The result of the upstream call
+            
+        Raises:
+            HuggingFaceAPIError: If the API call fails
+            TimeoutError: If the request times out
+        """
+        if not hedge or task not in Config.HEDGE_TASKS:
+            return await self._attempt(task, model, call, description, latency_task)
+        
+        hedge_model = self._hedge_model(task, model)
+        return await get_hedging_policy().run(
+            task,
+            get_latency_tracker().percentile(task, model, 95),
+            lambda: self._attempt(task, model, call, description),
+            lambda: self._attempt(task, hedge_model, call, description),
+        )
+    
+    def _client_for(self, provider: Optional[str]) -> AsyncInferenceClient:
+        """
+        Get the inference client for a provider.
+        
+        Args:
+            provider: Provider name, or None for the default routing
+            
+        Returns:
+            AsyncInferenceClient: Client bound to the provider
+        """
+        if provider is None:
+            return self.client
+        client = self._provider_clients.get(provider)
+        if client is None:
+            client = self._provider_clients[provider] = PooledAsyncInferenceClient(
+                provider=provider, token=self.api_key, timeout=Config.REQUEST_TIMEOUT
+            )
+        return client
+    
+    @staticmethod
+    def _target(task: str, model: str, provider: Optional[str]) -> tuple[str, Optional[str]]:
+        """
+        Resolve the model and provider arguments passed to the inference client.
+        
+        With Config.HF_INFERENCE_ENDPOINT set, calls go to that endpoint as
+        URL models (which the client always sends directly, without provider
+        routing); otherwise they are unchanged.
+        
+        Args:
+            task: Inference task name
+            model: Model ID
+            provider: Provider the model is served by, if any
+            
+        Returns:
+            tuple: (model or URL, provider) for the inference client
+        """
+        if not Config.HF_INFERENCE_ENDPOINT:
+            return model, provider
+        base = f"{Config.HF_INFERENCE_ENDPOINT}/models/{model}"
+        if task == "chat_completion":
+            # The client appends /v1/chat/completions to URL models
+            return base, None
+        return f"{base}/pipeline/{task.replace('_', '-')}", None
+    
+    @staticmethod
+    def _hedge_model(task: str, model: str) -> str:
+        """
+        Pick the model a hedge request is sent to.
+        
+        Uses the next model in the task's fallback list, or the same model
+        when the task has no interchangeable fallbacks (e.g. embeddings,
+        whose vectors differ between models).
+        
+        Args:
+            task: Inference task name
+            model: Model of the primary call
+            
+        Returns:
+            str: Model for the hedge call
+        """
+        fallbacks = HEDGE_FALLBACK_MODELS.get(task, [])
+        if model in fallbacks:
+            index = fallbacks.index(model) + 1
+            return fallbacks[index] if index < len(fallbacks) else model
+        return fallbacks[0] if fallbacks else model
+    
+    async def _attempt(
+        self,
+        task: str,
+        model: str,
+        call: Callable[[str, Optional[str]], Awaitable[T]],
+        description: str,
+        latency_task: Optional[str] = None,
+    ) -> T:
+        """
+        Run a single upstream call and normalize its errors.
+        
+        Args:
+            task: Inference task name (e.g. 'text_to_image')
+            model: Model the call is made against
+            call: Coroutine factory receiving the model and provider to use
+            description: Human-readable action used in error messages
+            latency_task: Key latencies and timeouts are tracked under (defaults to task)
+            
+        Returns:
+            The result of the upstream call
+            
+        Raises:
+            HuggingFaceAPIError: If the API call fails
+            TimeoutError: If the request times out
+        """
+        latency = get_latency_tracker()
+        latency_task = latency_task or task
+        check_deadline(description.lower())
+        # Don't start a call that typically takes longer than the time left
+        expected = latency.percentile(latency_task, model, 50)
+        if expected is not None and not can_finish_within(expected):
+            raise DeadlineExceededError(
+                f"{description} would not finish before the request deadline "
+                f"(typical latency {expected:.1f}s)"
+            )
+        router = get_provider_router()
+        # Routed tasks go to the fastest healthy provider (or a due re-probe)
+        provider = router.select(task, model)
+        # Learned from recent latencies so stragglers are abandoned early,
+        # and cut short when the request deadline comes first
+        timeout = latency.timeout_for(latency_task, model)
+        breaker = get_circuit_breakers().get(provider, model)
+        try:
+            breaker.before_call()
+        except AIServiceException:
+            router.release(model, provider)
+            raise
+        try:
+            logger.debug(f"Entering {task} with model: {model} (Provider: {provider}, timeout: {timeout:.1f}s)")
+            async with get_concurrency_governor().limit(model, provider):
+                # Shared with the other workers using the same token
+                await get_rate_limiter().acquire(provider)
+                # Queueing and rate limiting above may have used up part of the budget
+                check_deadline(description.lower())
+                call_timeout = bound_timeout(timeout)
+                started = time.monotonic()
+                try:
+                    result = await asyncio.wait_for(call(*self._target(task, model, provider)), timeout=call_timeout)
+                except asyncio.TimeoutError:
+                    if call_timeout < timeout:
+                        # Abandoned by us, which says nothing about the provider
+                        raise DeadlineExceededError(f"{description} abandoned at the request deadline")
+                    elapsed = max(timeout, time.monotonic() - started)
+                    latency.record(latency_task, model, elapsed)
+                    router.record(model, provider, False, elapsed)
+                    raise
+                except InferenceTimeoutError:
+                    elapsed = max(timeout, time.monotonic() - started)
+                    latency.record(latency_task, model, elapsed)
+                    router.record(model, provider, False, elapsed)
+                    raise
+                elapsed = time.monotonic() - started
+                latency.record(latency_task, model, elapsed)
+            router.record(model, provider, True, elapsed)
+            breaker.record_success()
+            logger.debug(f"Exiting {task} successfully with model {model}")
+            return result
+        
+        except AIServiceException:
+            # Raised locally (e.g. load shedding) before reaching the upstream
+            breaker.record_ignored()
+            router.release(model, provider)
+            raise
+        
+        except asyncio.CancelledError:
+            breaker.record_ignored()
+            router.release(model, provider)
+            raise
+        
+        except (asyncio.TimeoutError, InferenceTimeoutError) as e:
+            breaker.record_failure()
+            logger.error(f"Timeout during {task} with model {model} after {timeout:.1f}s: {str(e)}")
+            error = TimeoutError(f"{description} timed out after {timeout:.1f}s", math.ceil(timeout))
+            error.details["circuit_state"] = breaker.state
+            raise error
+        
+        except Exception as e:
+            upstream = classify_upstream_error(e)
+            if upstream.provider_failure:
+                breaker.record_failure()
+                router.record(model, provider, False)
+            else:
+                # Rejected requests (bad payload, auth, unknown model) say nothing about provider health
+                breaker.record_ignored()
+                router.release(model, provider)
+            if upstream.status == 429:
+                # Slow every worker down, not just this call's retries
+                await get_rate_limiter().penalize(provider, upstream.retry_after)
+            logger.error(f"Error during {task} with model {model} (status {upstream.status}): {str(e)}")
+            raise HuggingFaceAPIError(
+                f"Failed to {description.lower()}: {str(e)}",
+                status_code=UPSTREAM_STATUS_MAP.get(upstream.status, 500),
+                details={
+                    "model": model,
+                    "provider": provider,
+                    "circuit_state": breaker.state,
+                    **upstream.to_details(),
+                },
+            )
+    
+    @cached("text_to_image", payload="prompt", when=lambda params: params["seed"] is not None)
+    @coalesce("text_to_image", payload="prompt")
+    @async_retry()
+    async def text_to_image(
+        self,
+        prompt: str,
+        model: str = Config.DEFAULT_IMAGE_MODEL,
+        negative_prompt: Optional[str] = None,
+        height: int = 512,
+        width: int = 512,
+        num_inference_steps: int = 50,
+        guidance_scale: float = 7.5,
+        seed: Optional[int] = None,
+    ) -> bytes:
+        """
+        Generate an image from a text prompt.
+        
+        Only seeded generations are cached, since only they are reproducible.
+        
+        Args:
+            prompt: Text description of the image to generate
+            model: Model to use for generation
+            negative_prompt: Text to exclude from generation
+            height: Image height in pixels
+            width: Image width in pixels
+            num_inference_steps: Number of inference steps
+            guidance_scale: Guidance scale for prompt adherence
+            seed: Random seed for reproducible generation
+            
+        Returns:
+            bytes: Generated image as PNG binary data
+        """
+        logger.info(
+            f"Generating image with model {model}",
+            extra={"prompt": prompt[:100], "model": model}
+        )
+        
+        async def call(model: str, provider: Optional[str]) -> bytes:
+            image = await self._client_for(provider).text_to_image(
+                prompt=prompt,
+                model=model,
+                negative_prompt=negative_prompt,
+                height=height,
+                width=width,
+                num_inference_steps=num_inference_steps,
+                guidance_scale=guidance_scale,
+                # Only sent when set, for providers that reject unknown parameters
+                **({"seed": seed} if seed is not None else {}),
+            )
+            return _image_to_png_bytes(image)
+        
+        return await self._invoke("text_to_image", model, call, "Generate image")
+    
+    @async_retry()
+    async def image_to_image(
+        self,
+        image: Any,
+        prompt: str,
+        model: str = Config.DEFAULT_IMAGE_MODEL,
+        negative_prompt: Optional[str] = None,
+        strength: float = 0.75,
+        num_inference_steps: int = 50,
+        guidance_scale: float = 7.5,
+    ) -> bytes:
+        """
+        Transform an image based on a text prompt.
+        
+        Args:
+            image: PIL Image or image bytes to transform
+            prompt: Text description for the transformation
+            model: Model to use for transformation
+            negative_prompt: Text to exclude from generation
+            strength: Strength of the transformation (0-1)
+            num_inference_steps: Number of inference steps
+            guidance_scale: Guidance scale for prompt adherence
+            
+        Returns:
+            bytes: Transformed image as PNG binary data
+        """
+        logger.info(
+            f"Transforming image with model {model}",
+            extra={"prompt": prompt[:100], "model": model}
+        )
+        
+        # The client only accepts encoded images, not PIL objects
+        image_bytes = _image_to_png_bytes(image)
+        
+        async def call(model: str, provider: Optional[str]) -> bytes:
+            result = await self._client_for(provider).image_to_image(
+                image=image_bytes,
+                prompt=prompt,
+                model=model,
+                negative_prompt=negative_prompt,
+                strength=strength,
+                num_inference_steps=num_inference_steps,
+                guidance_scale=guidance_scale,
+            )
+            return _image_to_png_bytes(result)
+        
+        return await self._invoke("image_to_image", model, call, "Transform image")
+    
+    @async_retry()
+    async def inpainting(
+        self,
+        image: Any,
+        mask: Any,
+        prompt: str,
+        model: str = Config.DEFAULT_IMAGE_EDIT_MODEL,
+        negative_prompt: Optional[str] = None,
+        num_inference_steps: int = 50,
+        guidance_scale: float = 7.5,
+    ) -> bytes:
+        """
+        Perform image inpainting (editing with mask).
+        
+        Args:
+            image: PIL Image or image bytes to inpaint
+            mask: PIL Image or mask bytes (white areas are inpainted)
+            prompt: Text description for the inpainting
+            model: Model to use for inpainting
+            negative_prompt: Text to exclude from generation
+            num_inference_steps: Number of inference steps
+            guidance_scale: Guidance scale for prompt adherence
+            
+        Returns:
+            bytes: Inpainted image as PNG binary data
+        """
+        logger.info(
+            f"Inpainting image with model {model}",
+            extra={"prompt": prompt[:100], "model": model}
+        )
+        
+        async def call(model: str, provider: Optional[str]) -> bytes:
+            result = await self._client_for(provider).inpainting(
+                image=image,
+                mask_image=mask,
+                prompt=prompt,
+                model=model,
+                negative_prompt=negative_prompt,
+                num_inference_steps=num_inference_steps,
+                guidance_scale=guidance_scale,
+            )
+            return _image_to_png_bytes(result)
+        
+        return await self._invoke("inpainting", model, call, "Inpaint image")
+    
+    @cached("text_to_speech", payload="text")
+    @coalesce("text_to_speech", payload="text")
+    @async_retry()
+    async def text_to_speech(
+        self,
+        text: str,
+        model: str = Config.DEFAULT_TTS_MODEL,
+        speaker_id: int = 0,
+    ) -> bytes:
+        """
+        Convert text to speech.
+        
+        Args:
+            text: Text to convert to speech
+            model: Model to use for TTS
+            speaker_id: Speaker ID for multi-speaker models
+            
+        Returns:
+            bytes: Generated audio as WAV binary data
+        """
+        logger.info(
+            f"Converting text to speech with model {model}",
+            extra={"text": text[:100], "model": model}
+        )
+        
+        async def call(model: str, provider: Optional[str]) -> bytes:
+            return await self._client_for(provider).text_to_speech(
+                text=text,
+                model=model,
+            )
+        
+        return await self._invoke("text_to_speech", model, call, "Convert text to speech")
+    
+    @cached("automatic_speech_recognition", payload="audio")
+    @coalesce("automatic_speech_recognition", payload="audio")
+    @async_retry()
+    async def automatic_speech_recognition(
+        self,
+        audio: bytes,
+        model: str = Config.DEFAULT_STT_MODEL,
+    ) -> dict[str, Any]:
+        """
+        Convert speech to text.
+        
+        Args:
+            audio: Audio bytes (WAV, MP3, etc.)
+            model: Model to use for STT
+            
+        Returns:
+            dict: Transcription result with 'text' and other metadata
+        """
+        logger.info(
+            f"Converting speech to text with model {model}",
+            extra={"audio_size": len(audio), "model": model}
+        )
+        
+        async def call(model: str, provider: Optional[str]) -> dict[str, Any]:
+            return await self._client_for(provider).automatic_speech_recognition(
+                audio=audio,
+                model=model,
+            )
+        
+        return await self._invoke("automatic_speech_recognition", model, call, "Convert speech to text", hedge=True)
+    
+    @async_retry()
+    async def chat_completion(
+        self,
+        messages: list[LLMRequestMessage],
+        model: str = Config.DEFAULT_LLM_MODEL,
+        max_new_tokens: int = 256,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        top_k: int = 50,
+    ) -> str:
+        """
+        Generate text from a list of messages (chat format).
+        
+        Args:
+            messages: List of messages in the chat
+            model: Model to use for generation
+            max_new_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature
+            top_p: Nucleus sampling parameter
+            top_k: Top-k sampling parameter
+            
+        Returns:
+            str: Generated text
+        """
+        logger.info(
+            f"Generating chat completion with model {model}",
+            extra={"model": model, "last_message": messages[-1].content[:100]}
+        )
+        
+        async def call(model: str, provider: Optional[str]) -> str:
+            result = await self._client_for(provider).chat_completion(
+                messages=[msg.model_dump() for msg in messages],
+                model=model,
+                max_tokens=max_new_tokens,
+                temperature=temperature,
+                top_p=top_p,
+            )
+            return result.choices[0].message.content
+        
+        return await self._invoke("chat_completion", model, call, "Generate chat completion")
+    
+    @cached("text_generation", payload="prompt", when=lambda params: params["temperature"] == 0)
+    @coalesce("text_generation", payload="prompt", when=lambda params: params["temperature"] == 0)
+    @async_retry()
+    async def text_generation(
+        self,
+        prompt: str,
+        model: str = Config.DEFAULT_LLM_MODEL,
+        max_new_tokens: int = 256,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        top_k: int = 50,
+    ) -> str:
+        """
+        Generate text from a prompt.
+        
+        Args:
+            prompt: Text prompt for generation
+            model: Model to use for generation
+            max_new_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature
+            top_p: Nucleus sampling parameter
+            top_k: Top-k sampling parameter
+            
+        Returns:
+            str: Generated text
+        """
+        logger.info(
+            f"Generating text with model {model}",
+            extra={"prompt": prompt[:100], "model": model}
+        )
+        
+        async def call(model: str, provider: Optional[str]) -> str:
+            return await self._client_for(provider).text_generation(
+                prompt=prompt,
+                model=model,
+                max_new_tokens=max_new_tokens,
+                temperature=temperature,
+                top_p=top_p,
+                top_k=top_k,
+            )
+        
+        return await self._invoke(
+            "text_generation",
+            model,
+            call,
+            "Generate text",
+            hedge=max_new_tokens <= Config.HEDGE_MAX_NEW_TOKENS,
+        )
+    
+    async def _open_stream(
+        self,
+        task: str,
+        model: str,
+        provider: Optional[str],
+        inputs: Any,
+        parameters: dict[str, Any],
+        **stream_options: Any,
+    ) -> UpstreamStream:
+        """
+        Send a generation request and open its result as a stream.
+        
+        URL models (see _target) are posted to directly and must answer with
+        the payload itself. For providers, the request is prepared by the
+        inference client's provider helper; results returned as a file URL
+        are streamed from that URL, and results that can only be fetched
+        through the helper (queue-based providers) are downloaded by it. If
+        the installed huggingface_hub has no compatible provider helpers, the
+        client's buffered call is used instead.
+        
+        Args:
+            task: Inference task name (e.g. 'text_to_video')
+            model: Model ID, or URL model
+            provider: Provider name, if any
+            inputs: Task inputs (prompt or image bytes)
+            parameters: Task parameters
+            **stream_options: Passed through to UpstreamStream
+            
+        Returns:
+            UpstreamStream: Stream over the generated payload
+        """
+        if model.startswith(("http://", "https://")):
+            if isinstance(inputs, bytes):
+                inputs = base64.b64encode(inputs).decode("ascii")
+            response, http_client = await open_streaming_request(
+                "POST",
+                model,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                json_body={
+                    "inputs": inputs,
+                    "parameters": {key: value for key, value in parameters.items() if value is not None},
+                },
+            )
+            return await UpstreamStream.from_response(response, http_client, **stream_options)
+        
+        client = self._client_for(provider)
+        try:
+            # Provider helpers are not part of the public huggingface_hub API
+            # (written against the huggingface-hub version pinned in requirements.txt)
+            from huggingface_hub.inference._providers import get_provider_helper
+            
+            helper = get_provider_helper(client.provider, task=task.replace("_", "-"), model=model)
+            request = helper.prepare_request(
+                inputs=inputs,
+                parameters=parameters,
+                headers=client.headers,
+                model=model,
+                api_key=self.api_key,
+            )
+        except (ImportError, AttributeError, TypeError) as e:
+            logger.warning(
+                f"Cannot prepare a streaming {task} request with the installed huggingface_hub ({e}); "
+                "falling back to a buffered call"
+            )
+            data = await getattr(client, task)(
+                inputs,
+                model=model,
+                **{key: value for key, value in parameters.items() if value is not None},
+            )
+            return UpstreamStream.from_bytes(data, **stream_options)
+        response, http_client = await open_streaming_request(
+            "POST", request.url, headers=request.headers, json_body=request.json, content=request.data
+        )
+        if not is_json_response(response):
+            return await UpstreamStream.from_response(response, http_client, **stream_options)
+        
+        payload = await read_json(response, http_client)
+        url = find_media_url(payload)
+        if url is None:
+            logger.debug(f"{task} result for {model} has no file URL, downloading it through the client")
+            data = await asyncio.to_thread(helper.get_response, payload, request)
+            return UpstreamStream.from_bytes(data, **stream_options)
+        response, http_client = await open_streaming_request("GET", url)
+        return await UpstreamStream.from_response(response, http_client, **stream_options)
+    
+    @async_retry()
+    async def stream_text_to_video(
+        self,
+        prompt: str,
+        model: str = Config.DEFAULT_TEXT_TO_VIDEO_MODEL,
+        negative_prompt: Optional[str] = None,
+        duration: int = 8,
+        fps: int = 24,
+        num_inference_steps: int = 50,
+        artifact_path: Optional[str] = None,
+    ) -> UpstreamStream:
+        """
+        Generate a video from a text prompt and open it as a stream.
+        
+        The call returns once the upstream starts sending the video; retries,
+        timeouts and circuit breaking apply up to that point.
+        
+        Args:
+            prompt: Text description of the video to generate
+            model: Model to use for generation
+            negative_prompt: Text to exclude from generation
+            duration: Video duration in seconds
+            fps: Frames per second
+            num_inference_steps: Number of inference steps
+            artifact_path: File the video is also written to while streaming
+            
+        Returns:
+            UpstreamStream: Stream of the MP4 video, limited to Config.MAX_VIDEO_FILE_SIZE
+        """
+        logger.info(
+            f"Generating text-to-video with model {model}",
+            extra={"prompt": prompt[:100], "model": model}
+        )
+        
+        async def call(model: str, provider: Optional[str]) -> UpstreamStream:
+            return await self._open_stream(
+                "text_to_video",
+                model,
+                provider,
+                prompt,
+                {
+                    "negative_prompt": negative_prompt,
+                    "num_frames": duration * fps,
+                    "num_inference_steps": num_inference_steps,
+                },
+                max_bytes=Config.MAX_VIDEO_FILE_SIZE,
+                artifact_path=artifact_path,
+            )
+        
+        return await self._invoke("text_to_video", model, call, "Generate text-to-video")
+    
+    @async_retry()
+    async def stream_image_to_video(
+        self,
+        image: bytes,
+        model: str = Config.DEFAULT_IMAGE_TO_VIDEO_MODEL,
+        prompt: Optional[str] = None,
+        duration: int = 6,
+        fps: int = 24,
+        num_inference_steps: int = 50,
+        artifact_path: Optional[str] = None,
+    ) -> UpstreamStream:
+        """
+        Generate a video from an image and open it as a stream.
+        
+        Args:
+            image: Image bytes (PNG, JPG, etc.)
+            model: Model to use for generation
+            prompt: Optional text prompt for video style
+            duration: Video duration in seconds
+            fps: Frames per second
+            num_inference_steps: Number of inference steps
+            artifact_path: File the video is also written to while streaming
+            
+        Returns:
+            UpstreamStream: Stream of the MP4 video, limited to Config.MAX_VIDEO_FILE_SIZE
+        """
+        logger.info(
+            f"Generating image-to-video with model {model}",
+            extra={"image_size": len(image), "model": model}
+        )
+        
+        async def call(model: str, provider: Optional[str]) -> UpstreamStream:
+            return await self._open_stream(
+                "image_to_video",
+                model,
+                provider,
+                image,
+                {
+                    "prompt": prompt,
+                    "num_frames": duration * fps,
+                    "num_inference_steps": num_inference_steps,
+                },
+                max_bytes=Config.MAX_VIDEO_FILE_SIZE,
+                artifact_path=artifact_path,
+            )
+        
+        return await self._invoke("image_to_video", model, call, "Generate image-to-video")
+    
+    @coalesce("text_to_video", payload="prompt")
+    async def text_to_video(
+        self,
+        prompt: str,
+        model: str = Config.DEFAULT_TEXT_TO_VIDEO_MODEL,
+        negative_prompt: Optional[str] = None,
+        duration: int = 8,
+        fps: int = 24,
+        num_inference_steps: int = 50,
+    ) -> bytes:
+        """
+        Generate a video from a text prompt and buffer it in memory.
+        
+        Prefer stream_text_to_video for serving videos to clients.
+        
+        Args:
+            prompt: Text description of the video to generate
+            model: Model to use for generation
+            negative_prompt: Text to exclude from generation
+            duration: Video duration in seconds
+            fps: Frames per second
+            num_inference_steps: Number of inference steps
+            
+        Returns:
+            bytes: Generated video as MP4 binary data
+        """
+        stream = await self.stream_text_to_video(
+            prompt, model, negative_prompt, duration, fps, num_inference_steps
+        )
+        return await stream.read()
+    
+    async def image_to_video(
+        self,
+        image: bytes,
+        model: str = Config.DEFAULT_IMAGE_TO_VIDEO_MODEL,
+        prompt: Optional[str] = None,
+        duration: int = 6,
+        fps: int = 24,
+        num_inference_steps: int = 50,
+    ) -> bytes:
+        """
+        Generate a video from an image and buffer it in memory.
+        
+        Prefer stream_image_to_video for serving videos to clients.
+        
+        Args:
+            image: Image bytes (PNG, JPG, etc.)
+            model: Model to use for generation
+            prompt: Optional text prompt for video style
+            duration: Video duration in seconds
+            fps: Frames per second
+            num_inference_steps: Number of inference steps
+            
+        Returns:
+            bytes: Generated video as MP4 binary data
+        """
+        stream = await self.stream_image_to_video(
+            image, model, prompt, duration, fps, num_inference_steps
+        )
+        return await stream.read()
+    
+    @cached("feature_extraction", payload="text")
+    @coalesce("feature_extraction", payload="text")
+    @async_retry()
+    async def feature_extraction(
+        self,
+        text: str,
+        model: str = Config.DEFAULT_EMBEDDING_MODEL,
+    ) -> list[float]:
+        """
+        Generate embeddings for text.
+        
+        Args:
+            text: Text to embed
+            model: Model to use for embeddings
+            
+        Returns:
+            list[float]: Embedding vector
+        """
+        logger.info(
+            f"Generating embeddings with model {model}",
+            extra={"text": text[:100], "model": model}
+        )
+        
+        async def call(model: str, provider: Optional[str]) -> list[float]:
+            embedding = await self._client_for(provider).feature_extraction(
+                text=text,
+                model=model,
+            )
+            # AsyncInferenceClient returns a numpy array
+            return embedding.tolist() if hasattr(embedding, "tolist") else embedding
+        
+        return await self._invoke("feature_extraction", model, call, "Generate embeddings", hedge=True)
+    
+    @async_retry()
+    async def feature_extraction_batch(
+        self,
+        texts: list[str],
+        model: str = Config.DEFAULT_EMBEDDING_MODEL,
+    ) -> list[list[float]]:
+        """
+        Generate embeddings for several texts in one upstream call.
+        
+        Args:
+            texts: Texts to embed
+            model: Model to use for embeddings
+            
+        Returns:
+            list[list[float]]: One embedding vector per text, in input order
+        """
+        logger.info(
+            f"Generating {len(texts)} embeddings with model {model}",
+            extra={"batch_size": len(texts), "model": model}
+        )
+        
+        async def call(model: str, provider: Optional[str]) -> list[list[float]]:
+            embeddings = await self._client_for(provider).feature_extraction(
+                text=texts,
+                model=model,
+            )
+            return embeddings.tolist() if hasattr(embeddings, "tolist") else embeddings
+        
+        # Batches are far slower than single texts: track them separately, and
+        # never hedge them, which would resend the whole batch
+        return await self._invoke(
+            "feature_extraction", model, call, "Generate embeddings", latency_task="feature_extraction_batch"
+        )
+    
+    async def aclose(self) -> None:
+        """Release the underlying HTTP resources, if the clients hold any."""
+        for client in [self.client, *self._provider_clients.values()]:
+            close = getattr(client, "close", None)
+            if close is not None:
+                await close()
+        self._provider_clients.clear()
+
+
 # Global service instance
 _hf_client: Optional[HuggingFaceClient] = None
 
@@ -655,3 +1575,29 @@ def get_hf_client() -> HuggingFaceClient:
     if _hf_client is None:
         _hf_client = HuggingFaceClient()
     return _hf_client
+
+
+
+# Global async client instance
+_async_hf_client: Optional[AsyncHuggingFaceClient] = None
+
+
+def get_async_hf_client() -> AsyncHuggingFaceClient:
+    """
+    Get or create the global async HuggingFace client instance.
+    
+    Returns:
+        AsyncHuggingFaceClient: The global async client instance
+    """
+    global _async_hf_client
+    if _async_hf_client is None:
+        _async_hf_client = AsyncHuggingFaceClient()
+    return _async_hf_client
+
+
+async def close_async_hf_client() -> None:
+    """Close the global async HuggingFace client, if it was created."""
+    global _async_hf_client
+    if _async_hf_client is not None:
+        await _async_hf_client.aclose()
+        _async_hf_client = None
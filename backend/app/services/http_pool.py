@@ -0,0 +1,392 @@
+"""
+Shared HTTP connection pool for upstream inference traffic.
+
+This module keeps one keep-alive connection pool per inference provider
+(fal, novita, hf-inference, ...) so bursts of requests reuse warm TCP/TLS
+connections instead of paying a handshake on every call. Direct httpx
+callers share pools behind a single httpx transport; huggingface_hub's
+aiohttp-based AsyncInferenceClient gets one aiohttp connector per provider.
+Per-provider limits come from Config, and pool statistics are exposed for
+monitoring.
+"""
+
+import ssl
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+import httpx
+from huggingface_hub import AsyncInferenceClient
+
+from app.utils.config import Config
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Provider used for requests that cannot be attributed to a known provider
+DEFAULT_PROVIDER = "hf-inference"
+
+# URL fragments (host parts or first path segment) that identify a provider
+PROVIDER_URL_ALIASES = {
+    "fal": ("fal-ai", "fal.run", "fal.ai"),
+    "novita": ("novita", "novita.ai"),
+    "hf-inference": ("hf-inference", "api-inference.huggingface.co"),
+}
+
+
+class _ProviderRoutingTransport(httpx.AsyncBaseTransport):
+    """Dispatch each request to the connection pool of its provider."""
+
+    def __init__(self, pool: "ProviderConnectionPool"):
+        self._pool = pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        provider = self._pool.provider_for_url(str(request.url))
+        transport = self._pool.transport_for(provider)
+        self._pool._in_flight[provider] = self._pool._in_flight.get(provider, 0) + 1
+        self._pool._requests_total[provider] = self._pool._requests_total.get(provider, 0) + 1
+        try:
+            return await transport.handle_async_request(request)
+        finally:
+            self._pool._in_flight[provider] -= 1
+
+    async def aclose(self) -> None:
+        # The underlying pools are shared and outlive any single client;
+        # they are closed by ProviderConnectionPool.aclose().
+        return None
+
+
+class PooledAsyncInferenceClient(AsyncInferenceClient):
+    """
+    AsyncInferenceClient whose aiohttp sessions borrow the shared connectors.
+
+    huggingface_hub 0.x opens (and closes) an aiohttp session for every call,
+    which throws away its connections each time. Once the pool is installed
+    in aiohttp mode, sessions are instead built on the provider's pooled
+    connector, which they do not own, so connections stay warm between calls.
+    """
+
+    def _get_client_session(self, headers: Optional[Dict] = None) -> aiohttp.ClientSession:
+        pool = get_connection_pool()
+        if not pool.uses_aiohttp:
+            return super()._get_client_session(headers=headers)
+
+        provider = self.provider if self.provider not in (None, "auto") else DEFAULT_PROVIDER
+        session = aiohttp.ClientSession(
+            headers={**self.headers, **(headers or {})},
+            cookies=self.cookies,
+            timeout=aiohttp.ClientTimeout(self.timeout),
+            trust_env=self.trust_env,
+            connector=pool.connector_for(provider),
+            connector_owner=False,
+            trace_configs=[pool.trace_config_for(provider)],
+        )
+
+        # Mirror the base client's bookkeeping: responses are tracked so that
+        # close() can release abandoned streams, and closed sessions deregister
+        self._sessions[session] = set()
+        request = session._request
+
+        async def _request(method, url, **kwargs):
+            response = await request(method, url, **kwargs)
+            self._sessions[session].add(response)
+            return response
+
+        session._request = _request
+        close = session.close
+
+        async def close_session():
+            for response in self._sessions.get(session, ()):
+                response.close()
+            await close()
+            self._sessions.pop(session, None)
+
+        session.close = close_session
+        return session
+
+
+class ProviderConnectionPool:
+    """
+    Per-provider keep-alive connection pools for upstream HTTP traffic.
+
+    All providers share one SSL context so TLS sessions can be resumed, while
+    each provider gets its own httpx transport and aiohttp connector with
+    independent connection and keep-alive limits.
+    """
+
+    def __init__(self, providers: Iterable[str] = ()):
+        """
+        Initialize the connection pool.
+
+        Args:
+            providers: Provider names to recognize in request URLs
+        """
+        self._providers: set[str] = {DEFAULT_PROVIDER, *providers, *Config.HTTP_POOL_PROVIDER_LIMITS}
+        self._transports: dict[str, httpx.AsyncHTTPTransport] = {}
+        self._connectors: dict[str, aiohttp.TCPConnector] = {}
+        self._trace_configs: dict[str, aiohttp.TraceConfig] = {}
+        self._in_flight: dict[str, int] = {}
+        self._requests_total: dict[str, int] = {}
+        self._ssl_context = ssl.create_default_context()
+        self._http2 = Config.HTTP_POOL_HTTP2 and self._http2_available()
+        self.transport = _ProviderRoutingTransport(self)
+        self._installed = False
+        self.uses_aiohttp = False
+
+    @staticmethod
+    def _http2_available() -> bool:
+        """Return True if the optional 'h2' package needed for HTTP/2 is installed."""
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("HTTP_POOL_HTTP2 is enabled but the 'h2' package is not installed; using HTTP/1.1")
+            return False
+        return True
+
+    def limit_for(self, provider: str) -> int:
+        """
+        Get the maximum number of open connections for a provider.
+
+        Args:
+            provider: Provider name
+
+        Returns:
+            int: Connection limit for the provider
+        """
+        return Config.HTTP_POOL_PROVIDER_LIMITS.get(provider, Config.HTTP_POOL_MAX_CONNECTIONS)
+
+    def provider_for_url(self, url: str) -> str:
+        """
+        Attribute a request URL to a provider.
+
+        Args:
+            url: Request URL
+
+        Returns:
+            str: Provider name, or DEFAULT_PROVIDER if none matches
+        """
+        parts = urlsplit(url)
+        host = parts.hostname or ""
+        first_segment = parts.path.lstrip("/").split("/", 1)[0]
+        for provider in self._providers:
+            aliases = PROVIDER_URL_ALIASES.get(provider, (provider,))
+            for alias in aliases:
+                if first_segment == alias or alias in host:
+                    return provider
+        return DEFAULT_PROVIDER
+
+    def register_providers(self, providers: Iterable[str]) -> None:
+        """
+        Recognize additional providers in request URLs (e.g. newly discovered ones).
+
+        Args:
+            providers: Provider names
+        """
+        self._providers.update(providers)
+
+    def transport_for(self, provider: str) -> httpx.AsyncHTTPTransport:
+        """
+        Get (or lazily create) the transport holding a provider's connections.
+
+        Args:
+            provider: Provider name
+
+        Returns:
+            httpx.AsyncHTTPTransport: Pooled transport for the provider
+        """
+        transport = self._transports.get(provider)
+        if transport is None:
+            limit = self.limit_for(provider)
+            transport = httpx.AsyncHTTPTransport(
+                verify=self._ssl_context,
+                http2=self._http2,
+                limits=httpx.Limits(
+                    max_connections=limit,
+                    max_keepalive_connections=min(Config.HTTP_POOL_MAX_KEEPALIVE, limit),
+                    keepalive_expiry=Config.HTTP_POOL_KEEPALIVE_EXPIRY,
+                ),
+            )
+            self._transports[provider] = transport
+            self._providers.add(provider)
+            logger.info(f"Created upstream connection pool for provider {provider} (limit: {limit})")
+        return transport
+
+    def connector_for(self, provider: str) -> aiohttp.TCPConnector:
+        """
+        Get (or lazily create) the aiohttp connector holding a provider's connections.
+
+        Must be called from within the event loop the connector is used on.
+
+        Args:
+            provider: Provider name
+
+        Returns:
+            aiohttp.TCPConnector: Pooled connector for the provider
+        """
+        connector = self._connectors.get(provider)
+        if connector is None or connector.closed:
+            limit = self.limit_for(provider)
+            connector = aiohttp.TCPConnector(
+                limit=limit,
+                keepalive_timeout=Config.HTTP_POOL_KEEPALIVE_EXPIRY,
+                ssl=self._ssl_context,
+            )
+            self._connectors[provider] = connector
+            self._providers.add(provider)
+            logger.info(f"Created upstream aiohttp connector for provider {provider} (limit: {limit})")
+        return connector
+
+    def trace_config_for(self, provider: str) -> aiohttp.TraceConfig:
+        """
+        Get the aiohttp trace config that counts a provider's requests.
+
+        Args:
+            provider: Provider name
+
+        Returns:
+            aiohttp.TraceConfig: Trace config updating the request counters
+        """
+        trace_config = self._trace_configs.get(provider)
+        if trace_config is None:
+            trace_config = aiohttp.TraceConfig()
+
+            async def on_start(session: Any, context: SimpleNamespace, params: Any) -> None:
+                self._in_flight[provider] = self._in_flight.get(provider, 0) + 1
+                self._requests_total[provider] = self._requests_total.get(provider, 0) + 1
+
+            async def on_done(session: Any, context: SimpleNamespace, params: Any) -> None:
+                self._in_flight[provider] -= 1
+
+            trace_config.on_request_start.append(on_start)
+            trace_config.on_request_end.append(on_done)
+            trace_config.on_request_exception.append(on_done)
+            trace_config.freeze()
+            self._trace_configs[provider] = trace_config
+        return trace_config
+
+    def client(self, timeout: Optional[float] = None) -> httpx.AsyncClient:
+        """
+        Create an httpx client backed by the shared pools.
+
+        Closing the returned client does not close the pooled connections.
+
+        Args:
+            timeout: Request timeout in seconds (uses Config.REQUEST_TIMEOUT if None)
+
+        Returns:
+            httpx.AsyncClient: Client sharing this pool's connections
+        """
+        return httpx.AsyncClient(
+            transport=self.transport,
+            timeout=timeout if timeout is not None else Config.REQUEST_TIMEOUT,
+        )
+
+    def install(self) -> None:
+        """
+        Route huggingface_hub's async inference traffic through this pool.
+
+        httpx-based huggingface_hub releases (1.x) take a client factory via
+        set_async_client_factory. The aiohttp-based 0.x releases instead get the
+        per-provider connectors through PooledAsyncInferenceClient, which must
+        be used in place of AsyncInferenceClient.
+        """
+        if self._installed:
+            return
+
+        import huggingface_hub
+
+        set_factory = getattr(huggingface_hub, "set_async_client_factory", None)
+        if set_factory is not None:
+            set_factory(self.client)
+        else:
+            self.uses_aiohttp = True
+        self._installed = True
+        logger.info(
+            "Shared upstream connection pool installed for huggingface_hub "
+            f"({'aiohttp connectors' if self.uses_aiohttp else 'httpx transport'})"
+        )
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get per-provider connection pool statistics.
+
+        Returns:
+            dict: For each provider, open/idle/active/waiting connection counts,
+            the configured limit, in-flight and total request counts
+        """
+        providers = {}
+        for provider in sorted(self._providers):
+            transport = self._transports.get(provider)
+            connections = []
+            waiting = 0
+            if transport is not None:
+                pool = transport._pool
+                connections = pool.connections
+                waiting = sum(
+                    1 for request in getattr(pool, "_requests", [])
+                    if getattr(request, "connection", None) is None
+                )
+            idle = sum(1 for connection in connections if connection.is_idle())
+            active = len(connections) - idle
+            connector = self._connectors.get(provider)
+            if connector is not None and not connector.closed:
+                idle += sum(len(connections) for connections in connector._conns.values())
+                active += len(connector._acquired)
+                waiting += sum(len(waiters) for waiters in connector._waiters.values())
+            providers[provider] = {
+                "limit": self.limit_for(provider),
+                "open": idle + active,
+                "idle": idle,
+                "active": active,
+                "waiting": waiting,
+                "in_flight": self._in_flight.get(provider, 0),
+                "requests_total": self._requests_total.get(provider, 0),
+            }
+        return {
+            "installed": self._installed,
+            "backend": "aiohttp" if self.uses_aiohttp else "httpx",
+            "http2": self._http2,
+            "providers": providers,
+        }
+
+    async def aclose(self) -> None:
+        """Close all pooled connections."""
+        for transport in self._transports.values():
+            await transport.aclose()
+        self._transports.clear()
+        for connector in self._connectors.values():
+            await connector.close()
+        self._connectors.clear()
+
+
+# Global pool instance
+_connection_pool: Optional[ProviderConnectionPool] = None
+
+
+def get_connection_pool() -> ProviderConnectionPool:
+    """
+    Get or create the global upstream connection pool.
+
+    Returns:
+        ProviderConnectionPool: The global pool instance
+    """
+    global _connection_pool
+    if _connection_pool is None:
+        # Imported here to avoid a circular import with hf_client
+        from app.services.provider_router import SEED_PROVIDERS
+
+        _connection_pool = ProviderConnectionPool(
+            provider
+            for providers in [*SEED_PROVIDERS.values(), *Config.MODEL_PROVIDERS.values()]
+            for provider in providers
+        )
+    return _connection_pool
+
+
+async def close_connection_pool() -> None:
+    """Close the global upstream connection pool, if it was created."""
+    global _connection_pool
+    if _connection_pool is not None:
+        await _connection_pool.aclose()
+        _connection_pool = None
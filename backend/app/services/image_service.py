@@ -5,22 +5,23 @@ This module handles text-to-image generation with resizing,
 compression, and optimization for efficient transmission.
 """
 
+import asyncio
 import base64
 import io
 from typing import Optional
 
 from PIL import Image
 
-from app.services.hf_client import get_hf_client
+from app.services.fallback_executor import get_fallback_executor
+from app.services.hf_client import get_async_hf_client
 from app.utils.config import Config
 from app.utils.exceptions import (
+    AIServiceException,
     FileSizeError,
-    HuggingFaceAPIError,
     InvalidFormatError,
     ProcessingError,
 )
 from app.utils.logging import get_logger
-from app.utils.retry import retry_with_fallback
 
 logger = get_logger(__name__)
 
@@ -34,7 +35,8 @@ class ImageService:
     
     def __init__(self):
         """Initialize the image service."""
-        self.hf_client = get_hf_client()
+        self.hf_client = get_async_hf_client()
+        self.fallback = get_fallback_executor()
     
     @staticmethod
     def decode_base64_image(image_data: str) -> Image.Image:
@@ -156,7 +158,24 @@ class ImageService:
         
         return image.resize((new_width, new_height), Image.Resampling.LANCZOS)
     
-    def generate_image(
+    @classmethod
+    def _finalize_image(cls, image_bytes: bytes) -> bytes:
+        """
+        Resize and re-encode an upstream image as PNG.
+        
+        This is CPU-bound and is run in a worker thread by the async callers.
+        
+        Args:
+            image_bytes: Raw image bytes returned by the model
+            
+        Returns:
+            bytes: Processed image as PNG binary data
+        """
+        image = Image.open(io.BytesIO(image_bytes))
+        image = cls.resize_image(image)
+        return cls.image_to_bytes(image, format="PNG")
+    
+    async def generate_image(
         self,
         prompt: str,
         model: Optional[str] = None,
@@ -165,7 +184,8 @@ class ImageService:
         width: int = 512,
         num_inference_steps: int = 50,
         guidance_scale: float = 7.5,
-    ) -> bytes:
+        seed: Optional[int] = None,
+    ) -> tuple[bytes, str]:
         """
         Generate an image from a text prompt.
         
@@ -177,9 +197,10 @@ class ImageService:
             width: Image width in pixels
             num_inference_steps: Number of inference steps
             guidance_scale: Guidance scale for prompt adherence
+            seed: Random seed for reproducible generation
             
         Returns:
-            bytes: Generated image as PNG binary data
+            tuple: (generated image as PNG binary data, model that served the request)
             
         Raises:
             HuggingFaceAPIError: If generation fails
@@ -190,36 +211,36 @@ class ImageService:
         try:
             logger.info(f"Generating image with prompt: {prompt[:100]}")
             
-            # Generate image
-            image_bytes = self.hf_client.text_to_image(
-                prompt=prompt,
-                model=model,
-                negative_prompt=negative_prompt,
-                height=height,
-                width=width,
-                num_inference_steps=num_inference_steps,
-                guidance_scale=guidance_scale,
+            # Generate image, falling back to other models if this one fails
+            image_bytes, model_used = await self.fallback.execute(
+                "text_to_image",
+                model,
+                Config.IMAGE_FALLBACK_MODELS,
+                lambda candidate: self.hf_client.text_to_image(
+                    prompt=prompt,
+                    model=candidate,
+                    negative_prompt=negative_prompt,
+                    height=height,
+                    width=width,
+                    num_inference_steps=num_inference_steps,
+                    guidance_scale=guidance_scale,
+                    seed=seed,
+                ),
             )
             
-            # Convert to PIL Image for processing
-            image = Image.open(io.BytesIO(image_bytes))
-            
-            # Resize if needed
-            image = self.resize_image(image)
+            # Resize and convert to bytes off the event loop
+            output_bytes = await asyncio.to_thread(self._finalize_image, image_bytes)
             
-            # Convert to bytes with optimization
-            output_bytes = self.image_to_bytes(image, format="PNG")
-            
-            logger.info(f"Image generated successfully, size: {len(output_bytes)} bytes")
-            return output_bytes
+            logger.info(f"Image generated successfully with {model_used}, size: {len(output_bytes)} bytes")
+            return output_bytes, model_used
         
-        except HuggingFaceAPIError:
+        except AIServiceException:
             raise
         except Exception as e:
             logger.error(f"Error generating image: {str(e)}")
             raise ProcessingError(f"Failed to generate image: {str(e)}", "image_generation")
     
-    def edit_image(
+    async def edit_image(
         self,
         image_data: str,
         prompt: str,
@@ -229,7 +250,7 @@ class ImageService:
         strength: float = 0.75,
         num_inference_steps: int = 50,
         guidance_scale: float = 7.5,
-    ) -> bytes:
+    ) -> tuple[bytes, str]:
         """
         Edit an image based on a text prompt.
         
@@ -244,7 +265,7 @@ class ImageService:
             guidance_scale: Guidance scale for prompt adherence
             
         Returns:
-            bytes: Edited image as PNG binary data
+            tuple: (edited image as PNG binary data, model that served the request)
             
         Raises:
             HuggingFaceAPIError: If editing fails
@@ -259,48 +280,48 @@ class ImageService:
             image = self.decode_base64_image(image_data)
             
             # Resize if needed
-            image = self.resize_image(image)
+            image = await asyncio.to_thread(self.resize_image, image)
             
             # Handle inpainting with mask
             if mask_data:
                 mask = self.decode_base64_image(mask_data)
-                mask = self.resize_image(mask)
+                mask = await asyncio.to_thread(self.resize_image, mask)
                 
                 # Perform inpainting
-                output_bytes = self.hf_client.inpainting(
+                task = "inpainting"
+                call = lambda candidate: self.hf_client.inpainting(
                     image=image,
                     mask=mask,
                     prompt=prompt,
-                    model=model,
+                    model=candidate,
                     negative_prompt=negative_prompt,
                     num_inference_steps=num_inference_steps,
                     guidance_scale=guidance_scale,
                 )
             else:
                 # Perform image-to-image transformation
-                output_bytes = self.hf_client.image_to_image(
+                task = "image_to_image"
+                call = lambda candidate: self.hf_client.image_to_image(
                     image=image,
                     prompt=prompt,
-                    model=model,
+                    model=candidate,
                     negative_prompt=negative_prompt,
                     strength=strength,
                     num_inference_steps=num_inference_steps,
                     guidance_scale=guidance_scale,
                 )
             
-            # Convert to PIL Image for processing
-            result_image = Image.open(io.BytesIO(output_bytes))
-            
-            # Resize if needed
-            result_image = self.resize_image(result_image)
+            output_bytes, model_used = await self.fallback.execute(
+                task, model, Config.IMAGE_EDIT_FALLBACK_MODELS, call
+            )
             
-            # Convert to bytes with optimization
-            final_bytes = self.image_to_bytes(result_image, format="PNG")
+            # Resize and convert to bytes off the event loop
+            final_bytes = await asyncio.to_thread(self._finalize_image, output_bytes)
             
-            logger.info(f"Image edited successfully, size: {len(final_bytes)} bytes")
-            return final_bytes
+            logger.info(f"Image edited successfully with {model_used}, size: {len(final_bytes)} bytes")
+            return final_bytes, model_used
         
-        except HuggingFaceAPIError:
+        except AIServiceException:
             raise
         except Exception as e:
             logger.error(f"Error editing image: {str(e)}")
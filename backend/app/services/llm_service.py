@@ -6,9 +6,10 @@ This module handles text generation using HuggingFace models.
 
 from typing import Optional
 
-from app.services.hf_client import get_hf_client
+from app.services.fallback_executor import get_fallback_executor
+from app.services.hf_client import get_async_hf_client
 from app.utils.config import Config
-from app.utils.exceptions import HuggingFaceAPIError, ProcessingError
+from app.utils.exceptions import AIServiceException, ProcessingError
 from app.utils.logging import get_logger
 from app.utils.validation import Message
 
@@ -20,9 +21,10 @@ class LLMService:
     
     def __init__(self):
         """Initialize the LLM service."""
-        self.hf_client = get_hf_client()
+        self.hf_client = get_async_hf_client()
+        self.fallback = get_fallback_executor()
     
-    def generate(
+    async def generate(
         self,
         messages: list[Message],
         model: Optional[str] = None,
@@ -61,28 +63,33 @@ class LLMService:
             )
             
             # Call HuggingFace API
-            response = self.hf_client.text_generation(
-                prompt=prompt,
-                model=model,
-                max_new_tokens=max_tokens,
-                temperature=temperature,
-                top_p=top_p,
-                top_k=top_k,
+            response, model_used = await self.fallback.execute(
+                "text_generation",
+                model,
+                Config.LLM_FALLBACK_MODELS,
+                lambda candidate: self.hf_client.text_generation(
+                    prompt=prompt,
+                    model=candidate,
+                    max_new_tokens=max_tokens,
+                    temperature=temperature,
+                    top_p=top_p,
+                    top_k=top_k,
+                ),
             )
             
             logger.info(
                 f"Text generated successfully",
-                extra={"response_length": len(response), "model": model}
+                extra={"response_length": len(response), "model": model_used}
             )
             
             return {
                 "response": response,
-                "model": model,
+                "model": model_used,
                 "tokens_used": None,  # Would need to count tokens
                 "stop_reason": "length",
             }
         
-        except HuggingFaceAPIError:
+        except AIServiceException:
             raise
         except Exception as e:
             logger.error(f"Error generating text: {str(e)}")
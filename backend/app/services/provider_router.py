@@ -0,0 +1,392 @@
+"""
+Latency-ranked provider routing.
+
+This module keeps, per model, the list of inference providers able to serve
+it (from Config, a built-in seed table and the Hub's provider mapping) and
+ranks them by observed error rate and p50/p95 latency, so routed tasks go to
+the fastest healthy provider on each call. Candidates that have not been used
+for a while get a live probe call so their ranking stays current, and the
+table can be dumped and overridden at runtime.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Optional
+
+from app.utils.circuit_breaker import get_circuit_breakers
+from app.utils.config import Config
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Known providers for models whose default routing does not serve them;
+# the first entry is the primary provider used for non-routed tasks
+SEED_PROVIDERS: dict[str, list[str]] = {
+    # Video Models
+    "Wan-AI/Wan2.1-T2V-14B": ["novita"],
+    "Wan-AI/Wan2.2-TI2V-5B": ["novita"],
+    "Wan-AI/Wan2.2-T2V-A14B": ["novita"],
+    "tencent/HunyuanVideo-1.5": ["novita"],
+    "meituan-longcat/LongCat-Video": ["novita"],
+
+    # TTS Models
+    "hexgrad/Kokoro-82M": ["fal"],
+    "microsoft/VibeVoice-Realtime-0.5B": ["fal"],
+    "ResembleAI/chatterbox": ["fal"],
+
+    # Image Models
+    "black-forest-labs/FLUX.1-dev": ["fal"],
+}
+
+# Minimum samples before a provider's latency percentiles are trusted
+MIN_RANKING_SAMPLES = 3
+
+
+class ProviderStats:
+    """Rolling latency and outcome window for one (model, provider)."""
+
+    def __init__(self):
+        """Initialize the window."""
+        self.latencies: deque[float] = deque(maxlen=Config.LATENCY_WINDOW)
+        self.outcomes: deque[bool] = deque(maxlen=Config.BREAKER_WINDOW)
+        self.last_used: Optional[float] = None
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Get a latency percentile.
+
+        Args:
+            q: Percentile between 0 and 100
+
+        Returns:
+            float: Latency in seconds, or None if there are too few samples
+        """
+        if len(self.latencies) < MIN_RANKING_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def error_rate(self) -> float:
+        """Get the share of failed calls in the window."""
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def score(self) -> Optional[float]:
+        """Get the blended p50/p95 latency used for ranking, if measured."""
+        p50, p95 = self.percentile(50), self.percentile(95)
+        if p50 is None or p95 is None:
+            return None
+        return (p50 + p95) / 2
+
+
+class ProviderRouter:
+    """
+    Per-model table of candidate providers ranked by health and latency.
+
+    Providers are ordered by open circuit breaker, recent error rate, then
+    blended p50/p95 latency; unmeasured providers keep their configured order
+    after measured ones. Overridden models use the given providers in the
+    given order, skipping only providers whose breaker is open.
+    """
+
+    def __init__(self):
+        """Initialize the router."""
+        self._stats: dict[tuple[str, str], ProviderStats] = {}
+        self._discovered: dict[str, list[str]] = {}
+        self._discovered_at: dict[str, float] = {}
+        self._overrides: dict[str, list[str]] = {}
+        self._probing: set[tuple[str, str]] = set()
+        self._discovery_tasks: dict[str, asyncio.Task] = {}
+        self._probes = 0
+
+    @staticmethod
+    def _dedupe(providers: list[str]) -> list[str]:
+        return list(dict.fromkeys(providers))
+
+    def _configured(self, model: str) -> list[str]:
+        return self._dedupe(Config.MODEL_PROVIDERS.get(model, []) + SEED_PROVIDERS.get(model, []))
+
+    def candidates(self, model: str) -> list[str]:
+        """
+        Get every provider known to serve a model, in configured order.
+
+        Args:
+            model: Model ID
+
+        Returns:
+            list: Provider names (empty if the model uses the default routing)
+        """
+        if model in self._overrides:
+            return list(self._overrides[model])
+        return self._dedupe(self._configured(model) + self._discovered.get(model, []))
+
+    def rank(self, model: str) -> list[str]:
+        """
+        Rank a model's candidate providers, best first.
+
+        Args:
+            model: Model ID
+
+        Returns:
+            list: Provider names, best first
+        """
+        breakers = get_circuit_breakers()
+        candidates = self.candidates(model)
+        pinned = model in self._overrides
+
+        def key(position: int, provider: str) -> tuple:
+            stats = self._stats.get((model, provider))
+            score = stats.score() if stats else None
+            if pinned:
+                return (breakers.is_open(provider, model), position)
+            return (
+                breakers.is_open(provider, model),
+                round(stats.error_rate(), 1) if stats else 0.0,
+                score is None,
+                score or 0.0,
+                position,
+            )
+
+        return [provider for _, provider in sorted(
+            ((key(position, provider), provider) for position, provider in enumerate(candidates)),
+            key=lambda ranked: ranked[0],
+        )]
+
+    def best(self, task: Optional[str], model: str) -> Optional[str]:
+        """
+        Get the provider a call would currently be routed to, without side effects.
+
+        Tasks outside Config.PROVIDER_ROUTED_TASKS keep the model's primary
+        (first configured) provider.
+
+        Args:
+            task: Inference task name, or None for the primary provider
+            model: Model ID
+
+        Returns:
+            str: Provider name, or None for the default routing
+        """
+        if task not in Config.PROVIDER_ROUTED_TASKS:
+            primary = self._overrides.get(model) or self._configured(model)
+            return primary[0] if primary else None
+        ranked = self.rank(model)
+        return ranked[0] if ranked else None
+
+    def select(self, task: str, model: str) -> Optional[str]:
+        """
+        Pick the provider for the next call.
+
+        For routed tasks, a healthy candidate that has not been used within
+        Config.PROVIDER_REPROBE_INTERVAL is picked instead of the best one
+        (one probe call at a time per candidate), and the Hub's provider list
+        for the model is refreshed in the background when it is stale.
+
+        Args:
+            task: Inference task name
+            model: Model ID
+
+        Returns:
+            str: Provider name, or None for the default routing
+        """
+        if task not in Config.PROVIDER_ROUTED_TASKS:
+            return self.best(task, model)
+
+        self._schedule_discovery(model)
+        ranked = self.rank(model)
+        if not ranked:
+            return None
+
+        if model not in self._overrides:
+            now = time.monotonic()
+            breakers = get_circuit_breakers()
+            for provider in ranked[1:]:
+                stats = self._stats.get((model, provider))
+                stale = stats is None or stats.last_used is None or now - stats.last_used > Config.PROVIDER_REPROBE_INTERVAL
+                if stale and (model, provider) not in self._probing and not breakers.is_open(provider, model):
+                    self._probing.add((model, provider))
+                    self._probes += 1
+                    logger.debug(f"Probing provider {provider} for {model}")
+                    return provider
+        return ranked[0]
+
+    def record(self, model: str, provider: Optional[str], success: bool, seconds: Optional[float] = None) -> None:
+        """
+        Record the outcome of a call.
+
+        Args:
+            model: Model ID
+            provider: Provider the call was sent to
+            success: Whether the call succeeded
+            seconds: Observed latency (timed-out calls pass the timeout they hit)
+        """
+        if provider is None:
+            return
+        self._probing.discard((model, provider))
+        stats = self._stats.get((model, provider))
+        if stats is None:
+            stats = self._stats[(model, provider)] = ProviderStats()
+        stats.outcomes.append(success)
+        if seconds is not None:
+            stats.latencies.append(seconds)
+        stats.last_used = time.monotonic()
+
+    def release(self, model: str, provider: Optional[str]) -> None:
+        """
+        Forget a call that never reached the provider (e.g. load shedding).
+
+        Args:
+            model: Model ID
+            provider: Provider the call was routed to
+        """
+        self._probing.discard((model, provider))
+
+    def set_override(self, model: str, providers: list[str]) -> None:
+        """
+        Pin a model to the given providers, in the given order.
+
+        Args:
+            model: Model ID
+            providers: Provider names, preferred first
+        """
+        self._overrides[model] = self._dedupe(providers)
+        logger.info(f"Provider route for {model} overridden: {self._overrides[model]}")
+
+    def clear_override(self, model: str) -> bool:
+        """
+        Return a model to latency-ranked routing.
+
+        Args:
+            model: Model ID
+
+        Returns:
+            bool: True if the model had an override
+        """
+        removed = self._overrides.pop(model, None) is not None
+        if removed:
+            logger.info(f"Provider route override for {model} cleared")
+        return removed
+
+    def _schedule_discovery(self, model: str) -> None:
+        """Refresh a model's provider list from the Hub in the background if stale."""
+        if not Config.PROVIDER_DISCOVERY_ENABLED or Config.HF_INFERENCE_ENDPOINT or "://" in model:
+            return
+        fetched_at = self._discovered_at.get(model)
+        if fetched_at is not None and time.monotonic() - fetched_at < Config.PROVIDER_REPROBE_INTERVAL:
+            return
+        task = self._discovery_tasks.get(model)
+        if task is not None and not task.done():
+            return
+        self._discovered_at[model] = time.monotonic()
+        self._discovery_tasks[model] = asyncio.get_running_loop().create_task(self._discover(model))
+
+    async def _discover(self, model: str) -> None:
+        """Fetch the providers serving a model from the Hub."""
+        try:
+            providers = await asyncio.to_thread(_fetch_live_providers, model)
+        except Exception as e:
+            logger.warning(f"Provider discovery failed for {model}: {str(e)}")
+            return
+        if providers is None:
+            return
+        if providers != self._discovered.get(model):
+            logger.info(f"Discovered providers for {model}: {providers}")
+            # Imported here to avoid a circular import through hf_client
+            from app.services.http_pool import get_connection_pool
+
+            get_connection_pool().register_providers(providers)
+        self._discovered[model] = providers
+
+    def dump(self) -> dict[str, Any]:
+        """
+        Get the routing table.
+
+        Returns:
+            dict: Per-model ranked providers with their latency, error rate,
+                breaker state and where each candidate came from
+        """
+        breakers = get_circuit_breakers()
+        now = time.monotonic()
+        models = self._dedupe(
+            list(SEED_PROVIDERS) + list(Config.MODEL_PROVIDERS) + list(self._discovered)
+            + list(self._overrides) + [model for model, _ in self._stats]
+        )
+        table: dict[str, Any] = {}
+        for model in models:
+            configured = self._configured(model)
+            providers = []
+            for provider in self.rank(model):
+                stats = self._stats.get((model, provider))
+                if model in self._overrides:
+                    source = "override"
+                elif provider in configured:
+                    source = "config"
+                else:
+                    source = "discovered"
+                providers.append({
+                    "provider": provider,
+                    "source": source,
+                    "samples": len(stats.latencies) if stats else 0,
+                    "p50": stats.percentile(50) if stats else None,
+                    "p95": stats.percentile(95) if stats else None,
+                    "error_rate": round(stats.error_rate(), 3) if stats else None,
+                    "circuit_state": breakers.get(provider, model).state,
+                    "last_used_seconds_ago": (
+                        round(now - stats.last_used, 1) if stats and stats.last_used is not None else None
+                    ),
+                })
+            table[model] = {"overridden": model in self._overrides, "providers": providers}
+        return {
+            "routed_tasks": Config.PROVIDER_ROUTED_TASKS,
+            "reprobe_interval": Config.PROVIDER_REPROBE_INTERVAL,
+            "probes": self._probes,
+            "models": table,
+        }
+
+
+def _fetch_live_providers(model: str) -> Optional[list[str]]:
+    """
+    Get the providers currently serving a model, according to the Hub.
+
+    Args:
+        model: Model ID
+
+    Returns:
+        list: Live provider names, or None if this huggingface_hub version
+            does not expose provider mappings
+    """
+    from huggingface_hub import HfApi
+
+    info = HfApi(token=Config.HF_API_KEY or None).model_info(model, expand=["inferenceProviderMapping"])
+    mapping = getattr(info, "inference_provider_mapping", None)
+    if mapping is None:
+        return None
+    if isinstance(mapping, dict):
+        mapping = [{"provider": provider, **value} for provider, value in mapping.items()]
+    providers = []
+    for entry in mapping:
+        provider = entry.get("provider") if isinstance(entry, dict) else getattr(entry, "provider", None)
+        status = entry.get("status") if isinstance(entry, dict) else getattr(entry, "status", None)
+        if provider and status == "live":
+            providers.append(provider)
+    return providers
+
+
+# Global router instance
+_provider_router: Optional[ProviderRouter] = None
+
+
+def get_provider_router() -> ProviderRouter:
+    """
+    Get or create the global provider router.
+
+    Returns:
+        ProviderRouter: The global router instance
+    """
+    global _provider_router
+    if _provider_router is None:
+        _provider_router = ProviderRouter()
+    return _provider_router
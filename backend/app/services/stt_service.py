@@ -6,9 +6,10 @@ This module handles converting speech to text using HuggingFace models.
 
 from typing import Optional
 
-from app.services.hf_client import get_hf_client
+from app.services.fallback_executor import get_fallback_executor
+from app.services.hf_client import get_async_hf_client
 from app.utils.config import Config
-from app.utils.exceptions import HuggingFaceAPIError, ProcessingError
+from app.utils.exceptions import AIServiceException, ProcessingError
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -19,9 +20,10 @@ class STTService:
     
     def __init__(self):
         """Initialize the STT service."""
-        self.hf_client = get_hf_client()
+        self.hf_client = get_async_hf_client()
+        self.fallback = get_fallback_executor()
     
-    def transcribe(
+    async def transcribe(
         self,
         audio_bytes: bytes,
         model: Optional[str] = None,
@@ -36,7 +38,8 @@ class STTService:
             language: Language code (e.g., 'en', 'fr')
             
         Returns:
-            dict: Transcription result with 'text' and metadata
+            dict: Transcription result with 'text', the 'model' that served
+                the request and other metadata
             
         Raises:
             HuggingFaceAPIError: If transcription fails
@@ -51,9 +54,14 @@ class STTService:
             )
             
             # Call HuggingFace API
-            result = self.hf_client.automatic_speech_recognition(
-                audio=audio_bytes,
-                model=model,
+            result, model_used = await self.fallback.execute(
+                "automatic_speech_recognition",
+                model,
+                Config.STT_FALLBACK_MODELS,
+                lambda candidate: self.hf_client.automatic_speech_recognition(
+                    audio=audio_bytes,
+                    model=candidate,
+                ),
             )
             
             # Ensure result is a dictionary
@@ -61,17 +69,18 @@ class STTService:
                 result = {"text": result}
             
             # Add language if provided
+            result = {**result, "model": model_used}
             if language:
                 result["language"] = language
             
             logger.info(
                 f"Audio transcribed successfully",
-                extra={"text_length": len(result.get("text", "")), "model": model}
+                extra={"text_length": len(result.get("text", "")), "model": model_used}
             )
             
             return result
         
-        except HuggingFaceAPIError:
+        except AIServiceException:
             raise
         except Exception as e:
             logger.error(f"Error transcribing audio: {str(e)}")
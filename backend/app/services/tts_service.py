@@ -6,9 +6,10 @@ This module handles converting text to speech using HuggingFace models.
 
 from typing import Optional
 
-from app.services.hf_client import get_hf_client
+from app.services.fallback_executor import get_fallback_executor
+from app.services.hf_client import get_async_hf_client
 from app.utils.config import Config
-from app.utils.exceptions import HuggingFaceAPIError, ProcessingError
+from app.utils.exceptions import AIServiceException, ProcessingError
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -19,15 +20,16 @@ class TTSService:
     
     def __init__(self):
         """Initialize the TTS service."""
-        self.hf_client = get_hf_client()
+        self.hf_client = get_async_hf_client()
+        self.fallback = get_fallback_executor()
     
-    def synthesize(
+    async def synthesize(
         self,
         text: str,
         model: Optional[str] = None,
         speaker_id: int = 0,
         speed: float = 1.0,
-    ) -> tuple[bytes, int]:
+    ) -> tuple[bytes, int, str]:
         """
         Convert text to speech.
         
@@ -38,7 +40,7 @@ class TTSService:
             speed: Speech speed multiplier (0.5-2.0)
             
         Returns:
-            tuple: (audio_bytes, sample_rate)
+            tuple: (audio_bytes, sample_rate, model that served the request)
             
         Raises:
             HuggingFaceAPIError: If synthesis fails
@@ -53,10 +55,15 @@ class TTSService:
             )
             
             # Call HuggingFace API
-            audio_bytes = self.hf_client.text_to_speech(
-                text=text,
-                model=model,
-                speaker_id=speaker_id,
+            audio_bytes, model_used = await self.fallback.execute(
+                "text_to_speech",
+                model,
+                Config.TTS_FALLBACK_MODELS,
+                lambda candidate: self.hf_client.text_to_speech(
+                    text=text,
+                    model=candidate,
+                    speaker_id=speaker_id,
+                ),
             )
             
             # Default sample rate for most TTS models
@@ -64,12 +71,12 @@ class TTSService:
             
             logger.info(
                 f"Speech synthesized successfully",
-                extra={"audio_size": len(audio_bytes), "sample_rate": sample_rate}
+                extra={"audio_size": len(audio_bytes), "sample_rate": sample_rate, "model": model_used}
             )
             
-            return audio_bytes, sample_rate
+            return audio_bytes, sample_rate, model_used
         
-        except HuggingFaceAPIError:
+        except AIServiceException:
             raise
         except Exception as e:
             logger.error(f"Error synthesizing speech: {str(e)}")
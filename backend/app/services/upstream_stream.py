@@ -0,0 +1,284 @@
+"""
+Streaming of large upstream payloads.
+
+This module relays provider responses (generated videos) chunk by chunk
+instead of buffering them, optionally teeing them into an artifact file,
+so peak memory per request is bounded by the chunk size rather than the
+payload size. Size limits are enforced as bytes arrive.
+"""
+
+import asyncio
+import json
+import os
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+import httpx
+
+from app.services.http_pool import get_connection_pool
+from app.utils.config import Config
+from app.utils.exceptions import FileSizeError
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# JSON keys under which providers return the URL of a generated file
+MEDIA_URL_KEYS = ("video_url", "url", "video")
+
+
+class UpstreamStream:
+    """
+    A size-limited stream of an upstream payload, optionally teed to disk.
+
+    The stream can be iterated once. The artifact file is written next to
+    its final path with a '.partial' suffix and only renamed into place once
+    the whole payload has been received; incomplete files are removed.
+    """
+
+    def __init__(
+        self,
+        chunks: AsyncIterator[bytes],
+        close: Optional[Callable[[], Awaitable[None]]] = None,
+        content_length: Optional[int] = None,
+        media_type: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        file_type: str = "video",
+        artifact_path: Optional[str] = None,
+    ):
+        """
+        Initialize the stream.
+
+        Args:
+            chunks: Async iterator over the payload
+            close: Coroutine factory releasing the upstream connection
+            content_length: Payload size announced by the upstream, if any
+            media_type: Payload media type, if known
+            max_bytes: Maximum payload size (no limit if None)
+            file_type: Payload type used in size error messages
+            artifact_path: File the payload is also written to, if any
+
+        Raises:
+            FileSizeError: If the announced size already exceeds max_bytes
+        """
+        if max_bytes is not None and content_length is not None and content_length > max_bytes:
+            raise FileSizeError(content_length, max_bytes, file_type)
+        self._chunks = chunks
+        self._close = close
+        self.content_length = content_length
+        self.media_type = media_type
+        self.max_bytes = max_bytes
+        self.file_type = file_type
+        self.artifact_path = artifact_path
+        self.bytes_sent = 0
+        self._closed = False
+
+    @classmethod
+    async def from_response(
+        cls,
+        response: httpx.Response,
+        client: httpx.AsyncClient,
+        **kwargs: Any,
+    ) -> "UpstreamStream":
+        """
+        Wrap an open streaming httpx response.
+
+        Args:
+            response: Response opened with stream=True
+            client: Client the response belongs to, closed with the stream
+            **kwargs: Passed through to the constructor
+
+        Returns:
+            UpstreamStream: Stream over the response body
+        """
+        async def close() -> None:
+            await response.aclose()
+            await client.aclose()
+
+        length = response.headers.get("content-length")
+        try:
+            return cls(
+                response.aiter_bytes(Config.STREAM_CHUNK_SIZE),
+                close=close,
+                content_length=int(length) if length and length.isdigit() else None,
+                media_type=response.headers.get("content-type", "").split(";")[0] or None,
+                **kwargs,
+            )
+        except BaseException:
+            await close()
+            raise
+
+    @classmethod
+    def from_bytes(cls, data: bytes, **kwargs: Any) -> "UpstreamStream":
+        """
+        Wrap an already downloaded payload.
+
+        Used for providers whose results can only be fetched through the
+        inference client; the payload is still relayed in chunks.
+
+        Args:
+            data: Payload bytes
+            **kwargs: Passed through to the constructor
+
+        Returns:
+            UpstreamStream: Stream over the payload
+        """
+        async def chunks() -> AsyncIterator[bytes]:
+            view = memoryview(data)
+            for start in range(0, len(view), Config.STREAM_CHUNK_SIZE):
+                yield bytes(view[start:start + Config.STREAM_CHUNK_SIZE])
+
+        return cls(chunks(), content_length=len(data), **kwargs)
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        """
+        Yield the payload chunk by chunk, teeing it to the artifact file.
+
+        Raises:
+            FileSizeError: If the payload grows beyond max_bytes
+        """
+        partial_path = f"{self.artifact_path}.partial" if self.artifact_path else None
+        artifact = None
+        completed = False
+        try:
+            if partial_path:
+                artifact = await asyncio.to_thread(open, partial_path, "wb")
+            async for chunk in self._chunks:
+                self.bytes_sent += len(chunk)
+                if self.max_bytes is not None and self.bytes_sent > self.max_bytes:
+                    logger.warning(
+                        f"Upstream {self.file_type} exceeded {self.max_bytes} bytes, aborting stream"
+                    )
+                    raise FileSizeError(self.bytes_sent, self.max_bytes, self.file_type)
+                if artifact is not None:
+                    await asyncio.to_thread(artifact.write, chunk)
+                yield chunk
+            completed = True
+        finally:
+            if artifact is not None:
+                await asyncio.to_thread(artifact.close)
+                if completed:
+                    os.replace(partial_path, self.artifact_path)
+                else:
+                    _remove_quietly(partial_path)
+            await self.aclose()
+
+    async def read(self) -> bytes:
+        """
+        Read the whole payload into memory.
+
+        Returns:
+            bytes: The payload
+
+        Raises:
+            FileSizeError: If the payload grows beyond max_bytes
+        """
+        buffer = bytearray()
+        async for chunk in self:
+            buffer.extend(chunk)
+        return bytes(buffer)
+
+    async def aclose(self) -> None:
+        """Release the upstream connection (safe to call more than once)."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._close is not None:
+            await self._close()
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def find_media_url(payload: Any) -> Optional[str]:
+    """
+    Find the URL of a generated file in a provider's JSON response.
+
+    Handles shapes such as {"video": {"video_url": ...}} and
+    {"video": {"url": ...}}.
+
+    Args:
+        payload: Decoded JSON response
+
+    Returns:
+        str: The URL, or None if the response does not contain one
+    """
+    if isinstance(payload, dict):
+        for key in MEDIA_URL_KEYS:
+            value = payload.get(key)
+            if isinstance(value, str) and value.startswith(("http://", "https://")):
+                return value
+        for value in payload.values():
+            found = find_media_url(value)
+            if found:
+                return found
+    elif isinstance(payload, list):
+        for value in payload:
+            found = find_media_url(value)
+            if found:
+                return found
+    return None
+
+
+async def open_streaming_request(
+    method: str,
+    url: str,
+    headers: Optional[dict[str, str]] = None,
+    json_body: Any = None,
+    content: Optional[bytes] = None,
+) -> tuple[httpx.Response, httpx.AsyncClient]:
+    """
+    Send a request over the shared connection pool without reading the body.
+
+    Args:
+        method: HTTP method
+        url: Request URL
+        headers: Request headers
+        json_body: JSON body, if any
+        content: Raw body, if any
+
+    Returns:
+        tuple: (response opened for streaming, client to close with it)
+
+    Raises:
+        httpx.HTTPStatusError: If the upstream answers with an error status
+    """
+    client = get_connection_pool().client()
+    response = None
+    try:
+        request = client.build_request(method, url, headers=headers, json=json_body, content=content)
+        response = await client.send(request, stream=True)
+        if response.status_code >= 400:
+            await response.aread()
+            response.raise_for_status()
+        return response, client
+    except BaseException:
+        if response is not None:
+            await response.aclose()
+        await client.aclose()
+        raise
+
+
+def is_json_response(response: httpx.Response) -> bool:
+    """Check whether a response carries JSON rather than a binary payload."""
+    return "json" in response.headers.get("content-type", "")
+
+
+async def read_json(response: httpx.Response, client: httpx.AsyncClient) -> Any:
+    """
+    Read and decode a (small) JSON response, then release its connection.
+
+    Args:
+        response: Response opened for streaming
+        client: Client the response belongs to
+
+    Returns:
+        The decoded JSON payload
+    """
+    try:
+        return json.loads(await response.aread())
+    finally:
+        await response.aclose()
+        await client.aclose()
@@ -0,0 +1,656 @@
+"""
+In-process vector index.
+
+This module keeps named collections of embedding vectors with ids, texts
+and metadata, and answers top-k nearest-neighbour queries by cosine
+similarity or dot product. Small collections are searched exactly with
+vectorized matrix products; once a collection passes
+Config.VECTOR_INDEX_IVF_THRESHOLD rows, queries go through an inverted-file
+(IVF) index that only scores the rows of the clusters closest to the query.
+
+Each collection lives in its own directory:
+
+- meta.json: model and dimension
+- vectors.f32: append-only float32 rows; an upsert of an existing id
+  appends a new row and the id's earlier row is left unused
+- items.jsonl: append-only log of (id, row, text, metadata); the latest
+  entry for an id wins
+- ivf.npz: cluster centroids and the cluster of every row at training time
+
+Writers append under an exclusive file lock; every worker process replays
+the log tail on its next query, so all workers serve the same collection.
+Rows are never written once published, so searches can read the
+memory-mapped vectors without holding any lock.
+"""
+
+import asyncio
+import fcntl
+import json
+import os
+import re
+import threading
+from typing import Any, Optional, Sequence
+
+import numpy as np
+
+from app.services.embedding_service import get_embedding_service
+from app.utils.config import Config
+from app.utils.exceptions import CollectionNotFoundError, ValidationError
+from app.utils.logging import get_logger
+from app.utils.similarity import normalize_rows, select_top_k
+
+logger = get_logger(__name__)
+
+# Allowed collection names (they become directory names)
+COLLECTION_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+# Rows scored per block in exact search, bounding the score matrix size
+SCAN_BLOCK_ROWS = 65536
+
+# Entries of the per-(query, probed list) top-k buffers kept during IVF search
+PROBE_BUFFER_ENTRIES = 1 << 22
+
+
+def train_ivf(vectors: np.ndarray, lists: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """
+    Train IVF centroids with spherical k-means.
+
+    Args:
+        vectors: (rows, dim) training sample
+        lists: Number of clusters
+        iterations: k-means iterations
+
+    Returns:
+        np.ndarray: (lists, dim) unit-norm centroids
+    """
+    rng = np.random.default_rng(seed)
+    sample = normalize_rows(vectors)
+    centroids = sample[rng.choice(len(sample), size=lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        counts = np.bincount(assignment, minlength=lists)
+        empty = counts == 0
+        # Re-seed empty clusters from random sample rows
+        sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+        centroids = normalize_rows(sums)
+    return centroids.astype(np.float32)
+
+
+class VectorCollection:
+    """A persistent, searchable collection of vectors."""
+
+    def __init__(self, directory: str):
+        """
+        Open (or create) a collection.
+
+        Args:
+            directory: Directory of the collection's files
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._meta_path = os.path.join(directory, "meta.json")
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._items_path = os.path.join(directory, "items.jsonl")
+        self._ivf_path = os.path.join(directory, "ivf.npz")
+        self._lock_path = os.path.join(directory, ".lock")
+        self._lock = threading.RLock()
+
+        self.model: Optional[str] = None
+        self.dim: Optional[int] = None
+        self._read_meta()
+
+        self.ids: list[str] = []
+        self.texts: list[Optional[str]] = []
+        self.metadata: list[Optional[dict[str, Any]]] = []
+        self._rows: dict[str, int] = {}
+        self._offset = 0
+        self._vectors: Optional[np.ndarray] = None
+        self._norms: Optional[np.ndarray] = None
+        self._live = np.zeros(0, dtype=bool)
+        self._ivf_mtime: Optional[float] = None
+        self._trained_rows = 0
+        self._centroids: Optional[np.ndarray] = None
+        self._assignment = np.zeros(0, dtype=np.int32)
+        self._lists: list[np.ndarray] = []
+        self.searches = 0
+        with self._lock:
+            self._refresh()
+
+    def _read_meta(self) -> None:
+        try:
+            with open(self._meta_path) as file:
+                meta = json.load(file)
+        except FileNotFoundError:
+            return
+        self.model = meta["model"]
+        self.dim = int(meta["dim"])
+
+    @property
+    def count(self) -> int:
+        """Number of vectors in the collection."""
+        return len(self._rows)
+
+    def _refresh(self) -> None:
+        """Replay log entries and vectors written since the last refresh."""
+        if self.dim is None:
+            self._read_meta()
+            if self.dim is None:
+                return
+        try:
+            size = os.path.getsize(self._items_path)
+        except OSError:
+            size = 0
+        if size > self._offset:
+            with open(self._items_path, "rb") as file:
+                file.seek(self._offset)
+                data = file.read(size - self._offset)
+            # Only consume complete lines; a writer may be mid-append
+            complete = data[:data.rfind(b"\n") + 1]
+            previous = len(self.ids)
+            superseded: list[int] = []
+            for line in complete.splitlines():
+                entry = json.loads(line)
+                # Every entry has its own row; the id's earlier row goes unused
+                row = self._rows.get(entry["id"])
+                if row is not None:
+                    superseded.append(row)
+                self._rows[entry["id"]] = len(self.ids)
+                self.ids.append(entry["id"])
+                self.texts.append(entry.get("text"))
+                self.metadata.append(entry.get("metadata"))
+            self._offset += len(complete)
+            self._map_vectors(previous, superseded)
+        self._load_ivf()
+
+    def _map_vectors(self, previous: int, superseded: list[int]) -> None:
+        if not self.ids:
+            return
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(len(self.ids), self.dim))
+        norms = np.linalg.norm(self._vectors[previous:], axis=1).astype(np.float32)
+        self._norms = norms if self._norms is None else np.concatenate([self._norms[:previous], norms])
+        # Replaced rather than updated in place: searches keep their snapshot
+        live = np.concatenate([self._live, np.ones(len(self.ids) - previous, dtype=bool)])
+        live[superseded] = False
+        self._live = live
+        if self._centroids is not None:
+            self._assign_rows(rebuild=bool(superseded))
+
+    def _load_ivf(self) -> None:
+        try:
+            mtime = os.path.getmtime(self._ivf_path)
+        except OSError:
+            return
+        if mtime == self._ivf_mtime:
+            return
+        with np.load(self._ivf_path) as ivf:
+            assignment = ivf["assignment"]
+            if len(assignment) > len(self.ids):
+                # Trained on rows this process has not replayed yet
+                return
+            self._centroids = ivf["centroids"]
+            self._assignment = assignment
+            self._trained_rows = int(ivf["trained_rows"])
+        self._ivf_mtime = mtime
+        self._assign_rows(rebuild=True)
+
+    def _assign_rows(self, rebuild: bool = False) -> None:
+        """
+        Put rows into their nearest IVF cluster.
+
+        Rows added after IVF training are appended to the assignment.
+        Superseded rows are left out of every list, so only the latest row
+        of each id is probed.
+        """
+        assigned = len(self._assignment)
+        if assigned < len(self.ids):
+            new = np.asarray(self._vectors[assigned:])
+            clusters = np.argmax(new @ self._centroids.T, axis=1).astype(np.int32)
+            self._assignment = np.concatenate([self._assignment, clusters])
+            rebuild = True
+        if rebuild:
+            assignment = np.where(self._live, self._assignment, -1)
+            order = np.argsort(assignment, kind="stable")
+            bounds = np.searchsorted(assignment[order], np.arange(len(self._centroids) + 1))
+            self._lists = [order[bounds[i]:bounds[i + 1]] for i in range(len(self._centroids))]
+
+    def upsert(
+        self,
+        model: str,
+        ids: Sequence[str],
+        vectors: np.ndarray,
+        texts: Sequence[Optional[str]],
+        metadata: Sequence[Optional[dict[str, Any]]],
+    ) -> int:
+        """
+        Insert or replace vectors by id.
+
+        Args:
+            model: Model the vectors come from
+            ids: Item ids
+            vectors: (items, dim) float32 matrix
+            texts: Source text of each item, if any
+            metadata: Metadata of each item, if any
+
+        Returns:
+            int: Collection size after the upsert
+
+        Raises:
+            ValidationError: If the model or dimension differ from the collection's
+        """
+        with self._lock, open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                if self.dim is None:
+                    temp_path = f"{self._meta_path}.{os.getpid()}.tmp"
+                    with open(temp_path, "w") as file:
+                        json.dump({"model": model, "dim": int(vectors.shape[1])}, file)
+                    os.replace(temp_path, self._meta_path)
+                    self.model, self.dim = model, int(vectors.shape[1])
+                if model != self.model:
+                    raise ValidationError(
+                        f"Collection holds '{self.model}' embeddings, not '{model}'",
+                        details={"collection_model": self.model},
+                    )
+                if vectors.shape[1] != self.dim:
+                    raise ValidationError(
+                        f"Vector dimension {vectors.shape[1]} does not match collection dimension {self.dim}",
+                        details={"dimension": self.dim},
+                    )
+                self._write(ids, vectors, texts, metadata)
+                self._refresh()
+                if self._needs_training():
+                    self._train()
+                return self.count
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write(
+        self,
+        ids: Sequence[str],
+        vectors: np.ndarray,
+        texts: Sequence[Optional[str]],
+        metadata: Sequence[Optional[dict[str, Any]]],
+    ) -> None:
+        # Rows a crashed writer appended without logging them are reused;
+        # no reader maps past the logged rows
+        row_bytes = self.dim * 4
+        logged_bytes = len(self.ids) * row_bytes
+        if os.path.exists(self._vectors_path) and os.path.getsize(self._vectors_path) > logged_bytes:
+            os.truncate(self._vectors_path, logged_bytes)
+
+        # Every item gets a new row, even an existing id: a published row is
+        # never overwritten while a search may be reading it
+        with open(self._vectors_path, "ab") as file:
+            file.write(np.ascontiguousarray(vectors, dtype="<f4").tobytes())
+
+        # The vectors are in place before the log entries that publish them
+        lines = []
+        for position, item_id in enumerate(ids):
+            entry: dict[str, Any] = {"id": item_id, "row": len(self.ids) + position}
+            if texts[position] is not None:
+                entry["text"] = texts[position]
+            if metadata[position] is not None:
+                entry["metadata"] = metadata[position]
+            lines.append(json.dumps(entry, separators=(",", ":")))
+        with open(self._items_path, "ab") as file:
+            file.write(("\n".join(lines) + "\n").encode("utf-8"))
+
+    def _needs_training(self) -> bool:
+        if self.count < Config.VECTOR_INDEX_IVF_THRESHOLD:
+            return False
+        # Retrain as the collection doubles, so clusters track the data
+        return self._centroids is None or self.count >= 2 * self._trained_rows
+
+    def _train(self) -> None:
+        lists = int(min(Config.VECTOR_INDEX_MAX_LISTS, max(1, 4 * np.sqrt(self.count))))
+        rng = np.random.default_rng(self.count)
+        live_rows = np.flatnonzero(self._live)
+        sample_size = min(len(live_rows), max(Config.VECTOR_INDEX_TRAIN_SAMPLE, lists))
+        sample_rows = np.sort(rng.choice(live_rows, size=sample_size, replace=False))
+        centroids = train_ivf(np.asarray(self._vectors[sample_rows]), lists)
+        assignment = np.empty(len(self.ids), dtype=np.int32)
+        for start in range(0, len(self.ids), SCAN_BLOCK_ROWS):
+            block = np.asarray(self._vectors[start:start + SCAN_BLOCK_ROWS])
+            assignment[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        temp_path = f"{self._ivf_path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            temp_path,
+            centroids=centroids,
+            assignment=assignment,
+            trained_rows=self.count,
+        )
+        os.replace(temp_path, self._ivf_path)
+        logger.info(f"Trained IVF index for {self.directory} with {lists} lists over {self.count} rows")
+        self._load_ivf()
+
+    def search(
+        self,
+        queries: np.ndarray,
+        top_k: int,
+        metric: str = "cosine",
+        exact: bool = False,
+        nprobe: Optional[int] = None,
+    ) -> list[list[dict[str, Any]]]:
+        """
+        Find the nearest neighbours of a batch of query vectors.
+
+        Args:
+            queries: (queries, dim) float32 matrix
+            top_k: Results per query
+            metric: 'cosine' or 'dot'
+            exact: Scan every row even if an IVF index exists
+            nprobe: Clusters scanned per query (Config.VECTOR_INDEX_NPROBE)
+
+        Returns:
+            list: Per query, hits with id, score, text and metadata, best first
+        """
+        with self._lock:
+            self._refresh()
+            vectors, norms, live, count = self._vectors, self._norms, self._live, self.count
+            lists, centroids = self._lists, self._centroids
+            ids, texts, metadata = list(self.ids), list(self.texts), list(self.metadata)
+        self.searches += len(queries)
+        if not count:
+            return [[] for _ in queries]
+        if queries.shape[1] != self.dim:
+            raise ValidationError(
+                f"Query dimension {queries.shape[1]} does not match collection dimension {self.dim}",
+                details={"dimension": self.dim},
+            )
+
+        queries = np.asarray(queries, dtype=np.float32)
+        if metric == "cosine":
+            queries = normalize_rows(queries)
+            row_scale = 1.0 / np.maximum(norms, 1e-12)
+        else:
+            row_scale = None
+
+        if exact or centroids is None:
+            rows, scores = self._scan(vectors, row_scale, live, queries, top_k)
+        else:
+            rows, scores = self._probe(vectors, row_scale, lists, centroids, queries, top_k, nprobe)
+
+        return [
+            [
+                {"id": ids[row], "score": float(score), "text": texts[row], "metadata": metadata[row]}
+                for row, score in zip(query_rows, query_scores)
+            ]
+            for query_rows, query_scores in zip(rows, scores)
+        ]
+
+    @staticmethod
+    def _scan(
+        vectors: np.ndarray,
+        row_scale: Optional[np.ndarray],
+        live: np.ndarray,
+        queries: np.ndarray,
+        top_k: int,
+    ) -> tuple[list[np.ndarray], list[np.ndarray]]:
+        """Exact search in row blocks, merging each block's top-k."""
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        best_scores = np.zeros((len(queries), 0), dtype=np.float32)
+        for start in range(0, len(vectors), SCAN_BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + SCAN_BLOCK_ROWS])
+            scores = queries @ block.T
+            if row_scale is not None:
+                scores *= row_scale[start:start + len(block)]
+            scores[:, ~live[start:start + len(block)]] = -np.inf
+            positions, selected = select_top_k(scores, top_k)
+            merged_rows = np.concatenate([best_rows, positions + start], axis=1)
+            merged_scores = np.concatenate([best_scores, selected], axis=1)
+            order, best_scores = select_top_k(merged_scores, top_k)
+            best_rows = np.take_along_axis(merged_rows, order, axis=1)
+        # Superseded rows may fill the last places when few rows are live
+        found = np.isfinite(best_scores)
+        return (
+            [query_rows[query_found] for query_rows, query_found in zip(best_rows, found)],
+            [query_scores[query_found] for query_scores, query_found in zip(best_scores, found)],
+        )
+
+    @staticmethod
+    def _probe(
+        vectors: np.ndarray,
+        row_scale: Optional[np.ndarray],
+        lists: list[np.ndarray],
+        centroids: np.ndarray,
+        queries: np.ndarray,
+        top_k: int,
+        nprobe: Optional[int],
+    ) -> tuple[list[np.ndarray], list[np.ndarray]]:
+        """
+        Approximate search over the rows of each query's closest clusters.
+
+        Work is grouped by cluster rather than by query: each probed list is
+        read once and scored against every query of the batch that probes it
+        in one matrix product. Each (query, probed list) pair keeps its top-k
+        in a buffer, and the buffers are merged per query at the end.
+        """
+        nprobe = min(len(centroids), max(1, nprobe or Config.VECTOR_INDEX_NPROBE))
+        probed, _ = select_top_k(queries @ centroids.T, nprobe)
+        all_rows: list[np.ndarray] = []
+        all_scores: list[np.ndarray] = []
+        # Bound the per-(query, list) top-k buffers
+        chunk = max(1, PROBE_BUFFER_ENTRIES // (nprobe * top_k))
+        for start in range(0, len(queries), chunk):
+            block = queries[start:start + chunk]
+            block_probed = probed[start:start + chunk].ravel()
+            order = np.argsort(block_probed, kind="stable")
+            clusters, firsts = np.unique(block_probed[order], return_index=True)
+            bounds = np.append(firsts, len(order))
+            buffer_rows = np.zeros((len(block), nprobe, top_k), dtype=np.int64)
+            buffer_scores = np.full((len(block), nprobe, top_k), -np.inf, dtype=np.float32)
+            for cluster, first, last in zip(clusters, bounds[:-1], bounds[1:]):
+                rows = lists[cluster]
+                if not len(rows):
+                    continue
+                probing, slots = np.divmod(order[first:last], nprobe)
+                scores = block[probing] @ np.asarray(vectors[rows]).T
+                if row_scale is not None:
+                    scores *= row_scale[rows]
+                positions, selected = select_top_k(scores, top_k)
+                buffer_rows[probing, slots, :positions.shape[1]] = rows[positions]
+                buffer_scores[probing, slots, :positions.shape[1]] = selected
+            buffer_rows = buffer_rows.reshape(len(block), -1)
+            positions, selected = select_top_k(buffer_scores.reshape(len(block), -1), top_k)
+            for query_rows, query_positions, query_scores in zip(buffer_rows, positions, selected):
+                # Probed lists may hold fewer than top_k rows in total
+                found = np.isfinite(query_scores)
+                all_rows.append(query_rows[query_positions[found]])
+                all_scores.append(query_scores[found])
+        return all_rows, all_scores
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get collection statistics.
+
+        Returns:
+            dict: Model, dimension, size, IVF lists, and queries served by this process
+        """
+        return {
+            "model": self.model,
+            "dim": self.dim,
+            "count": self.count,
+            "ivf_lists": len(self._centroids) if self._centroids is not None else None,
+            "searches": self.searches,
+        }
+
+
+class VectorIndex:
+    """Named vector collections, filled and queried through the embedding service."""
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Initialize the index.
+
+        Args:
+            directory: Root directory (one subdirectory per collection)
+        """
+        self.directory = directory or Config.VECTOR_INDEX_DIR
+        self._collections: dict[str, VectorCollection] = {}
+        self._lock = threading.Lock()
+
+    def collection(self, name: str, create: bool = False) -> VectorCollection:
+        """
+        Get a collection, opening it on first use.
+
+        Args:
+            name: Collection name
+            create: Create the collection if it does not exist
+
+        Returns:
+            VectorCollection: The collection
+
+        Raises:
+            ValidationError: If the name is invalid
+            CollectionNotFoundError: If it does not exist and create is False
+        """
+        if not COLLECTION_NAME_PATTERN.match(name):
+            raise ValidationError(f"Invalid collection name '{name}'")
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is None:
+                path = os.path.join(self.directory, name)
+                if not create and not os.path.exists(os.path.join(path, "meta.json")):
+                    raise CollectionNotFoundError(name)
+                collection = self._collections[name] = VectorCollection(path)
+            return collection
+
+    async def _vectors_for(
+        self,
+        texts: Sequence[Optional[str]],
+        vectors: Sequence[Optional[Sequence[float]]],
+        model: str,
+    ) -> np.ndarray:
+        """Embed the texts of items that carry no precomputed vector."""
+        missing = [position for position, vector in enumerate(vectors) if vector is None]
+        dimensions = {len(vector) for vector in vectors if vector is not None}
+        embedded: dict[int, np.ndarray] = {}
+        if missing:
+            result = await get_embedding_service().embed_batch([texts[position] for position in missing], model)
+            if result["model"] != model:
+                raise ValidationError(f"Embeddings were served by '{result['model']}' instead of '{model}'")
+            embedded = dict(zip(missing, result["embeddings"]))
+            dimensions.add(result["dimension"])
+        if len(dimensions) > 1:
+            raise ValidationError(f"Vector dimensions differ: {sorted(dimensions)}")
+        return np.stack([
+            embedded[position] if vector is None else np.asarray(vector, dtype=np.float32)
+            for position, vector in enumerate(vectors)
+        ])
+
+    async def upsert(
+        self,
+        name: str,
+        items: Sequence[dict[str, Any]],
+        model: Optional[str] = None,
+    ) -> dict[str, Any]:
+        """
+        Embed and insert (or replace) items in a collection.
+
+        Args:
+            name: Collection name
+            items: Dicts with 'id', and 'text' and/or 'vector', and optional 'metadata'
+            model: Embedding model (defaults to the collection's, then the default model)
+
+        Returns:
+            dict: Collection name, upserted count, collection size, dimension and model
+        """
+        collection = self.collection(name, create=True)
+        model = model or collection.model or Config.DEFAULT_EMBEDDING_MODEL
+        if collection.model is not None and model != collection.model:
+            raise ValidationError(
+                f"Collection '{name}' holds '{collection.model}' embeddings, not '{model}'",
+                details={"collection_model": collection.model},
+            )
+        texts = [item.get("text") for item in items]
+        vectors = await self._vectors_for(texts, [item.get("vector") for item in items], model)
+        count = await asyncio.to_thread(
+            collection.upsert,
+            model,
+            [item["id"] for item in items],
+            vectors,
+            texts,
+            [item.get("metadata") for item in items],
+        )
+        return {
+            "collection": name,
+            "upserted": len(items),
+            "count": count,
+            "dimension": collection.dim,
+            "model": model,
+        }
+
+    async def search(
+        self,
+        name: str,
+        queries: Sequence[str] = (),
+        vectors: Sequence[Sequence[float]] = (),
+        top_k: int = 10,
+        metric: str = "cosine",
+        exact: bool = False,
+        nprobe: Optional[int] = None,
+    ) -> dict[str, Any]:
+        """
+        Search a collection with text and/or vector queries.
+
+        Text queries are embedded with the collection's model in one batch;
+        all queries are then scored together.
+
+        Args:
+            name: Collection name
+            queries: Query texts
+            vectors: Precomputed query vectors (after the text queries)
+            top_k: Results per query
+            metric: 'cosine' or 'dot'
+            exact: Scan every row even if an IVF index exists
+            nprobe: Clusters scanned per query
+
+        Returns:
+            dict: Collection, metric, and one result list per query, in order
+        """
+        collection = self.collection(name)
+        matrices = []
+        if queries:
+            matrices.append(await self._vectors_for(queries, [None] * len(queries), collection.model))
+        if vectors:
+            matrices.append(np.asarray(vectors, dtype=np.float32))
+        if any(matrix.ndim != 2 for matrix in matrices) or len({matrix.shape[1] for matrix in matrices}) > 1:
+            raise ValidationError("Query vectors must all have the collection's dimension")
+        results = await asyncio.to_thread(
+            collection.search, np.concatenate(matrices), top_k, metric, exact, nprobe
+        )
+        return {"collection": name, "metric": metric, "results": results}
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get statistics of every collection opened by this process.
+
+        Returns:
+            dict: Directory and per-collection statistics
+        """
+        with self._lock:
+            collections = dict(self._collections)
+        return {
+            "directory": self.directory,
+            "collections": {name: collection.stats() for name, collection in collections.items()},
+        }
+
+
+# Global index instance
+_vector_index: Optional[VectorIndex] = None
+
+
+def get_vector_index() -> VectorIndex:
+    """
+    Get or create the global vector index.
+
+    Returns:
+        VectorIndex: The global index instance
+    """
+    global _vector_index
+    if _vector_index is None:
+        _vector_index = VectorIndex()
+    return _vector_index
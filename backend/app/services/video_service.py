@@ -9,13 +9,14 @@ This module provides model-agnostic video generation capabilities:
 - Comprehensive error handling
 """
 
-import asyncio
+import os
 import time
+import uuid
 from typing import Optional, Dict, Any
-from io import BytesIO
 
 from app.utils.config import Config
 from app.utils.exceptions import (
+    AIServiceException,
     ValidationError,
     HuggingFaceAPIError,
     ProcessingError,
@@ -23,7 +24,9 @@ from app.utils.exceptions import (
     ModelNotFoundError,
 )
 from app.utils.logging import get_logger
-from app.services.hf_client import get_hf_client
+from app.services.fallback_executor import get_fallback_executor
+from app.services.hf_client import get_async_hf_client
+from app.services.upstream_stream import UpstreamStream
 
 logger = get_logger(__name__)
 
@@ -37,7 +40,8 @@ class VideoService:
 
     def __init__(self):
         """Initialize the video service."""
-        self.hf_client = get_hf_client()
+        self.hf_client = get_async_hf_client()
+        self.fallback = get_fallback_executor()
         self.logger = logger
 
     async def generate_text_to_video(
@@ -60,9 +64,10 @@ class VideoService:
             num_inference_steps: Quality/speed tradeoff (1-100)
             
         Returns:
-            dict: Video data and metadata containing:
-                - video_bytes: Raw video data
-                - video_size: Size in bytes
+            dict: Video stream and metadata containing:
+                - stream: UpstreamStream of the video (must be consumed or closed)
+                - video_size: Size in bytes, if announced by the upstream
+                - artifact: Artifact file name, if artifacts are enabled
                 - duration: Video duration
                 - fps: Frames per second
                 - resolution: Video resolution
@@ -97,32 +102,39 @@ class VideoService:
             )
 
             # Call HuggingFace API
-            video_bytes = await self.hf_client.text_to_video(
-                prompt=prompt,
-                model=model,
-                negative_prompt=negative_prompt,
-                duration=duration,
-                fps=fps,
-                num_inference_steps=num_inference_steps,
+            artifact_path = self._artifact_path()
+            stream, model_used = await self.fallback.execute(
+                "text_to_video",
+                model,
+                Config.TEXT_TO_VIDEO_FALLBACK_MODELS,
+                lambda candidate: self.hf_client.stream_text_to_video(
+                    prompt=prompt,
+                    model=candidate,
+                    negative_prompt=negative_prompt,
+                    duration=duration,
+                    fps=fps,
+                    num_inference_steps=num_inference_steps,
+                    artifact_path=artifact_path,
+                ),
             )
 
-            # Process and validate video
+            # Collect metadata for the stream
             video_data = await self._process_video(
-                video_bytes, model, duration, fps, start_time
+                stream, model_used, duration, fps, start_time
             )
 
             self.logger.info(
-                "Text-to-video generated successfully",
+                "Text-to-video generation started streaming",
                 extra={
-                    "video_size": len(video_bytes),
-                    "model": model,
+                    "video_size": stream.content_length,
+                    "model": model_used,
                     "generation_time": video_data["generation_time"],
                 },
             )
 
             return video_data
 
-        except (HuggingFaceAPIError, ModelNotFoundError) as e:
+        except AIServiceException as e:
             self.logger.warning(
                 f"Text-to-video generation failed with model {model}: {str(e)}"
             )
@@ -155,9 +167,10 @@ class VideoService:
             num_inference_steps: Quality/speed tradeoff (1-100)
             
         Returns:
-            dict: Video data and metadata containing:
-                - video_bytes: Raw video data
-                - video_size: Size in bytes
+            dict: Video stream and metadata containing:
+                - stream: UpstreamStream of the video (must be consumed or closed)
+                - video_size: Size in bytes, if announced by the upstream
+                - artifact: Artifact file name, if artifacts are enabled
                 - duration: Video duration
                 - fps: Frames per second
                 - resolution: Video resolution
@@ -193,32 +206,39 @@ class VideoService:
             )
 
             # Call HuggingFace API
-            video_bytes = await self.hf_client.image_to_video(
-                image=image_data,
-                model=model,
-                prompt=prompt,
-                duration=duration,
-                fps=fps,
-                num_inference_steps=num_inference_steps,
+            artifact_path = self._artifact_path()
+            stream, model_used = await self.fallback.execute(
+                "image_to_video",
+                model,
+                Config.IMAGE_TO_VIDEO_FALLBACK_MODELS,
+                lambda candidate: self.hf_client.stream_image_to_video(
+                    image=image_data,
+                    model=candidate,
+                    prompt=prompt,
+                    duration=duration,
+                    fps=fps,
+                    num_inference_steps=num_inference_steps,
+                    artifact_path=artifact_path,
+                ),
             )
 
-            # Process and validate video
+            # Collect metadata for the stream
             video_data = await self._process_video(
-                video_bytes, model, duration, fps, start_time
+                stream, model_used, duration, fps, start_time
             )
 
             self.logger.info(
-                "Image-to-video generated successfully",
+                "Image-to-video generation started streaming",
                 extra={
-                    "video_size": len(video_bytes),
-                    "model": model,
+                    "video_size": stream.content_length,
+                    "model": model_used,
                     "generation_time": video_data["generation_time"],
                 },
             )
 
             return video_data
 
-        except (HuggingFaceAPIError, ModelNotFoundError) as e:
+        except AIServiceException as e:
             self.logger.warning(
                 f"Image-to-video generation failed with model {model}: {str(e)}"
             )
@@ -313,45 +333,47 @@ class VideoService:
                 {"num_inference_steps": "Must be between 1 and 100"},
             )
 
+    @staticmethod
+    def _artifact_path() -> Optional[str]:
+        """Pick a new artifact file path, or None if artifacts are disabled."""
+        if not Config.VIDEO_ARTIFACT_DIR:
+            return None
+        os.makedirs(Config.VIDEO_ARTIFACT_DIR, exist_ok=True)
+        return os.path.join(Config.VIDEO_ARTIFACT_DIR, f"{uuid.uuid4().hex}.mp4")
+
     async def _process_video(
         self,
-        video_bytes: bytes,
+        stream: UpstreamStream,
         model: str,
         duration: int,
         fps: int,
         start_time: float,
     ) -> Dict[str, Any]:
-        """Process and validate generated video.
+        """Collect metadata for a generated video stream.
+        
+        The size limit is enforced by the stream itself: up front when the
+        upstream announces the size, and incrementally while relaying.
         
         Args:
-            video_bytes: Raw video data
+            stream: Stream of the generated video
             model: Model used for generation
             duration: Expected duration
             fps: Expected frames per second
             start_time: Generation start time
             
         Returns:
-            dict: Processed video data and metadata
-            
-        Raises:
-            FileSizeError: If video exceeds maximum size
-            ProcessingError: If video processing fails
+            dict: Video stream and metadata
         """
-        # Validate video size
-        if len(video_bytes) > Config.MAX_VIDEO_FILE_SIZE:
-            raise FileSizeError(
-                len(video_bytes), Config.MAX_VIDEO_FILE_SIZE, "video"
-            )
-
-        # Calculate generation time
+        # Time until the upstream started sending the video
         generation_time = time.time() - start_time
 
         # Extract video metadata (placeholder - would use ffprobe in production)
-        resolution = await self._extract_resolution(video_bytes)
+        resolution = await self._extract_resolution(stream)
 
         return {
-            "video_bytes": video_bytes,
-            "video_size": len(video_bytes),
+            "stream": stream,
+            "video_size": stream.content_length,
+            "artifact": os.path.basename(stream.artifact_path) if stream.artifact_path else None,
             "duration": duration,
             "fps": fps,
             "resolution": resolution,
@@ -359,17 +381,17 @@ class VideoService:
             "generation_time": generation_time,
         }
 
-    async def _extract_resolution(self, video_bytes: bytes) -> str:
-        """Extract video resolution from video bytes.
+    async def _extract_resolution(self, stream: UpstreamStream) -> str:
+        """Extract video resolution from a video stream.
         
         Args:
-            video_bytes: Raw video data
+            stream: Stream of the generated video
             
         Returns:
             str: Resolution in format "WIDTHxHEIGHT"
             
         Note:
-            In production, this would use ffprobe to extract actual resolution.
+            In production, this would use ffprobe on the artifact file.
             For now, returns placeholder based on common video sizes.
         """
         # Placeholder implementation
@@ -1,29 +1,57 @@
 """Utility modules for the AI Platform backend."""
 
+from app.utils.coalescing import RequestCoalescer, coalesce, get_request_coalescer, request_fingerprint
 from app.utils.config import Config
 from app.utils.exceptions import (
     AIServiceException,
+    CircuitOpenError,
+    CollectionNotFoundError,
+    DeadlineExceededError,
     FileSizeError,
     HuggingFaceAPIError,
     InvalidFormatError,
     ModelNotFoundError,
     ProcessingError,
     RateLimitError,
+    ServiceUnavailableError,
     TimeoutError,
     ValidationError,
 )
 from app.utils.logging import get_logger, log_with_context, setup_logging
-from app.utils.retry import async_retry, retry, retry_with_fallback, should_retry
+from app.utils.response_cache import ResponseCache, cache_control, cached, get_response_cache
+from app.utils.retry import (
+    RetryBudget,
+    async_retry,
+    get_retry_budget,
+    retry,
+    retry_with_fallback,
+    should_retry,
+)
 from app.utils.validation import (
+    DocumentChunk,
+    DocumentEmbeddingResponse,
+    EmbeddingBatchRequest,
+    EmbeddingBatchResponse,
     EmbeddingRequest,
     EmbeddingResponse,
     ErrorResponse,
     HealthResponse,
     ImageEditingRequest,
     ImageGenerationRequest,
+    IndexItem,
+    IndexUpsertRequest,
+    IndexUpsertResponse,
     LLMRequest,
     LLMResponse,
     Message,
+    ProjectionFitRequest,
+    ProjectionFitResponse,
+    SearchHit,
+    SearchRequest,
+    SearchResponse,
+    SimilarityHit,
+    SimilarityRequest,
+    SimilarityResponse,
     STTRequest,
     STTResponse,
     TTSRequest,
@@ -38,16 +66,30 @@ __all__ = [
     "AIServiceException",
     "ValidationError",
     "ModelNotFoundError",
+    "CollectionNotFoundError",
     "HuggingFaceAPIError",
     "ProcessingError",
     "TimeoutError",
     "RateLimitError",
+    "CircuitOpenError",
+    "DeadlineExceededError",
+    "ServiceUnavailableError",
     "FileSizeError",
     "InvalidFormatError",
     "retry",
     "async_retry",
     "retry_with_fallback",
     "should_retry",
+    "RetryBudget",
+    "get_retry_budget",
+    "RequestCoalescer",
+    "coalesce",
+    "get_request_coalescer",
+    "request_fingerprint",
+    "ResponseCache",
+    "cached",
+    "cache_control",
+    "get_response_cache",
     "HealthResponse",
     "ErrorResponse",
     "ImageGenerationRequest",
@@ -61,4 +103,19 @@ __all__ = [
     "LLMResponse",
     "EmbeddingRequest",
     "EmbeddingResponse",
+    "EmbeddingBatchRequest",
+    "EmbeddingBatchResponse",
+    "ProjectionFitRequest",
+    "ProjectionFitResponse",
+    "DocumentChunk",
+    "DocumentEmbeddingResponse",
+    "SimilarityRequest",
+    "SimilarityHit",
+    "SimilarityResponse",
+    "IndexItem",
+    "IndexUpsertRequest",
+    "IndexUpsertResponse",
+    "SearchRequest",
+    "SearchHit",
+    "SearchResponse",
 ]
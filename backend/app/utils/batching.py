@@ -0,0 +1,176 @@
+"""
+Dynamic micro-batching of concurrent calls.
+
+This module collects single-item calls that arrive within a short window
+(or until a batch is full) into one batched call, then fans the results
+back out to the waiting callers. Items are grouped by key (e.g. model), so
+only calls that can share an upstream request are merged.
+"""
+
+import asyncio
+import contextvars
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from app.utils.deadline import get_deadline, remaining, request_deadline
+from app.utils.exceptions import DeadlineExceededError, ServiceUnavailableError
+from app.utils.logging import get_logger
+from app.utils.metrics import DEFAULT_COUNT_BUCKETS, Histogram
+
+logger = get_logger(__name__)
+
+# Histogram buckets for the latency batching adds, in seconds
+QUEUE_TIME_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _consume_exception(future: "asyncio.Future[Any]") -> None:
+    # Callers that gave up (deadline, disconnect) never retrieve the result
+    if not future.cancelled():
+        future.exception()
+
+
+class _PendingBatch:
+    """Items collected for one key since the last flush."""
+
+    def __init__(self):
+        self.items: list[Any] = []
+        self.futures: list["asyncio.Future[Any]"] = []
+        self.enqueued: list[float] = []
+        self.deadlines: list[Optional[float]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class MicroBatcher:
+    """
+    Merge concurrent single-item calls into batched calls.
+
+    The first item for a key opens a batch that is flushed after `window`
+    seconds or as soon as it holds `max_size` items. The handler receives
+    the key and the items and must return one result per item, in order;
+    an exception fails every item of the batch.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[str, list[Any]], Awaitable[list[Any]]],
+        max_size: int,
+        window: float,
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            name: Name used in logs and errors
+            handler: Coroutine function performing a batched call
+            max_size: Maximum items per batch
+            window: Maximum seconds an item waits for others to join
+        """
+        self.name = name
+        self.handler = handler
+        self.max_size = max(1, max_size)
+        self.window = max(0.0, window)
+        self._pending: dict[str, _PendingBatch] = {}
+        self.batches = 0
+        self.items = 0
+        self.failed_batches = 0
+        self.batch_size = Histogram(DEFAULT_COUNT_BUCKETS)
+        self.queue_time = Histogram(QUEUE_TIME_BUCKETS)
+
+    async def submit(self, key: str, item: Any) -> Any:
+        """
+        Add an item to the current batch for a key and wait for its result.
+
+        Args:
+            key: Batch key (items with different keys are never merged)
+            item: Item passed to the handler
+
+        Returns:
+            The handler's result for this item
+
+        Raises:
+            DeadlineExceededError: If the request deadline passes first
+        """
+        loop = asyncio.get_running_loop()
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = _PendingBatch()
+            batch.timer = loop.call_later(self.window, self._flush, key)
+
+        future = loop.create_future()
+        future.add_done_callback(_consume_exception)
+        batch.items.append(item)
+        batch.futures.append(future)
+        batch.enqueued.append(time.monotonic())
+        batch.deadlines.append(get_deadline())
+        if len(batch.items) >= self.max_size:
+            self._flush(key)
+
+        left = remaining()
+        if left is None:
+            return await asyncio.shield(future)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=max(0.0, left))
+        except asyncio.TimeoutError:
+            raise DeadlineExceededError(f"Request deadline passed during {self.name} batch")
+
+    def _flush(self, key: str) -> None:
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        now = time.monotonic()
+        for enqueued in batch.enqueued:
+            self.queue_time.observe(now - enqueued)
+        self.batches += 1
+        self.items += len(batch.items)
+        self.batch_size.observe(len(batch.items))
+        # Run outside the first caller's context, under the latest deadline
+        # of the batch's callers
+        asyncio.get_running_loop().create_task(self._run(key, batch), context=contextvars.Context())
+
+    async def _run(self, key: str, batch: _PendingBatch) -> None:
+        deadline = None if None in batch.deadlines else max(batch.deadlines)
+        try:
+            with request_deadline(None if deadline is None else deadline - time.monotonic()):
+                results = await self.handler(key, batch.items)
+            if len(results) != len(batch.items):
+                raise RuntimeError(f"{self.name} batch returned {len(results)} results for {len(batch.items)} items")
+        except Exception as e:
+            self.failed_batches += 1
+            logger.warning(f"{self.name} batch of {len(batch.items)} failed: {str(e)}")
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        except asyncio.CancelledError:
+            # E.g. shutdown: don't leave the callers waiting forever
+            self.failed_batches += 1
+            error = ServiceUnavailableError(f"{self.name} batch was cancelled")
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(error)
+            raise
+        for future, result in zip(batch.futures, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get batching statistics.
+
+        Returns:
+            dict: Settings, batch and item counts, items currently waiting,
+            and batch size and added latency histograms
+        """
+        return {
+            "max_size": self.max_size,
+            "window": self.window,
+            "batches": self.batches,
+            "items": self.items,
+            "failed_batches": self.failed_batches,
+            "pending": sum(len(batch.items) for batch in self._pending.values()),
+            "batch_size": self.batch_size.snapshot(),
+            "added_latency": self.queue_time.snapshot(),
+        }
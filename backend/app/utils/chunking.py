@@ -0,0 +1,209 @@
+"""
+Token-aware chunking of long documents.
+
+This module splits text into overlapping windows of a fixed number of
+tokens, as counted by the embedding model's own tokenizer (from the
+`tokenizers` package). Text is fed incrementally, so a large upload is
+chunked as it arrives and never held in memory as a whole.
+"""
+
+import json
+import threading
+from typing import NamedTuple, Optional
+
+from huggingface_hub import hf_hub_download
+from tokenizers import Tokenizer
+from tokenizers.models import WordLevel
+from tokenizers.pre_tokenizers import BertPreTokenizer
+
+from app.utils.config import Config
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Characters buffered before tokenizing, bounding memory per document
+CHUNKER_BUFFER_CHARS = 65536
+
+# Word-piece tokens per word assumed when the model's tokenizer is unavailable
+APPROXIMATE_TOKENS_PER_WORD = 1.4
+
+# Model files declaring the maximum input length, in order of precedence
+MAX_LENGTH_SOURCES = (
+    ("sentence_bert_config.json", "max_seq_length"),
+    ("tokenizer_config.json", "model_max_length"),
+)
+
+# Larger model_max_length values are transformers' "no limit" placeholder
+UNBOUNDED_MAX_LENGTH = 1_000_000
+
+_tokenizers: dict[str, tuple[Tokenizer, bool]] = {}
+_truncation_lengths: dict[str, Optional[int]] = {}
+_max_windows: dict[str, Optional[int]] = {}
+_tokenizers_lock = threading.Lock()
+
+
+def load_tokenizer(model: str) -> tuple[Tokenizer, bool]:
+    """
+    Get the tokenizer of a model, downloading it on first use.
+
+    If the model has no tokenizer.json on the Hub (or the Hub is
+    unreachable), words and punctuation are counted instead. Truncation and
+    padding configured in tokenizer.json are turned off, since documents are
+    tokenized whole; the truncation length is kept for max_window_tokens.
+
+    Args:
+        model: Model ID
+
+    Returns:
+        tuple: (tokenizer, whether it is the model's own tokenizer)
+    """
+    with _tokenizers_lock:
+        cached = _tokenizers.get(model)
+    if cached is not None:
+        return cached
+    try:
+        tokenizer = Tokenizer.from_pretrained(model, auth_token=Config.HF_API_KEY or None)
+        truncation = tokenizer.truncation
+        tokenizer.no_truncation()
+        tokenizer.no_padding()
+        loaded = (tokenizer, True)
+        with _tokenizers_lock:
+            _truncation_lengths.setdefault(model, truncation["max_length"] if truncation else None)
+    except Exception as e:
+        logger.warning(f"Tokenizer for {model} unavailable, approximating token counts by words: {str(e)}")
+        approximate = Tokenizer(WordLevel({"[UNK]": 0}, unk_token="[UNK]"))
+        approximate.pre_tokenizer = BertPreTokenizer()
+        loaded = (approximate, False)
+    with _tokenizers_lock:
+        return _tokenizers.setdefault(model, loaded)
+
+
+def max_window_tokens(model: str, tokenizer: Tokenizer, exact: bool) -> Optional[int]:
+    """
+    Get the largest window the model embeds without truncating it.
+
+    The model's maximum input length is read from its sentence-transformers
+    or tokenizer config on the Hub, falling back to the tokenizer's own
+    truncation length (as loaded, before load_tokenizer disabled it); the
+    special tokens the model adds are subtracted.
+
+    Args:
+        model: Model ID
+        tokenizer: The model's tokenizer (from load_tokenizer)
+        exact: Whether it is the model's own tokenizer
+
+    Returns:
+        Optional[int]: Maximum tokens per window, or None if unknown
+    """
+    if not exact:
+        return None
+    with _tokenizers_lock:
+        if model in _max_windows:
+            return _max_windows[model]
+    max_length = None
+    for filename, key in MAX_LENGTH_SOURCES:
+        try:
+            with open(hf_hub_download(model, filename, token=Config.HF_API_KEY or None)) as file:
+                value = json.load(file).get(key)
+        except Exception:
+            continue
+        if isinstance(value, int) and 0 < value < UNBOUNDED_MAX_LENGTH:
+            max_length = value
+            break
+    if max_length is None:
+        with _tokenizers_lock:
+            max_length = _truncation_lengths.get(model)
+    limit = None
+    if max_length is not None:
+        limit = max(1, max_length - tokenizer.num_special_tokens_to_add(is_pair=False))
+    with _tokenizers_lock:
+        return _max_windows.setdefault(model, limit)
+
+
+class Chunk(NamedTuple):
+    """A window of a document."""
+
+    text: str
+    start: int  # character offset in the document
+    end: int
+    tokens: int
+
+
+class WindowChunker:
+    """
+    Split incrementally fed text into overlapping token windows.
+
+    Windows hold `window` tokens and start every `window - overlap` tokens;
+    the last window ends with the document and may be shorter.
+    """
+
+    def __init__(self, tokenizer: Tokenizer, window: int, overlap: int, exact: bool = True):
+        """
+        Initialize the chunker.
+
+        Args:
+            tokenizer: Tokenizer counting the model's tokens
+            window: Tokens per window
+            overlap: Tokens shared by consecutive windows (less than window)
+            exact: False if the tokenizer only counts words, in which case
+                windows are shrunk to stay within `window` model tokens
+        """
+        if not exact:
+            window = max(1, int(window / APPROXIMATE_TOKENS_PER_WORD))
+            overlap = int(overlap / APPROXIMATE_TOKENS_PER_WORD)
+        self.tokenizer = tokenizer
+        self.window = window
+        self.step = max(1, window - overlap)
+        self.tokens = 0
+        self._buffer = ""
+        self._offset = 0  # document offset of the buffer's first character
+
+    def feed(self, text: str) -> list[Chunk]:
+        """
+        Add text to the document.
+
+        Args:
+            text: The next piece of the document
+
+        Returns:
+            list: Windows completed by this piece
+        """
+        self._buffer += text
+        if len(self._buffer) < CHUNKER_BUFFER_CHARS:
+            return []
+        return self._split(final=False)
+
+    def finish(self) -> list[Chunk]:
+        """
+        End the document.
+
+        Returns:
+            list: The remaining windows
+        """
+        return self._split(final=True)
+
+    def _split(self, final: bool) -> list[Chunk]:
+        offsets = self.tokenizer.encode(self._buffer, add_special_tokens=False).offsets
+        count = len(offsets)
+        chunks = []
+        start = 0
+        while start < count:
+            end = start + self.window
+            if end >= count:
+                # The buffer's last token may continue in the next piece
+                if not final:
+                    break
+                end = count
+            first, last = offsets[start][0], offsets[end - 1][1]
+            chunks.append(Chunk(self._buffer[first:last], self._offset + first, self._offset + last, end - start))
+            if end == count:
+                start = count
+                break
+            start += self.step
+
+        # Keep the text of the first unfinished window
+        self.tokens += start
+        cut = offsets[start][0] if start < count else len(self._buffer)
+        self._offset += cut
+        self._buffer = self._buffer[cut:]
+        return chunks
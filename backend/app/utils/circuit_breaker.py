@@ -0,0 +1,207 @@
+"""
+Per-model circuit breakers for upstream calls.
+
+This module stops sending traffic to a (provider, model) pair that is
+failing hard. A breaker opens on consecutive failures or a high error
+rate, fails calls fast while open, and lets a limited number of probe
+calls through (half-open) after a cool-down to detect recovery.
+"""
+
+import math
+import time
+from collections import deque
+from typing import Any, Optional
+
+from app.utils.config import Config
+from app.utils.exceptions import CircuitOpenError
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for one (provider, model) pair."""
+
+    def __init__(self, provider: Optional[str], model: str):
+        """
+        Initialize the breaker.
+
+        Args:
+            provider: Provider name, if any
+            model: Model ID
+        """
+        self.provider = provider
+        self.model = model
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.consecutive_failures = 0
+        self.outcomes: deque[bool] = deque(maxlen=Config.BREAKER_WINDOW)
+        self.probes_in_flight = 0
+        self.times_opened = 0
+        self.rejected = 0
+
+    def error_rate(self) -> float:
+        """Fraction of failed calls in the recent window."""
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def retry_after(self) -> int:
+        """Seconds until the breaker will allow a probe call."""
+        remaining = self.opened_at + Config.BREAKER_OPEN_SECONDS - time.monotonic()
+        return max(1, math.ceil(remaining))
+
+    def is_open(self) -> bool:
+        """
+        Check whether calls are currently being rejected.
+
+        Returns:
+            bool: True if open and the cool-down has not elapsed
+        """
+        if self.state == OPEN:
+            return time.monotonic() - self.opened_at < Config.BREAKER_OPEN_SECONDS
+        if self.state == HALF_OPEN:
+            return self.probes_in_flight >= Config.BREAKER_HALF_OPEN_PROBES
+        return False
+
+    def before_call(self) -> None:
+        """
+        Admit a call, moving from open to half-open once the cool-down has elapsed.
+
+        Raises:
+            CircuitOpenError: If the breaker rejects the call
+        """
+        if self.state == OPEN and time.monotonic() - self.opened_at >= Config.BREAKER_OPEN_SECONDS:
+            self.state = HALF_OPEN
+            self.probes_in_flight = 0
+            logger.info(f"Circuit breaker half-open for {self.provider}:{self.model}")
+
+        if self.state == OPEN or (
+            self.state == HALF_OPEN and self.probes_in_flight >= Config.BREAKER_HALF_OPEN_PROBES
+        ):
+            self.rejected += 1
+            raise CircuitOpenError(self.model, self.provider, self.retry_after())
+
+        if self.state == HALF_OPEN:
+            self.probes_in_flight += 1
+
+    def record_success(self) -> None:
+        """Record a successful call, closing the breaker after a successful probe."""
+        if self.state == HALF_OPEN:
+            logger.info(f"Circuit breaker closed for {self.provider}:{self.model}")
+            self.state = CLOSED
+            self.outcomes.clear()
+            self.probes_in_flight = 0
+        self.consecutive_failures = 0
+        self.outcomes.append(True)
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the breaker if a threshold is crossed."""
+        self.consecutive_failures += 1
+        self.outcomes.append(False)
+        if self.state == HALF_OPEN:
+            self._open("half-open probe failed")
+        elif self.consecutive_failures >= Config.BREAKER_FAILURE_THRESHOLD:
+            self._open(f"{self.consecutive_failures} consecutive failures")
+        elif len(self.outcomes) >= Config.BREAKER_MIN_CALLS and self.error_rate() >= Config.BREAKER_ERROR_RATE:
+            self._open(f"error rate {self.error_rate():.0%}")
+
+    def record_ignored(self) -> None:
+        """Release an admitted call that never reached the upstream (e.g. load shedding)."""
+        if self.state == HALF_OPEN and self.probes_in_flight > 0:
+            self.probes_in_flight -= 1
+
+    def _open(self, reason: str) -> None:
+        if self.state != OPEN:
+            self.times_opened += 1
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.probes_in_flight = 0
+        logger.warning(f"Circuit breaker opened for {self.provider}:{self.model} ({reason})")
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get the breaker's state and counters.
+
+        Returns:
+            dict: State, error rate, failure counts and time until probe
+        """
+        return {
+            "provider": self.provider,
+            "model": self.model,
+            "state": self.state,
+            "error_rate": round(self.error_rate(), 3),
+            "calls_in_window": len(self.outcomes),
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_after": self.retry_after() if self.state == OPEN else None,
+        }
+
+
+class CircuitBreakerRegistry:
+    """Registry of circuit breakers keyed by (provider, model)."""
+
+    def __init__(self):
+        """Initialize the registry."""
+        self._breakers: dict[tuple[Optional[str], str], CircuitBreaker] = {}
+
+    def get(self, provider: Optional[str], model: str) -> CircuitBreaker:
+        """
+        Get (or create) the breaker for a provider and model.
+
+        Args:
+            provider: Provider name, if any
+            model: Model ID
+
+        Returns:
+            CircuitBreaker: The breaker for the pair
+        """
+        breaker = self._breakers.get((provider, model))
+        if breaker is None:
+            breaker = self._breakers[(provider, model)] = CircuitBreaker(provider, model)
+        return breaker
+
+    def is_open(self, provider: Optional[str], model: str) -> bool:
+        """
+        Check whether the breaker for a pair is rejecting calls.
+
+        Args:
+            provider: Provider name, if any
+            model: Model ID
+
+        Returns:
+            bool: True if calls would currently be rejected
+        """
+        breaker = self._breakers.get((provider, model))
+        return breaker is not None and breaker.is_open()
+
+    def stats(self) -> list[dict[str, Any]]:
+        """
+        Get the state of every breaker.
+
+        Returns:
+            list: Breaker stats, one entry per (provider, model)
+        """
+        return [breaker.stats() for breaker in self._breakers.values()]
+
+
+# Global registry instance
+_circuit_breakers: Optional[CircuitBreakerRegistry] = None
+
+
+def get_circuit_breakers() -> CircuitBreakerRegistry:
+    """
+    Get or create the global circuit breaker registry.
+
+    Returns:
+        CircuitBreakerRegistry: The global registry instance
+    """
+    global _circuit_breakers
+    if _circuit_breakers is None:
+        _circuit_breakers = CircuitBreakerRegistry()
+    return _circuit_breakers
@@ -0,0 +1,193 @@
+"""
+Clustering and near-duplicate detection over large vector sets.
+
+This module runs spherical mini-batch k-means and finds pairs of vectors
+whose cosine similarity reaches a threshold. Vectors may be a memory-mapped
+array larger than RAM: every pass reads them in blocks, and the
+near-duplicate pass only compares vectors that share one of their two
+closest clusters, in blocks, so the n x n similarity matrix is never formed.
+All functions expect unit-norm rows.
+"""
+
+from typing import Iterator, Optional
+
+import numpy as np
+
+from app.utils.similarity import normalize_rows, select_top_k
+
+# Rows scored per block when assigning vectors to clusters
+ASSIGN_BLOCK_ROWS = 16384
+
+# Rows and columns per similarity block in the near-duplicate pass
+PAIR_BLOCK_ROWS = 2048
+PAIR_BLOCK_COLUMNS = 8192
+
+
+def minibatch_kmeans(
+    vectors: np.ndarray,
+    k: int,
+    batch_size: int = 4096,
+    steps: Optional[int] = None,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    Fit centroids with spherical mini-batch k-means.
+
+    Each step assigns a random batch to its closest centroids and moves each
+    centroid towards its batch members with a per-centroid learning rate of
+    1 / (members seen so far); centroids that have not attracted any member
+    are re-seeded from the batch.
+
+    Args:
+        vectors: (n, dim) unit-norm vectors (may be memory-mapped)
+        k: Number of clusters (at most n)
+        batch_size: Vectors per step
+        steps: Number of steps (default: about three passes, 20 to 300)
+        seed: Random seed
+
+    Returns:
+        np.ndarray: (k, dim) float32 unit-norm centroids
+    """
+    count = len(vectors)
+    k = max(1, min(k, count))
+    batch_size = min(batch_size, count)
+    if steps is None:
+        steps = min(300, max(20, 3 * count // batch_size))
+    rng = np.random.default_rng(seed)
+    initial = np.sort(rng.choice(count, size=k, replace=False))
+    centroids = np.array(vectors[initial], dtype=np.float32)
+    seen = np.zeros(k, dtype=np.int64)
+
+    for _ in range(steps):
+        batch = np.asarray(vectors[np.sort(rng.integers(0, count, size=batch_size))], dtype=np.float32)
+        assignment = np.argmax(batch @ centroids.T, axis=1)
+        members = np.bincount(assignment, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, batch)
+        seen += members
+        moved = members > 0
+        centroids[moved] += (sums[moved] - members[moved, None] * centroids[moved]) / seen[moved, None]
+        dead = seen == 0
+        if dead.any():
+            centroids[dead] = batch[rng.integers(0, len(batch), size=int(dead.sum()))]
+        centroids = normalize_rows(centroids)
+    return centroids
+
+
+def assign_clusters(
+    vectors: np.ndarray,
+    centroids: np.ndarray,
+    top: int = 1,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Find the closest centroids of every vector.
+
+    Args:
+        vectors: (n, dim) unit-norm vectors (may be memory-mapped)
+        centroids: (k, dim) unit-norm centroids
+        top: Closest centroids to return per vector
+
+    Returns:
+        tuple: (n, top) int32 cluster ids and float32 similarities, closest first
+    """
+    top = min(top, len(centroids))
+    labels = np.empty((len(vectors), top), dtype=np.int32)
+    scores = np.empty((len(vectors), top), dtype=np.float32)
+    for start in range(0, len(vectors), ASSIGN_BLOCK_ROWS):
+        block = np.asarray(vectors[start:start + ASSIGN_BLOCK_ROWS], dtype=np.float32)
+        similarities = block @ centroids.T
+        if top == 1:
+            closest = np.argmax(similarities, axis=1)
+            labels[start:start + len(block), 0] = closest
+            scores[start:start + len(block), 0] = similarities[np.arange(len(block)), closest]
+        else:
+            positions, selected = select_top_k(similarities, top)
+            labels[start:start + len(block)] = positions
+            scores[start:start + len(block)] = selected
+    return labels, scores
+
+
+def cluster_members(labels: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Group vector indices by cluster.
+
+    Args:
+        labels: (n,) cluster id per vector
+        k: Number of clusters
+
+    Returns:
+        tuple: (indices sorted by cluster, then index; (k + 1,) offsets of
+        each cluster's members in them)
+    """
+    order = np.argsort(labels, kind="stable")
+    offsets = np.searchsorted(labels[order], np.arange(k + 1))
+    return order, offsets
+
+
+def near_duplicate_pairs(
+    vectors: np.ndarray,
+    labels: np.ndarray,
+    threshold: float,
+) -> Iterator[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Find pairs of vectors with cosine similarity of at least a threshold.
+
+    Every vector is compared with the vectors of its closest cluster and
+    with the vectors for which that cluster is the second closest, so pairs
+    split across clusters are found as long as one of them lies in the
+    other's two closest clusters. Each pair is reported once.
+
+    Args:
+        vectors: (n, dim) unit-norm vectors (may be memory-mapped)
+        labels: (n, 2) closest and second closest cluster per vector, or
+            (n, 1) closest cluster only
+        threshold: Minimum cosine similarity
+
+    Yields:
+        tuple: (first indices, second indices, similarities) of the pairs of
+        one cluster, first index below second
+    """
+    primary = labels[:, 0]
+    secondary = labels[:, 1] if labels.shape[1] > 1 else np.full(len(labels), -1, dtype=labels.dtype)
+    k = int(labels.max()) + 1 if len(labels) else 0
+    primary_order, primary_offsets = cluster_members(primary, k)
+    secondary_order, secondary_offsets = cluster_members(secondary, k)
+
+    for cluster in range(k):
+        own = primary_order[primary_offsets[cluster]:primary_offsets[cluster + 1]]
+        if not len(own):
+            continue
+        guests = secondary_order[secondary_offsets[cluster]:secondary_offsets[cluster + 1]]
+        # A guest pair is also seen from the guest's own cluster when the
+        # member is a guest there; report it from the lower cluster only
+        candidates = np.concatenate([own, guests])
+        own_count = len(own)
+        guest_primary = primary[guests]
+
+        for row_start in range(0, own_count, PAIR_BLOCK_ROWS):
+            rows = np.arange(row_start, min(row_start + PAIR_BLOCK_ROWS, own_count))
+            # Read blocks rather than whole clusters so a large cluster of a
+            # memory-mapped matrix never has to fit in memory at once
+            row_vectors = np.asarray(vectors[candidates[rows]], dtype=np.float32)
+            # Columns before this block's rows only hold pairs reported already
+            for column_start in range(row_start, len(candidates), PAIR_BLOCK_COLUMNS):
+                columns = np.arange(column_start, min(column_start + PAIR_BLOCK_COLUMNS, len(candidates)))
+                column_vectors = np.asarray(vectors[candidates[columns]], dtype=np.float32)
+                scores = row_vectors @ column_vectors.T
+                hits = scores >= threshold
+                own_columns = columns < own_count
+                hits[:, own_columns] &= columns[own_columns][None, :] > rows[:, None]
+                guest_columns = ~own_columns
+                if guest_columns.any():
+                    other = guest_primary[columns[guest_columns] - own_count]
+                    mutual = secondary[own[rows]][:, None] == other[None, :]
+                    hits[:, guest_columns] &= ~mutual | (cluster < other)[None, :]
+                row_hits, column_hits = np.nonzero(hits)
+                if len(row_hits):
+                    first = own[rows[row_hits]]
+                    second = candidates[columns[column_hits]]
+                    yield (
+                        np.minimum(first, second),
+                        np.maximum(first, second),
+                        scores[row_hits, column_hits],
+                    )
@@ -0,0 +1,220 @@
+"""
+Single-flight coalescing of identical in-flight requests.
+
+This module lets concurrent callers that issue exactly the same upstream
+request share one in-flight call instead of each starting their own.
+"""
+
+import asyncio
+import copy
+import hashlib
+import inspect
+import json
+from functools import wraps
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from app.utils.config import Config
+from app.utils.deadline import context_without_deadline, remaining
+from app.utils.exceptions import DeadlineExceededError
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+def request_fingerprint(
+    task: str,
+    model: str,
+    params: dict[str, Any],
+    payload: Any = None,
+) -> str:
+    """
+    Compute a canonical SHA-256 fingerprint for an upstream request.
+
+    Args:
+        task: Inference task name
+        model: Model ID
+        params: Request parameters (order-insensitive)
+        payload: Main input (text or bytes)
+
+    Returns:
+        str: Hex digest identifying the request
+    """
+    digest = hashlib.sha256()
+    header = json.dumps(
+        {"task": task, "model": model, "params": params},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    digest.update(header.encode("utf-8"))
+    digest.update(b"\0")
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        digest.update(bytes(payload))
+    elif payload is not None:
+        digest.update(str(payload).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _private_copy(result: T) -> T:
+    """Copy a mutable shared result so one caller's edits don't leak to others."""
+    if isinstance(result, (dict, list)):
+        return copy.deepcopy(result)
+    return result
+
+
+class _Flight:
+    """An in-flight call and the number of callers waiting on it."""
+
+    def __init__(self, task: "asyncio.Task[Any]"):
+        self.task = task
+        self.waiters = 0
+
+
+class RequestCoalescer:
+    """
+    Share identical in-flight calls between concurrent callers.
+
+    The first caller for a key starts the call; later callers with the same
+    key await its result (or exception). The call is cancelled only when every
+    waiting caller has gone away.
+    """
+
+    def __init__(self):
+        """Initialize the coalescer."""
+        self._flights: dict[str, _Flight] = {}
+        self._executed: dict[str, int] = {}
+        self._coalesced: dict[str, int] = {}
+
+    async def run(
+        self,
+        task_name: str,
+        key: str,
+        factory: Callable[[], Awaitable[T]],
+    ) -> T:
+        """
+        Run a call, or join an identical one that is already in flight.
+
+        Args:
+            task_name: Task name used for the counters
+            key: Request fingerprint
+            factory: Coroutine factory that performs the call
+
+        Returns:
+            The result of the (possibly shared) call; mutable results are
+            copied so each caller gets its own object
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            # The shared call is not bound by the first caller's deadline;
+            # every caller enforces its own while waiting below
+            flight = _Flight(context_without_deadline().run(asyncio.ensure_future, factory()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._flights.pop(key, None))
+            self._executed[task_name] = self._executed.get(task_name, 0) + 1
+        else:
+            self._coalesced[task_name] = self._coalesced.get(task_name, 0) + 1
+            logger.debug(f"Coalesced {task_name} request onto in-flight call {key[:12]}")
+
+        flight.waiters += 1
+        try:
+            left = remaining()
+            if left is None:
+                return _private_copy(await asyncio.shield(flight.task))
+            # The shared call may belong to a request with a later deadline
+            try:
+                result = await asyncio.wait_for(asyncio.shield(flight.task), timeout=max(0.0, left))
+            except asyncio.TimeoutError:
+                if flight.waiters == 1 and not flight.task.done():
+                    flight.task.cancel()
+                raise DeadlineExceededError(f"Request deadline passed during {task_name} call")
+            return _private_copy(result)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get coalescing counters per task.
+
+        Returns:
+            dict: Executed and coalesced call counts per task, and the
+            number of calls currently in flight
+        """
+        tasks = sorted(set(self._executed) | set(self._coalesced))
+        return {
+            "in_flight": len(self._flights),
+            "tasks": {
+                task: {
+                    "executed": self._executed.get(task, 0),
+                    "coalesced": self._coalesced.get(task, 0),
+                }
+                for task in tasks
+            },
+        }
+
+
+# Global coalescer instance
+_request_coalescer: Optional[RequestCoalescer] = None
+
+
+def get_request_coalescer() -> RequestCoalescer:
+    """
+    Get or create the global request coalescer.
+
+    Returns:
+        RequestCoalescer: The global coalescer instance
+    """
+    global _request_coalescer
+    if _request_coalescer is None:
+        _request_coalescer = RequestCoalescer()
+    return _request_coalescer
+
+
+def coalesce(
+    task: str,
+    payload: str,
+    when: Optional[Callable[[dict[str, Any]], bool]] = None,
+) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """
+    Decorator that coalesces identical concurrent calls of a client method.
+
+    The request key is built from the task, the 'model' argument, the payload
+    argument and every other argument of the call. Coalescing only applies
+    when the task is listed in Config.COALESCE_TASKS.
+
+    Args:
+        task: Inference task name
+        payload: Name of the argument holding the main input
+        when: Optional predicate on the call arguments; calls for which it
+            returns False (e.g. sampled generation) are never coalesced
+
+    Returns:
+        Callable: Decorated async method
+    """
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            if task not in Config.COALESCE_TASKS:
+                return await func(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = {name: value for name, value in bound.arguments.items() if name != "self"}
+            if when is not None and not when(params):
+                return await func(*args, **kwargs)
+
+            model = params.pop("model", None)
+            body = params.pop(payload, None)
+            key = request_fingerprint(task, model, params, body)
+            return await get_request_coalescer().run(task, key, lambda: func(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,207 @@
+"""
+Per-model and per-provider concurrency governor.
+
+This module bounds how many upstream calls run at once against a given
+model or provider. Excess calls wait in a bounded queue for a limited
+time; once the queue is full, calls are rejected immediately with a
+Retry-After hint instead of piling more load onto a throttled upstream.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+
+from app.utils.config import Config
+from app.utils.deadline import bound_timeout, check_deadline
+from app.utils.exceptions import RateLimitError, ServiceUnavailableError
+from app.utils.logging import get_logger
+from app.utils.metrics import DEFAULT_COUNT_BUCKETS, Histogram
+
+logger = get_logger(__name__)
+
+
+class _KeyLimiter:
+    """Concurrency limit with a bounded FIFO wait queue for one key."""
+
+    def __init__(self, key: str, limit: int, max_queue: int):
+        self.key = key
+        self.limit = limit
+        self.max_queue = max_queue
+        self.active = 0
+        self.waiters: deque[asyncio.Future] = deque()
+        self.rejected = 0
+        self.timed_out = 0
+        self.avg_hold_time = 1.0
+        self.wait_time = Histogram()
+        self.queue_depth = Histogram(buckets=(0,) + DEFAULT_COUNT_BUCKETS)
+
+    def retry_after(self) -> int:
+        """Estimate how many seconds until a slot is likely to free up."""
+        backlog = len(self.waiters) + 1
+        return max(1, math.ceil(self.avg_hold_time * backlog / self.limit))
+
+    async def acquire(self, max_wait: float) -> None:
+        self.queue_depth.observe(len(self.waiters))
+        if self.active < self.limit and not self.waiters:
+            self.active += 1
+            self.wait_time.observe(0.0)
+            return
+
+        if len(self.waiters) >= self.max_queue:
+            self.rejected += 1
+            raise RateLimitError(
+                f"Too many concurrent requests for '{self.key}', queue is full",
+                retry_after=self.retry_after(),
+            )
+
+        started = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout=max_wait)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise ServiceUnavailableError(
+                f"Timed out after {max_wait}s waiting for a '{self.key}' slot",
+                retry_after=self.retry_after(),
+            )
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before cancellation
+            if waiter.done() and not waiter.cancelled():
+                self.release(0.0)
+            raise
+        finally:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+        self.wait_time.observe(time.monotonic() - started)
+
+    def release(self, hold_time: float) -> None:
+        if hold_time > 0:
+            self.avg_hold_time = 0.8 * self.avg_hold_time + 0.2 * hold_time
+        # Hand the slot directly to the next live waiter to keep FIFO order
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": len(self.waiters),
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "queue_depth": self.queue_depth.snapshot(),
+            "wait_time": self.wait_time.snapshot(),
+        }
+
+
+class ConcurrencyGovernor:
+    """
+    Concurrency limits keyed by model ID and provider name.
+
+    Limits come from Config.CONCURRENCY_LIMITS; keys without a configured
+    limit are not restricted.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[dict[str, int]] = None,
+        max_queue: Optional[int] = None,
+        max_queue_wait: Optional[float] = None,
+    ):
+        """
+        Initialize the governor.
+
+        Args:
+            limits: Concurrency limit per model or provider key
+            max_queue: Maximum number of queued calls per key
+            max_queue_wait: Maximum time in seconds a call may wait for a slot
+        """
+        self.limits = limits if limits is not None else Config.CONCURRENCY_LIMITS
+        self.max_queue = max_queue if max_queue is not None else Config.CONCURRENCY_MAX_QUEUE
+        self.max_queue_wait = max_queue_wait if max_queue_wait is not None else Config.CONCURRENCY_MAX_QUEUE_WAIT
+        self._limiters: dict[str, _KeyLimiter] = {
+            key: _KeyLimiter(key, limit, self.max_queue)
+            for key, limit in self.limits.items()
+            if limit > 0
+        }
+
+    @asynccontextmanager
+    async def limit(self, model: str, provider: Optional[str]) -> AsyncIterator[None]:
+        """
+        Hold a concurrency slot for a model and its provider.
+
+        Slots are always acquired model first, then provider, so concurrent
+        callers cannot deadlock on each other.
+
+        Args:
+            model: Model ID
+            provider: Provider name, if any
+
+        Raises:
+            RateLimitError: If a wait queue is full
+            ServiceUnavailableError: If no slot frees up within the max queue wait
+            DeadlineExceededError: If the request deadline passes while queued
+        """
+        limiters = [
+            self._limiters[key]
+            for key in (model, provider)
+            if key is not None and key in self._limiters
+        ]
+        acquired: list[_KeyLimiter] = []
+        try:
+            for limiter in limiters:
+                # Never queue past the request deadline
+                await limiter.acquire(bound_timeout(self.max_queue_wait))
+                acquired.append(limiter)
+        except ServiceUnavailableError:
+            for limiter in reversed(acquired):
+                limiter.release(0.0)
+            check_deadline("an upstream slot freed up")
+            raise
+        except BaseException:
+            for limiter in reversed(acquired):
+                limiter.release(0.0)
+            raise
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            hold_time = time.monotonic() - started
+            for limiter in reversed(acquired):
+                limiter.release(hold_time)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get per-key concurrency statistics.
+
+        Returns:
+            dict: Limit, active, queued and rejected counts with queue depth
+            and wait time histograms for each limited key
+        """
+        return {key: limiter.stats() for key, limiter in self._limiters.items()}
+
+
+# Global governor instance
+_concurrency_governor: Optional[ConcurrencyGovernor] = None
+
+
+def get_concurrency_governor() -> ConcurrencyGovernor:
+    """
+    Get or create the global concurrency governor.
+
+    Returns:
+        ConcurrencyGovernor: The global governor instance
+    """
+    global _concurrency_governor
+    if _concurrency_governor is None:
+        _concurrency_governor = ConcurrencyGovernor()
+    return _concurrency_governor
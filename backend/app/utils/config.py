@@ -12,11 +12,47 @@ load_dotenv()
 from typing import Optional
 
 
+def _parse_int_map(value: str) -> dict[str, int]:
+    """
+    Parse a 'key=value,key=value' environment string into a dict of ints.
+    
+    Keys may be provider names or model IDs (e.g. 'fal=8,Wan-AI/Wan2.2-TI2V-5B=2').
+    """
+    result: dict[str, int] = {}
+    for item in value.split(","):
+        if "=" not in item:
+            continue
+        key, raw = item.rsplit("=", 1)
+        if key.strip() and raw.strip():
+            result[key.strip()] = int(raw.strip())
+    return result
+
+
+def _parse_list_map(value: str) -> dict[str, list[str]]:
+    """
+    Parse a 'key=a|b,key=c' environment string into a dict of lists.
+    
+    Used for per-model provider candidates (e.g. 'hexgrad/Kokoro-82M=fal|replicate').
+    """
+    result: dict[str, list[str]] = {}
+    for item in value.split(","):
+        if "=" not in item:
+            continue
+        key, raw = item.rsplit("=", 1)
+        values = [part.strip() for part in raw.split("|") if part.strip()]
+        if key.strip() and values:
+            result[key.strip()] = values
+    return result
+
+
 class Config:
     """Application configuration loaded from environment variables."""
 
     # HuggingFace API Configuration
     HF_API_KEY: str = os.getenv("HF_API_KEY", "")
+    # Send all inference calls to this base URL instead of the HuggingFace
+    # providers, e.g. the fake server in tools/fake_inference_server.py
+    HF_INFERENCE_ENDPOINT: str = os.getenv("HF_INFERENCE_ENDPOINT", "").rstrip("/")
     
     # Server Configuration
     HOST: str = os.getenv("HOST", "0.0.0.0")
@@ -44,6 +80,175 @@ class Config:
     RETRY_BACKOFF_MULTIPLIER: float = float(os.getenv("RETRY_BACKOFF_MULTIPLIER", "2.0"))
     INITIAL_RETRY_DELAY: float = float(os.getenv("INITIAL_RETRY_DELAY", "1.0"))
     MAX_RETRY_DELAY: float = float(os.getenv("MAX_RETRY_DELAY", "30.0"))
+    # Retry budget: retries may not exceed this share of first attempts over the window
+    RETRY_BUDGET_PERCENT: float = float(os.getenv("RETRY_BUDGET_PERCENT", "20.0"))
+    RETRY_BUDGET_WINDOW: float = float(os.getenv("RETRY_BUDGET_WINDOW", "10.0"))  # seconds
+    RETRY_BUDGET_MIN_RETRIES: int = int(os.getenv("RETRY_BUDGET_MIN_RETRIES", "10"))  # per window
+    # Per-endpoint request deadlines in seconds by path prefix; unlisted paths use REQUEST_TIMEOUT.
+    # Clients can shorten them with X-Request-Timeout or X-Request-Deadline headers.
+    ENDPOINT_DEADLINES: dict[str, int] = _parse_int_map(os.getenv(
+        "ENDPOINT_DEADLINES",
+        "/api/embedding=60,/api/embedding/batch=300,/api/embedding/document=600,/api/embedding/corpus=7200,/api/llm=180,/api/stt=180,/api/tts=180,/api/image=240,/api/edit-image=240,/api/video=600",
+    ))
+    # Retries are not started with less than this many seconds left before the deadline
+    DEADLINE_MIN_ATTEMPT: float = float(os.getenv("DEADLINE_MIN_ATTEMPT", "1.0"))
+    # Longest upstream Retry-After / model-loading estimate worth waiting for before retrying
+    MAX_RETRY_AFTER: float = float(os.getenv("MAX_RETRY_AFTER", "60.0"))
+    
+    # Upstream HTTP Connection Pool Configuration
+    HTTP_POOL_MAX_CONNECTIONS: int = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "32"))  # per provider
+    HTTP_POOL_MAX_KEEPALIVE: int = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "16"))  # per provider
+    HTTP_POOL_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_POOL_KEEPALIVE_EXPIRY", "60.0"))
+    HTTP_POOL_HTTP2: bool = os.getenv("HTTP_POOL_HTTP2", "false").lower() == "true"
+    # Per-provider overrides of HTTP_POOL_MAX_CONNECTIONS, e.g. "fal=16,novita=4"
+    HTTP_POOL_PROVIDER_LIMITS: dict[str, int] = _parse_int_map(os.getenv("HTTP_POOL_PROVIDER_LIMITS", ""))
+    
+    # Request Coalescing Configuration
+    # Tasks whose identical in-flight requests share one upstream call
+    # (text_generation is only coalesced when temperature is 0)
+    COALESCE_TASKS: list[str] = [
+        task.strip()
+        for task in os.getenv(
+            "COALESCE_TASKS",
+            "text_to_image,text_to_speech,automatic_speech_recognition,feature_extraction,text_generation,text_to_video",
+        ).split(",")
+        if task.strip()
+    ]
+    
+    # Hedged Request Configuration (opt-in per task)
+    # Supported: feature_extraction, automatic_speech_recognition, text_generation
+    HEDGE_TASKS: list[str] = [
+        task.strip() for task in os.getenv("HEDGE_TASKS", "").split(",") if task.strip()
+    ]
+    HEDGE_MAX_PERCENT: float = float(os.getenv("HEDGE_MAX_PERCENT", "5.0"))  # of primary calls
+    HEDGE_MAX_NEW_TOKENS: int = int(os.getenv("HEDGE_MAX_NEW_TOKENS", "64"))  # "short" generations
+    
+    # Circuit Breaker Configuration (per provider and model)
+    BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))  # consecutive failures
+    BREAKER_ERROR_RATE: float = float(os.getenv("BREAKER_ERROR_RATE", "0.5"))
+    BREAKER_MIN_CALLS: int = int(os.getenv("BREAKER_MIN_CALLS", "10"))  # before error rate applies
+    BREAKER_WINDOW: int = int(os.getenv("BREAKER_WINDOW", "20"))  # recent calls considered
+    BREAKER_OPEN_SECONDS: float = float(os.getenv("BREAKER_OPEN_SECONDS", "30.0"))
+    BREAKER_HALF_OPEN_PROBES: int = int(os.getenv("BREAKER_HALF_OPEN_PROBES", "1"))
+    
+    # Model Fallback Configuration
+    # Max models tried per request (requested/default model plus fallbacks)
+    FALLBACK_MAX_MODELS: int = int(os.getenv("FALLBACK_MAX_MODELS", "4"))
+    # Embeddings from different models are not comparable, so this is opt-in
+    EMBEDDING_FALLBACK_ENABLED: bool = os.getenv("EMBEDDING_FALLBACK_ENABLED", "false").lower() == "true"
+    
+    # Batch Embeddings
+    # Texts per upstream call, by model (EMBEDDING_BATCH_SIZE for unlisted models)
+    EMBEDDING_BATCH_SIZES: dict[str, int] = _parse_int_map(os.getenv("EMBEDDING_BATCH_SIZES", ""))
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+    EMBEDDING_BATCH_MAX_CHARS: int = int(os.getenv("EMBEDDING_BATCH_MAX_CHARS", "100000"))  # per upstream call
+    EMBEDDING_BATCH_CONCURRENCY: int = int(os.getenv("EMBEDDING_BATCH_CONCURRENCY", "4"))  # calls per request
+    # Concurrent single-text requests are merged into one call for up to
+    # EMBEDDING_MICROBATCH_WINDOW seconds or EMBEDDING_MICROBATCH_MAX_SIZE texts
+    EMBEDDING_MICROBATCH_ENABLED: bool = os.getenv("EMBEDDING_MICROBATCH_ENABLED", "true").lower() == "true"
+    EMBEDDING_MICROBATCH_WINDOW: float = float(os.getenv("EMBEDDING_MICROBATCH_WINDOW", "0.005"))
+    EMBEDDING_MICROBATCH_MAX_SIZE: int = int(os.getenv("EMBEDDING_MICROBATCH_MAX_SIZE", "32"))
+    # Long documents are embedded in overlapping windows of model tokens
+    # (leave room for the special tokens the model adds)
+    EMBEDDING_DOCUMENT_WINDOW: int = int(os.getenv("EMBEDDING_DOCUMENT_WINDOW", "240"))
+    EMBEDDING_DOCUMENT_OVERLAP: int = int(os.getenv("EMBEDDING_DOCUMENT_OVERLAP", "32"))
+    # Corpus analysis (clustering and near-duplicates); vectors are spooled to
+    # a temporary file in EMBEDDING_CORPUS_TEMP_DIR (system default if empty)
+    EMBEDDING_CORPUS_MAX_ITEMS: int = int(os.getenv("EMBEDDING_CORPUS_MAX_ITEMS", "2000000"))
+    EMBEDDING_CORPUS_MAX_PAIRS: int = int(os.getenv("EMBEDDING_CORPUS_MAX_PAIRS", "1000000"))  # per job
+    EMBEDDING_CORPUS_TEMP_DIR: str = os.getenv("EMBEDDING_CORPUS_TEMP_DIR", "")
+    
+    # Provider Routing Configuration
+    # Extra candidate providers per model, in preference order, e.g. "black-forest-labs/FLUX.1-dev=fal|replicate"
+    MODEL_PROVIDERS: dict[str, list[str]] = _parse_list_map(os.getenv("MODEL_PROVIDERS", ""))
+    # Tasks whose provider is picked per call from the latency-ranked table
+    PROVIDER_ROUTED_TASKS: list[str] = [
+        task.strip()
+        for task in os.getenv(
+            "PROVIDER_ROUTED_TASKS", "text_to_image,text_to_speech,text_to_video,image_to_video"
+        ).split(",")
+        if task.strip()
+    ]
+    # Seconds after which an unused candidate gets a live probe call and the
+    # Hub's provider list for the model is fetched again
+    PROVIDER_REPROBE_INTERVAL: float = float(os.getenv("PROVIDER_REPROBE_INTERVAL", "300.0"))
+    # Look up which providers serve a model on the Hub (skipped with HF_INFERENCE_ENDPOINT)
+    PROVIDER_DISCOVERY_ENABLED: bool = os.getenv("PROVIDER_DISCOVERY_ENABLED", "true").lower() == "true"
+    
+    # Outbound Rate Limits (per API token and provider, shared by all workers on a node)
+    # Requests per minute per provider; calls without a provider use the "auto" key
+    RATE_LIMITS: dict[str, int] = _parse_int_map(os.getenv("RATE_LIMITS", "fal=300,novita=60"))
+    RATE_LIMIT_DEFAULT: int = int(os.getenv("RATE_LIMIT_DEFAULT", "600"))  # 0 = unlimited
+    # Rate for all calls when HF_INFERENCE_ENDPOINT is set (self-hosted or fake server)
+    RATE_LIMIT_ENDPOINT: int = int(os.getenv("RATE_LIMIT_ENDPOINT", "0"))  # 0 = unlimited
+    RATE_LIMIT_BURST: int = int(os.getenv("RATE_LIMIT_BURST", "10"))
+    RATE_LIMIT_MAX_WAIT: float = float(os.getenv("RATE_LIMIT_MAX_WAIT", "30.0"))  # queue at most this long
+    RATE_LIMIT_DB: str = os.path.expanduser(
+        os.getenv("RATE_LIMIT_DB", "") or "~/.cache/ai-platform/rate_limits.sqlite3"
+    )
+    
+    # Response Cache (deterministic tasks only; a task without a TTL is not cached)
+    # Seconds to keep each task's responses
+    CACHE_TTLS: dict[str, int] = _parse_int_map(os.getenv(
+        "CACHE_TTLS",
+        "automatic_speech_recognition=86400,text_to_speech=86400,text_to_image=86400,text_generation=3600",
+    ))
+    CACHE_MEMORY_MAX_BYTES: int = int(os.getenv("CACHE_MEMORY_MAX_BYTES", str(64 * 1024 * 1024)))  # 0 = off
+    CACHE_DISK_MAX_BYTES: int = int(os.getenv("CACHE_DISK_MAX_BYTES", str(1024 * 1024 * 1024)))  # 0 = off
+    CACHE_DIR: str = os.path.expanduser(os.getenv("CACHE_DIR", "") or "~/.cache/ai-platform/responses")
+    
+    # Embedding Store (memory-mapped vectors per model, shared by all workers on a node)
+    EMBEDDING_STORE_ENABLED: bool = os.getenv("EMBEDDING_STORE_ENABLED", "true").lower() == "true"
+    EMBEDDING_STORE_DIR: str = os.path.expanduser(
+        os.getenv("EMBEDDING_STORE_DIR", "") or "~/.cache/ai-platform/embeddings"
+    )
+    EMBEDDING_STORE_DTYPE: str = os.getenv("EMBEDDING_STORE_DTYPE", "float32")  # or float16
+    
+    # Embedding dimension reduction (the 'dimensions' request option)
+    # Models trained so that leading dimensions can be kept on their own
+    EMBEDDING_MATRYOSHKA_MODELS: list[str] = [
+        model.strip()
+        for model in os.getenv(
+            "EMBEDDING_MATRYOSHKA_MODELS",
+            "nomic-ai/nomic-embed-text-v1.5,mixedbread-ai/mxbai-embed-large-v1,Snowflake/snowflake-arctic-embed-m-v1.5",
+        ).split(",")
+        if model.strip()
+    ]
+    # Other models use a PCA fitted on up to EMBEDDING_PROJECTION_SAMPLE stored vectors
+    EMBEDDING_PROJECTION_DIR: str = os.path.expanduser(
+        os.getenv("EMBEDDING_PROJECTION_DIR", "") or "~/.cache/ai-platform/projections"
+    )
+    EMBEDDING_PROJECTION_SAMPLE: int = int(os.getenv("EMBEDDING_PROJECTION_SAMPLE", "100000"))
+    EMBEDDING_PROJECTION_MIN_ROWS: int = int(os.getenv("EMBEDDING_PROJECTION_MIN_ROWS", "1000"))
+    
+    # Vector Index (named collections searched by /api/embedding/search)
+    VECTOR_INDEX_DIR: str = os.path.expanduser(
+        os.getenv("VECTOR_INDEX_DIR", "") or "~/.cache/ai-platform/indexes"
+    )
+    # Collections up to this size are searched exactly; larger ones through an IVF index
+    VECTOR_INDEX_IVF_THRESHOLD: int = int(os.getenv("VECTOR_INDEX_IVF_THRESHOLD", "50000"))
+    VECTOR_INDEX_MAX_LISTS: int = int(os.getenv("VECTOR_INDEX_MAX_LISTS", "4096"))
+    VECTOR_INDEX_TRAIN_SAMPLE: int = int(os.getenv("VECTOR_INDEX_TRAIN_SAMPLE", "50000"))
+    VECTOR_INDEX_NPROBE: int = int(os.getenv("VECTOR_INDEX_NPROBE", "16"))  # IVF lists scanned per query
+    
+    # Upstream Concurrency Limits
+    # Max concurrent calls per model ID or provider, e.g. "Wan-AI/Wan2.2-TI2V-5B=2,fal=8"
+    CONCURRENCY_LIMITS: dict[str, int] = _parse_int_map(os.getenv("CONCURRENCY_LIMITS", "novita=4,fal=8"))
+    CONCURRENCY_MAX_QUEUE: int = int(os.getenv("CONCURRENCY_MAX_QUEUE", "32"))  # per key
+    CONCURRENCY_MAX_QUEUE_WAIT: float = float(os.getenv("CONCURRENCY_MAX_QUEUE_WAIT", "30.0"))
+    
+    # Adaptive Timeout Configuration
+    # Timeout = p99 latency x multiplier, clamped to [floor, per-task ceiling]
+    ADAPTIVE_TIMEOUT_MULTIPLIER: float = float(os.getenv("ADAPTIVE_TIMEOUT_MULTIPLIER", "3.0"))
+    ADAPTIVE_TIMEOUT_FLOOR: float = float(os.getenv("ADAPTIVE_TIMEOUT_FLOOR", "5.0"))
+    LATENCY_WINDOW: int = int(os.getenv("LATENCY_WINDOW", "200"))
+    LATENCY_MIN_SAMPLES: int = int(os.getenv("LATENCY_MIN_SAMPLES", "20"))
+    # Per-task timeout ceilings in seconds; unlisted tasks use REQUEST_TIMEOUT
+    TASK_TIMEOUTS: dict[str, int] = _parse_int_map(os.getenv(
+        "TASK_TIMEOUTS",
+        "feature_extraction=30,feature_extraction_batch=120,automatic_speech_recognition=120,text_generation=120,chat_completion=120,"
+        "text_to_speech=120,text_to_image=180,image_to_image=180,inpainting=180",
+    ))
     
     # Image Processing Configuration
     MAX_IMAGE_SIZE: int = int(os.getenv("MAX_IMAGE_SIZE", "10485760"))  # 10MB
@@ -53,6 +258,19 @@ class Config:
     # Audio Processing Configuration
     MAX_AUDIO_SIZE: int = int(os.getenv("MAX_AUDIO_SIZE", "52428800"))  # 50MB
     
+    # Document Processing Configuration
+    MAX_DOCUMENT_SIZE: int = int(os.getenv("MAX_DOCUMENT_SIZE", "20971520"))  # 20MB
+    MAX_CORPUS_SIZE: int = int(os.getenv("MAX_CORPUS_SIZE", "2147483648"))  # 2GB
+    
+    # Video Processing Configuration
+    MAX_VIDEO_DURATION: int = int(os.getenv("MAX_VIDEO_DURATION", "30"))  # seconds
+    MAX_VIDEO_FILE_SIZE: int = int(os.getenv("MAX_VIDEO_FILE_SIZE", "524288000"))  # 500MB
+    # Directory generated videos are also saved to while streaming (disabled if empty)
+    VIDEO_ARTIFACT_DIR: str = os.getenv("VIDEO_ARTIFACT_DIR", "")
+    
+    # Upstream payloads are relayed in chunks of this many bytes
+    STREAM_CHUNK_SIZE: int = int(os.getenv("STREAM_CHUNK_SIZE", "65536"))
+    
     # Model Configuration
     DEFAULT_TTS_MODEL: str = os.getenv("DEFAULT_TTS_MODEL", "hexgrad/Kokoro-82M")
     DEFAULT_STT_MODEL: str = os.getenv("DEFAULT_STT_MODEL", "openai/whisper-large-v3-turbo")
@@ -146,8 +364,109 @@ class Config:
             "debug": cls.DEBUG,
             "allowed_origins": cls.ALLOWED_ORIGINS,
             "log_level": cls.LOG_LEVEL,
+            "inference_endpoint": cls.HF_INFERENCE_ENDPOINT or None,
             "request_timeout": cls.REQUEST_TIMEOUT,
             "max_retries": cls.MAX_RETRIES,
+            "max_retry_after": cls.MAX_RETRY_AFTER,
+            "endpoint_deadlines": cls.ENDPOINT_DEADLINES,
+            "retry_budget": {
+                "percent": cls.RETRY_BUDGET_PERCENT,
+                "window": cls.RETRY_BUDGET_WINDOW,
+                "min_retries": cls.RETRY_BUDGET_MIN_RETRIES,
+            },
+            "http_pool": {
+                "max_connections": cls.HTTP_POOL_MAX_CONNECTIONS,
+                "max_keepalive": cls.HTTP_POOL_MAX_KEEPALIVE,
+                "keepalive_expiry": cls.HTTP_POOL_KEEPALIVE_EXPIRY,
+                "http2": cls.HTTP_POOL_HTTP2,
+                "provider_limits": cls.HTTP_POOL_PROVIDER_LIMITS,
+            },
+            "coalesce_tasks": cls.COALESCE_TASKS,
+            "hedging": {
+                "tasks": cls.HEDGE_TASKS,
+                "max_percent": cls.HEDGE_MAX_PERCENT,
+                "max_new_tokens": cls.HEDGE_MAX_NEW_TOKENS,
+            },
+            "adaptive_timeouts": {
+                "multiplier": cls.ADAPTIVE_TIMEOUT_MULTIPLIER,
+                "floor": cls.ADAPTIVE_TIMEOUT_FLOOR,
+                "task_ceilings": cls.TASK_TIMEOUTS,
+            },
+            "circuit_breaker": {
+                "failure_threshold": cls.BREAKER_FAILURE_THRESHOLD,
+                "error_rate": cls.BREAKER_ERROR_RATE,
+                "min_calls": cls.BREAKER_MIN_CALLS,
+                "window": cls.BREAKER_WINDOW,
+                "open_seconds": cls.BREAKER_OPEN_SECONDS,
+                "half_open_probes": cls.BREAKER_HALF_OPEN_PROBES,
+            },
+            "fallback": {
+                "max_models": cls.FALLBACK_MAX_MODELS,
+                "embedding_enabled": cls.EMBEDDING_FALLBACK_ENABLED,
+            },
+            "embedding_batch": {
+                "sizes": cls.EMBEDDING_BATCH_SIZES,
+                "default_size": cls.EMBEDDING_BATCH_SIZE,
+                "max_chars": cls.EMBEDDING_BATCH_MAX_CHARS,
+                "concurrency": cls.EMBEDDING_BATCH_CONCURRENCY,
+                "microbatch_enabled": cls.EMBEDDING_MICROBATCH_ENABLED,
+                "microbatch_window": cls.EMBEDDING_MICROBATCH_WINDOW,
+                "microbatch_max_size": cls.EMBEDDING_MICROBATCH_MAX_SIZE,
+            },
+            "embedding_document": {
+                "window": cls.EMBEDDING_DOCUMENT_WINDOW,
+                "overlap": cls.EMBEDDING_DOCUMENT_OVERLAP,
+                "max_size": cls.MAX_DOCUMENT_SIZE,
+            },
+            "embedding_corpus": {
+                "max_items": cls.EMBEDDING_CORPUS_MAX_ITEMS,
+                "max_pairs": cls.EMBEDDING_CORPUS_MAX_PAIRS,
+                "max_size": cls.MAX_CORPUS_SIZE,
+            },
+            "provider_routing": {
+                "model_providers": cls.MODEL_PROVIDERS,
+                "routed_tasks": cls.PROVIDER_ROUTED_TASKS,
+                "reprobe_interval": cls.PROVIDER_REPROBE_INTERVAL,
+                "discovery_enabled": cls.PROVIDER_DISCOVERY_ENABLED,
+            },
+            "rate_limits": {
+                "limits": cls.RATE_LIMITS,
+                "default": cls.RATE_LIMIT_DEFAULT,
+                "endpoint": cls.RATE_LIMIT_ENDPOINT,
+                "burst": cls.RATE_LIMIT_BURST,
+                "max_wait": cls.RATE_LIMIT_MAX_WAIT,
+            },
+            "response_cache": {
+                "ttls": cls.CACHE_TTLS,
+                "memory_max_bytes": cls.CACHE_MEMORY_MAX_BYTES,
+                "disk_max_bytes": cls.CACHE_DISK_MAX_BYTES,
+            },
+            "embedding_store": {
+                "enabled": cls.EMBEDDING_STORE_ENABLED,
+                "dtype": cls.EMBEDDING_STORE_DTYPE,
+            },
+            "embedding_projection": {
+                "matryoshka_models": cls.EMBEDDING_MATRYOSHKA_MODELS,
+                "sample": cls.EMBEDDING_PROJECTION_SAMPLE,
+                "min_rows": cls.EMBEDDING_PROJECTION_MIN_ROWS,
+            },
+            "vector_index": {
+                "ivf_threshold": cls.VECTOR_INDEX_IVF_THRESHOLD,
+                "max_lists": cls.VECTOR_INDEX_MAX_LISTS,
+                "train_sample": cls.VECTOR_INDEX_TRAIN_SAMPLE,
+                "nprobe": cls.VECTOR_INDEX_NPROBE,
+            },
+            "concurrency": {
+                "limits": cls.CONCURRENCY_LIMITS,
+                "max_queue": cls.CONCURRENCY_MAX_QUEUE,
+                "max_queue_wait": cls.CONCURRENCY_MAX_QUEUE_WAIT,
+            },
+            "video": {
+                "max_duration": cls.MAX_VIDEO_DURATION,
+                "max_file_size": cls.MAX_VIDEO_FILE_SIZE,
+                "artifacts_enabled": bool(cls.VIDEO_ARTIFACT_DIR),
+            },
+            "stream_chunk_size": cls.STREAM_CHUNK_SIZE,
             "default_models": {
                 "tts": cls.DEFAULT_TTS_MODEL,
                 "stt": cls.DEFAULT_STT_MODEL,
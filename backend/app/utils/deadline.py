@@ -0,0 +1,179 @@
+"""
+Request-scoped deadlines.
+
+This module carries each request's deadline in a context variable, so the
+retry engine, fallback chain, queues and upstream calls underneath a request
+can all see how much time is left. Work that cannot finish before the
+deadline is not started, and work still running when it passes is abandoned.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import Context, ContextVar, copy_context
+from typing import Iterator, Mapping, Optional
+
+from app.utils.config import Config
+from app.utils.exceptions import DeadlineExceededError
+
+# Absolute deadline of the current request (time.monotonic() based), if any
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+# Header carrying an absolute deadline in Unix epoch seconds
+DEADLINE_HEADER = "X-Request-Deadline"
+
+# Header carrying a relative timeout in seconds
+TIMEOUT_HEADER = "X-Request-Timeout"
+
+
+def get_deadline() -> Optional[float]:
+    """Get the current request's deadline on the time.monotonic() clock, if any."""
+    return _deadline.get()
+
+
+def remaining() -> Optional[float]:
+    """
+    Get the time left before the current request's deadline.
+
+    Returns:
+        float: Seconds left (may be negative), or None without a deadline
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check_deadline(action: str = "request") -> None:
+    """
+    Fail if the current request's deadline has passed.
+
+    Args:
+        action: What was about to start, used in the error message
+
+    Raises:
+        DeadlineExceededError: If no time is left
+    """
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceededError(f"Request deadline passed before {action} could start")
+
+
+def bound_timeout(timeout: float) -> float:
+    """
+    Clamp a timeout to the time left before the current request's deadline.
+
+    Args:
+        timeout: Timeout the operation would otherwise use
+
+    Returns:
+        float: The smaller of the timeout and the time left
+    """
+    left = remaining()
+    if left is None:
+        return timeout
+    return max(0.0, min(timeout, left))
+
+
+def can_finish_within(seconds: float) -> bool:
+    """
+    Check whether work expected to take a given time fits before the deadline.
+
+    Args:
+        seconds: Expected duration
+
+    Returns:
+        bool: True without a deadline, or if the time left exceeds the duration
+    """
+    left = remaining()
+    return left is None or left > seconds
+
+
+def context_without_deadline() -> Context:
+    """
+    Copy the current context with the request deadline cleared.
+
+    Work shared by several requests (e.g. a coalesced upstream call) runs in
+    such a context, so it is not bound by whichever request started it; each
+    request enforces its own deadline while waiting for the shared result.
+
+    Returns:
+        Context: Context to run the shared work in
+    """
+    context = copy_context()
+    context.run(_deadline.set, None)
+    return context
+
+
+@contextmanager
+def request_deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Run a block under a deadline a given number of seconds from now.
+
+    An enclosing deadline that is earlier is kept.
+
+    Args:
+        seconds: Time budget (no new deadline if None)
+    """
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def default_timeout_for(path: str) -> float:
+    """
+    Get the default time budget for an endpoint.
+
+    Uses the longest matching path prefix in Config.ENDPOINT_DEADLINES and
+    Config.REQUEST_TIMEOUT for unlisted paths.
+
+    Args:
+        path: Request path
+
+    Returns:
+        float: Seconds
+    """
+    matches = [prefix for prefix in Config.ENDPOINT_DEADLINES if path.startswith(prefix)]
+    if not matches:
+        return float(Config.REQUEST_TIMEOUT)
+    return float(Config.ENDPOINT_DEADLINES[max(matches, key=len)])
+
+
+def timeout_from_headers(headers: Mapping[str, str], path: str) -> float:
+    """
+    Get a request's time budget from its headers and the endpoint default.
+
+    Clients may shorten the budget with X-Request-Timeout (seconds) or
+    X-Request-Deadline (Unix epoch seconds) but never extend it past the
+    endpoint default. Malformed values are ignored.
+
+    Args:
+        headers: Request headers
+        path: Request path
+
+    Returns:
+        float: Seconds
+    """
+    budget = default_timeout_for(path)
+    candidates = [budget]
+    raw_timeout = headers.get(TIMEOUT_HEADER.lower()) or headers.get(TIMEOUT_HEADER)
+    raw_deadline = headers.get(DEADLINE_HEADER.lower()) or headers.get(DEADLINE_HEADER)
+    try:
+        if raw_timeout:
+            candidates.append(float(raw_timeout))
+    except ValueError:
+        pass
+    try:
+        if raw_deadline:
+            candidates.append(float(raw_deadline) - time.time())
+    except ValueError:
+        pass
+    return min(candidates)
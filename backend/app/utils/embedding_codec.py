@@ -0,0 +1,129 @@
+"""
+Compact encodings of embedding vectors.
+
+This module serializes embedding matrices straight from numpy buffers, as
+JSON float lists, base64-packed vectors inside JSON, or raw little-endian
+bytes, optionally quantized to int8 (with a scale per vector) or to one bit
+per dimension.
+"""
+
+import base64
+from typing import Any, Optional
+
+import numpy as np
+
+# Element types a client can request
+EMBEDDING_DTYPES = ("float32", "float16", "int8", "binary")
+
+# Vector encodings inside JSON responses
+ENCODING_FORMATS = ("float", "base64")
+
+# Media type of raw embedding responses
+OCTET_STREAM = "application/octet-stream"
+
+
+def quantize(matrix: np.ndarray, dtype: str) -> tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Convert float vectors to the requested element type.
+
+    int8 uses symmetric per-vector scaling (value ~= q * scale); binary keeps
+    the sign of each dimension, packed 8 dimensions per byte, most
+    significant bit first.
+
+    Args:
+        matrix: (count, dim) float matrix
+        dtype: One of EMBEDDING_DTYPES
+
+    Returns:
+        tuple: (converted matrix, float32 scale per vector for int8 else None)
+    """
+    if dtype == "float32":
+        return np.ascontiguousarray(matrix, dtype="<f4"), None
+    if dtype == "float16":
+        return np.ascontiguousarray(matrix, dtype="<f2"), None
+    if dtype == "int8":
+        scales = np.abs(matrix).max(axis=1).astype(np.float32) / 127.0
+        scales[scales == 0] = 1.0
+        values = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+        return values, scales
+    if dtype == "binary":
+        return np.packbits(matrix > 0, axis=1), None
+    raise ValueError(f"Unsupported embedding dtype '{dtype}'")
+
+
+def encode_json(matrix: np.ndarray, dtype: str, encoding_format: str) -> dict[str, Any]:
+    """
+    Encode vectors for a JSON response.
+
+    Args:
+        matrix: (count, dim) float matrix
+        dtype: One of EMBEDDING_DTYPES
+        encoding_format: 'float' for number lists, 'base64' for each vector's
+            little-endian bytes in base64
+
+    Returns:
+        dict: 'vectors' (one list or string per vector), 'dtype',
+        'encoding_format', and 'scales' for int8
+    """
+    values, scales = quantize(matrix, dtype)
+    if encoding_format == "base64":
+        vectors: list[Any] = [base64.b64encode(row.tobytes()).decode("ascii") for row in values]
+    else:
+        vectors = values.tolist()
+    encoded: dict[str, Any] = {"vectors": vectors, "dtype": dtype, "encoding_format": encoding_format}
+    if scales is not None:
+        encoded["scales"] = scales.tolist()
+    return encoded
+
+
+def encode_binary(matrix: np.ndarray, dtype: str) -> tuple[bytes, dict[str, str]]:
+    """
+    Encode vectors as a raw little-endian body.
+
+    The body is the vectors back to back; for int8 it is preceded by one
+    float32 scale per vector.
+
+    Args:
+        matrix: (count, dim) float matrix
+        dtype: One of EMBEDDING_DTYPES
+
+    Returns:
+        tuple: (body, headers describing its layout)
+    """
+    values, scales = quantize(matrix, dtype)
+    body = values.tobytes() if scales is None else scales.astype("<f4").tobytes() + values.tobytes()
+    headers = {
+        "X-Embedding-Dtype": dtype,
+        "X-Embedding-Count": str(matrix.shape[0]),
+        "X-Embedding-Dimension": str(matrix.shape[1]),
+    }
+    return body, headers
+
+
+def wants_binary(accept: Optional[str]) -> bool:
+    """
+    Check whether a client asked for a raw binary response.
+
+    Args:
+        accept: Accept header value
+
+    Returns:
+        bool: True if application/octet-stream is strictly preferred over JSON
+    """
+    if not accept:
+        return False
+    preferences = {}
+    for part in accept.split(","):
+        media_type, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    pass
+        preferences[media_type.strip().lower()] = quality
+    binary = preferences.get(OCTET_STREAM, 0.0)
+    json_quality = max(preferences.get("application/json", 0.0), preferences.get("*/*", 0.0))
+    return binary > json_quality
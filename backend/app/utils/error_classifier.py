@@ -0,0 +1,124 @@
+"""
+Classification of upstream errors.
+
+This module extracts the HTTP status, Retry-After and HuggingFace "model
+loading" estimated_time from errors raised by huggingface_hub and httpx, so
+the retry engine, circuit breakers and fallback chain can tell transient
+upstream failures from requests that would fail the same way every time.
+"""
+
+import json
+import math
+import re
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from app.utils.rate_limiter import parse_retry_after
+
+# Client errors that may succeed when sent again
+RETRYABLE_CLIENT_STATUSES = frozenset({408, 409, 425, 429})
+
+# Client errors that say something about the provider's health (timeouts, throttling)
+PROVIDER_CLIENT_STATUSES = frozenset({408, 429})
+
+_ESTIMATED_TIME_PATTERN = re.compile(r'"?estimated_time"?\s*[:=]\s*([0-9]+(?:\.[0-9]+)?)')
+_STATUS_PATTERN = re.compile(r"\b([45][0-9]{2}) (?:Client|Server) Error\b")
+
+
+@dataclass(frozen=True)
+class UpstreamErrorInfo:
+    """What an upstream error says about retrying the call."""
+
+    status: Optional[int] = None
+    retry_after: Optional[float] = None
+    estimated_time: Optional[float] = None
+
+    @property
+    def retryable(self) -> bool:
+        """Whether sending the same request again may succeed."""
+        return self.status is None or self.status >= 500 or self.status in RETRYABLE_CLIENT_STATUSES
+
+    @property
+    def provider_failure(self) -> bool:
+        """Whether the error reflects the provider's health rather than the request."""
+        return self.status is None or self.status >= 500 or self.status in PROVIDER_CLIENT_STATUSES
+
+    @property
+    def delay_hint(self) -> Optional[float]:
+        """Seconds the upstream asked us to wait, if it said."""
+        hints = [hint for hint in (self.retry_after, self.estimated_time) if hint is not None]
+        return max(hints) if hints else None
+
+    def to_details(self) -> dict[str, Any]:
+        """
+        Get the error fields to merge into an AIServiceException's details.
+
+        Returns:
+            dict: upstream_status, plus retry_after (whole seconds) when the
+                upstream gave a delay hint, which is sent as Retry-After
+        """
+        details: dict[str, Any] = {"upstream_status": self.status}
+        if self.estimated_time is not None:
+            details["estimated_time"] = self.estimated_time
+        if self.delay_hint is not None:
+            details["retry_after"] = max(1, math.ceil(self.delay_hint))
+        return details
+
+
+def _response_body(response: Any) -> Optional[Any]:
+    """Decode a response's JSON body without failing on unread or non-JSON bodies."""
+    try:
+        return response.json()
+    except Exception:
+        pass
+    try:
+        return json.loads(response.content)
+    except Exception:
+        return None
+
+
+def classify_upstream_error(exception: BaseException) -> UpstreamErrorInfo:
+    """
+    Extract status and delay hints from an upstream error.
+
+    Handles huggingface_hub HTTP errors and httpx/requests status errors (via
+    their response), and AIServiceExceptions already carrying
+    'upstream_status' in their details.
+
+    Args:
+        exception: The error raised by the upstream call
+
+    Returns:
+        UpstreamErrorInfo: Status (None if unknown), Retry-After and estimated_time
+    """
+    details = getattr(exception, "details", None)
+    if isinstance(details, dict) and "upstream_status" in details:
+        return UpstreamErrorInfo(
+            status=details.get("upstream_status"),
+            retry_after=details.get("retry_after"),
+            estimated_time=details.get("estimated_time"),
+        )
+
+    response = getattr(exception, "response", None)
+    status = getattr(response, "status_code", None)
+    retry_after = None
+    estimated_time = None
+
+    if response is not None:
+        headers = getattr(response, "headers", None) or {}
+        retry_after = parse_retry_after(headers.get("retry-after"))
+        body = _response_body(response)
+        if isinstance(body, dict) and isinstance(body.get("estimated_time"), (int, float)):
+            estimated_time = float(body["estimated_time"])
+
+    message = str(exception)
+    if status is None:
+        match = _STATUS_PATTERN.search(message)
+        if match:
+            status = int(match.group(1))
+    if estimated_time is None:
+        match = _ESTIMATED_TIME_PATTERN.search(message)
+        if match:
+            estimated_time = float(match.group(1))
+
+    return UpstreamErrorInfo(status=status, retry_after=retry_after, estimated_time=estimated_time)
@@ -32,6 +32,14 @@ class AIServiceException(Exception):
         self.status_code = status_code
         self.details = details or {}
         super().__init__(self.message)
+    
+    @property
+    def headers(self) -> Optional[dict[str, str]]:
+        """HTTP headers to send with the error response (e.g. Retry-After)."""
+        retry_after = self.details.get("retry_after")
+        if retry_after is None:
+            return None
+        return {"Retry-After": str(retry_after)}
 
 
 class ValidationError(AIServiceException):
@@ -58,6 +66,18 @@ class ModelNotFoundError(AIServiceException):
         )
 
 
+class CollectionNotFoundError(AIServiceException):
+    """Raised when a vector collection does not exist."""
+    
+    def __init__(self, collection: str):
+        super().__init__(
+            message=f"Collection '{collection}' not found",
+            error_code="collection_not_found",
+            status_code=404,
+            details={"collection": collection}
+        )
+
+
 class HuggingFaceAPIError(AIServiceException):
     """Raised when HuggingFace API returns an error."""
     
@@ -106,6 +126,41 @@ class RateLimitError(AIServiceException):
         )
 
 
+class DeadlineExceededError(AIServiceException):
+    """Raised when a request runs out of time before its work can finish."""
+    
+    def __init__(self, message: str):
+        super().__init__(
+            message=message,
+            error_code="deadline_exceeded",
+            status_code=504,
+        )
+
+
+class ServiceUnavailableError(AIServiceException):
+    """Raised when the service is temporarily overloaded and sheds load."""
+    
+    def __init__(self, message: str, retry_after: Optional[int] = None):
+        super().__init__(
+            message=message,
+            error_code="service_unavailable",
+            status_code=503,
+            details={"retry_after": retry_after}
+        )
+
+
+class CircuitOpenError(ServiceUnavailableError):
+    """Raised when a model's circuit breaker is open and calls fail fast."""
+    
+    def __init__(self, model_name: str, provider: Optional[str], retry_after: Optional[int] = None):
+        super().__init__(
+            message=f"Model '{model_name}' is temporarily unavailable (circuit open)",
+            retry_after=retry_after,
+        )
+        self.error_code = "circuit_open"
+        self.details.update({"model": model_name, "provider": provider})
+
+
 class FileSizeError(AIServiceException):
     """Raised when a file exceeds size limits."""
     
@@ -0,0 +1,149 @@
+"""
+Hedged requests for latency-sensitive tasks.
+
+When a primary call has not returned by its usual (p95) latency, a second
+"hedge" call is fired and whichever finishes first wins; the loser is
+cancelled. Hedges are paid for from a budget that grows with primary
+traffic, which caps the extra upstream load at a fixed percentage.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from app.utils.config import Config
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# Maximum number of hedges that can be banked during quiet periods
+HEDGE_BUDGET_CAP = 10.0
+
+
+def _failed(task: "asyncio.Future[Any]") -> bool:
+    """Whether a finished call was cancelled or raised."""
+    return task.cancelled() or task.exception() is not None
+
+
+class HedgingPolicy:
+    """
+    Hedge budget and per-task hedging metrics.
+
+    Every primary call earns Config.HEDGE_MAX_PERCENT / 100 hedge tokens and
+    every hedge spends one, so hedges never exceed that share of traffic.
+    """
+
+    def __init__(self, max_percent: Optional[float] = None):
+        """
+        Initialize the policy.
+
+        Args:
+            max_percent: Maximum hedges as a percentage of primary calls
+        """
+        self.max_percent = max_percent if max_percent is not None else Config.HEDGE_MAX_PERCENT
+        self._tokens = 1.0
+        self._stats: dict[str, dict[str, int]] = {}
+
+    def _count(self, task: str, counter: str) -> None:
+        counters = self._stats.setdefault(
+            task,
+            {"primary_calls": 0, "hedges": 0, "hedge_wins": 0, "primary_wins": 0, "budget_denied": 0},
+        )
+        counters[counter] += 1
+
+    def _try_spend(self) -> bool:
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
+
+    async def run(
+        self,
+        task: str,
+        delay: Optional[float],
+        primary: Callable[[], Awaitable[T]],
+        hedge: Callable[[], Awaitable[T]],
+    ) -> T:
+        """
+        Run a call, hedging it if it is slower than the given delay.
+
+        Args:
+            task: Inference task name used for metrics
+            delay: Seconds to wait before hedging (no hedging if None)
+            primary: Coroutine factory for the primary call
+            hedge: Coroutine factory for the hedge call
+
+        Returns:
+            The result of whichever call succeeds first
+        """
+        self._count(task, "primary_calls")
+        self._tokens = min(HEDGE_BUDGET_CAP, self._tokens + self.max_percent / 100)
+
+        primary_task = asyncio.ensure_future(primary())
+        if delay is None:
+            return await primary_task
+
+        pending = {primary_task}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary_task.result()
+
+            if not self._try_spend():
+                self._count(task, "budget_denied")
+                return await asyncio.shield(primary_task)
+
+            self._count(task, "hedges")
+            logger.debug(f"Hedging {task} after {delay:.3f}s")
+            hedge_task = asyncio.ensure_future(hedge())
+            pending.add(hedge_task)
+            errors: list[BaseException] = []
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for finished in sorted(done, key=_failed):
+                    if not _failed(finished):
+                        self._count(task, "hedge_wins" if finished is hedge_task else "primary_wins")
+                        return finished.result()
+                    # A failed call only loses if the other one can still succeed
+                    if not finished.cancelled():
+                        errors.append(finished.exception())
+            if errors:
+                # Prefer a real error over the other call having been cancelled
+                raise errors[-1]
+            raise asyncio.CancelledError()
+        finally:
+            # Cancel the losing call, or both calls if the caller went away
+            for unfinished in pending:
+                if not unfinished.done():
+                    unfinished.cancel()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get hedging metrics.
+
+        Returns:
+            dict: Remaining budget and per-task primary/hedge/win counters
+        """
+        return {
+            "max_percent": self.max_percent,
+            "budget": round(self._tokens, 3),
+            "tasks": {task: dict(counters) for task, counters in self._stats.items()},
+        }
+
+
+# Global policy instance
+_hedging_policy: Optional[HedgingPolicy] = None
+
+
+def get_hedging_policy() -> HedgingPolicy:
+    """
+    Get or create the global hedging policy.
+
+    Returns:
+        HedgingPolicy: The global policy instance
+    """
+    global _hedging_policy
+    if _hedging_policy is None:
+        _hedging_policy = HedgingPolicy()
+    return _hedging_policy
@@ -0,0 +1,135 @@
+"""
+Rolling latency tracking and adaptive timeouts.
+
+This module records recent upstream latencies per (task, model) and
+derives timeouts from them, so a fast task such as feature extraction
+gives up on a hung call long before the global request timeout.
+"""
+
+import math
+from collections import deque
+from typing import Any, Optional
+
+from app.utils.config import Config
+
+
+class LatencyTracker:
+    """
+    Rolling window of observed latencies per (task, model).
+
+    Timeouts are p99 x Config.ADAPTIVE_TIMEOUT_MULTIPLIER, clamped between
+    Config.ADAPTIVE_TIMEOUT_FLOOR and the task's ceiling from
+    Config.TASK_TIMEOUTS (Config.REQUEST_TIMEOUT for unlisted tasks).
+    """
+
+    def __init__(self, window: Optional[int] = None):
+        """
+        Initialize the tracker.
+
+        Args:
+            window: Number of recent samples kept per key
+        """
+        self.window = window or Config.LATENCY_WINDOW
+        self._samples: dict[tuple[str, str], deque[float]] = {}
+
+    def record(self, task: str, model: str, seconds: float) -> None:
+        """
+        Record the latency of a call.
+
+        Timed-out calls should be recorded with the timeout they hit, so the
+        learned timeout can grow again when a model slows down.
+
+        Args:
+            task: Inference task name
+            model: Model ID
+            seconds: Observed latency in seconds
+        """
+        samples = self._samples.get((task, model))
+        if samples is None:
+            samples = self._samples[(task, model)] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def percentile(self, task: str, model: str, q: float) -> Optional[float]:
+        """
+        Get a latency percentile for a (task, model).
+
+        Args:
+            task: Inference task name
+            model: Model ID
+            q: Percentile between 0 and 100
+
+        Returns:
+            float: Latency in seconds, or None if there are too few samples
+        """
+        samples = self._samples.get((task, model))
+        if not samples or len(samples) < Config.LATENCY_MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    @staticmethod
+    def ceiling_for(task: str) -> float:
+        """
+        Get the maximum timeout allowed for a task.
+
+        Args:
+            task: Inference task name
+
+        Returns:
+            float: Timeout ceiling in seconds
+        """
+        return float(Config.TASK_TIMEOUTS.get(task, Config.REQUEST_TIMEOUT))
+
+    def timeout_for(self, task: str, model: str) -> float:
+        """
+        Get the timeout to apply to the next call for a (task, model).
+
+        Args:
+            task: Inference task name
+            model: Model ID
+
+        Returns:
+            float: Timeout in seconds
+        """
+        ceiling = self.ceiling_for(task)
+        p99 = self.percentile(task, model, 99)
+        if p99 is None:
+            return ceiling
+        floor = min(Config.ADAPTIVE_TIMEOUT_FLOOR, ceiling)
+        return min(ceiling, max(floor, p99 * Config.ADAPTIVE_TIMEOUT_MULTIPLIER))
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get latency percentiles and derived timeouts per (task, model).
+
+        Returns:
+            dict: Per-task, per-model sample count, p50/p95/p99 and timeout
+        """
+        result: dict[str, dict[str, Any]] = {}
+        for (task, model), samples in self._samples.items():
+            result.setdefault(task, {})[model] = {
+                "samples": len(samples),
+                "p50": self.percentile(task, model, 50),
+                "p95": self.percentile(task, model, 95),
+                "p99": self.percentile(task, model, 99),
+                "timeout": self.timeout_for(task, model),
+            }
+        return result
+
+
+# Global tracker instance
+_latency_tracker: Optional[LatencyTracker] = None
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """
+    Get or create the global latency tracker.
+
+    Returns:
+        LatencyTracker: The global tracker instance
+    """
+    global _latency_tracker
+    if _latency_tracker is None:
+        _latency_tracker = LatencyTracker()
+    return _latency_tracker
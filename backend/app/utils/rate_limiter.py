@@ -0,0 +1,364 @@
+"""
+Outbound rate limiting shared across worker processes.
+
+This module paces upstream calls with a token bucket per (API token,
+provider). Bucket state lives in a SQLite file so every uvicorn/gunicorn
+worker on a node draws from the same budget. Calls over budget reserve the
+next free slot and sleep until it instead of failing, and an upstream 429
+pushes the whole bucket back so all workers pause together.
+
+Buckets use the generic cell rate algorithm: each key stores only its
+theoretical arrival time (TAT), which makes an acquire a single-row
+read-modify-write.
+"""
+
+import asyncio
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Optional
+
+from app.utils.config import Config
+from app.utils.deadline import bound_timeout
+from app.utils.exceptions import DeadlineExceededError, RateLimitError
+from app.utils.logging import get_logger
+from app.utils.metrics import Histogram
+
+logger = get_logger(__name__)
+
+# Bucket name used for calls without an explicit provider
+DEFAULT_BUCKET_PROVIDER = "auto"
+
+# Bucket name used for every call when Config.HF_INFERENCE_ENDPOINT is set
+ENDPOINT_BUCKET = "endpoint"
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header value.
+
+    Args:
+        value: Header value, in seconds or as an HTTP date
+
+    Returns:
+        float: Seconds to wait, or None if the value is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _MemoryBucketStore:
+    """Per-process bucket state, used when the shared file is unavailable."""
+
+    shared = False
+
+    def __init__(self):
+        self._tat: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, key: str, interval: float, tolerance: float, max_wait: float) -> float:
+        with self._lock:
+            now = time.time()
+            tat = max(self._tat.get(key, now), now)
+            wait = max(0.0, tat - tolerance - now)
+            if wait > max_wait:
+                return -wait
+            self._tat[key] = tat + interval
+            return wait
+
+    def penalize(self, key: str, seconds: float, tolerance: float) -> None:
+        with self._lock:
+            self._tat[key] = max(self._tat.get(key, 0.0), time.time() + seconds + tolerance)
+
+    def tat(self, key: str) -> Optional[float]:
+        return self._tat.get(key)
+
+
+class _SQLiteBucketStore:
+    """Bucket state in a SQLite file shared by every process on the node."""
+
+    shared = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        # Fail early (e.g. read-only disk) so the caller can fall back
+        self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections must not be shared with forked worker processes
+        if self._connection is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def _update(self, key: str, compute) -> Any:
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute("SELECT tat FROM buckets WHERE key = ?", (key,)).fetchone()
+                result, new_tat = compute(row[0] if row else None, time.time())
+                if new_tat is not None:
+                    connection.execute(
+                        "INSERT INTO buckets (key, tat) VALUES (?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                        (key, new_tat),
+                    )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            return result
+
+    def reserve(self, key: str, interval: float, tolerance: float, max_wait: float) -> float:
+        def compute(stored: Optional[float], now: float) -> tuple[float, Optional[float]]:
+            tat = max(stored if stored is not None else now, now)
+            wait = max(0.0, tat - tolerance - now)
+            if wait > max_wait:
+                return -wait, None
+            return wait, tat + interval
+
+        return self._update(key, compute)
+
+    def penalize(self, key: str, seconds: float, tolerance: float) -> None:
+        def compute(stored: Optional[float], now: float) -> tuple[None, float]:
+            return None, max(stored or 0.0, now + seconds + tolerance)
+
+        self._update(key, compute)
+
+    def tat(self, key: str) -> Optional[float]:
+        with self._lock:
+            row = self._connect().execute("SELECT tat FROM buckets WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+
+class _BucketStats:
+    """Per-process counters for one bucket."""
+
+    def __init__(self):
+        self.acquired = 0
+        self.delayed = 0
+        self.rejected = 0
+        self.penalties = 0
+        self.wait_time = Histogram()
+
+
+class OutboundRateLimiter:
+    """
+    Token buckets per (API token, provider) shared across processes.
+
+    Rates come from Config.RATE_LIMITS (requests per minute per provider),
+    with Config.RATE_LIMIT_DEFAULT for unlisted providers; a rate of 0 leaves
+    the provider unlimited. With Config.HF_INFERENCE_ENDPOINT set, all calls
+    share one bucket limited by Config.RATE_LIMIT_ENDPOINT instead. Each bucket
+    holds up to Config.RATE_LIMIT_BURST calls.
+    """
+
+    def __init__(self, token: str = Config.HF_API_KEY, path: Optional[str] = None):
+        """
+        Initialize the limiter.
+
+        Args:
+            token: API token the buckets belong to (only a hash is stored)
+            path: SQLite file holding the shared bucket state
+        """
+        self.token_id = hashlib.sha256(token.encode()).hexdigest()[:16]
+        self.path = path or Config.RATE_LIMIT_DB
+        try:
+            self._store = _SQLiteBucketStore(self.path)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(
+                f"Shared rate limit state unavailable at {self.path} ({str(e)}); "
+                "limiting per process instead"
+            )
+            self._store = _MemoryBucketStore()
+        self._stats: dict[str, _BucketStats] = {}
+
+    @staticmethod
+    def bucket_for(provider: Optional[str]) -> str:
+        """
+        Get the bucket a provider's calls are counted in.
+
+        Args:
+            provider: Provider name (or bucket name), if any
+
+        Returns:
+            str: Bucket name
+        """
+        if Config.HF_INFERENCE_ENDPOINT:
+            # Every call goes to the configured endpoint, whatever its provider
+            return ENDPOINT_BUCKET
+        return provider or DEFAULT_BUCKET_PROVIDER
+
+    @classmethod
+    def rate_for(cls, provider: Optional[str]) -> int:
+        """
+        Get the configured rate for a provider.
+
+        Args:
+            provider: Provider name (or bucket name), if any
+
+        Returns:
+            int: Requests per minute (0 means unlimited)
+        """
+        bucket = cls.bucket_for(provider)
+        if bucket == ENDPOINT_BUCKET:
+            return Config.RATE_LIMIT_ENDPOINT
+        return Config.RATE_LIMITS.get(bucket, Config.RATE_LIMIT_DEFAULT)
+
+    def _key(self, provider: Optional[str]) -> str:
+        return f"{self.token_id}:{self.bucket_for(provider)}"
+
+    @staticmethod
+    def _shape(rate: int) -> tuple[float, float]:
+        interval = 60.0 / rate
+        return interval, interval * (max(1, Config.RATE_LIMIT_BURST) - 1)
+
+    def _bucket_stats(self, provider: Optional[str]) -> _BucketStats:
+        name = self.bucket_for(provider)
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = _BucketStats()
+        return stats
+
+    async def acquire(self, provider: Optional[str]) -> None:
+        """
+        Wait until a call to a provider fits the shared budget.
+
+        Args:
+            provider: Provider name, if any
+
+        Raises:
+            RateLimitError: If the next free slot is further away than
+                Config.RATE_LIMIT_MAX_WAIT
+            DeadlineExceededError: If it is beyond the request deadline
+        """
+        rate = self.rate_for(provider)
+        if rate <= 0:
+            return
+        interval, tolerance = self._shape(rate)
+        stats = self._bucket_stats(provider)
+        # Never reserve a slot the request would not live to use
+        max_wait = bound_timeout(Config.RATE_LIMIT_MAX_WAIT)
+        try:
+            wait = await asyncio.to_thread(
+                self._store.reserve, self._key(provider), interval, tolerance, max_wait
+            )
+        except sqlite3.Error as e:
+            # Never fail a call because the limiter's bookkeeping failed
+            logger.warning(f"Rate limit state update failed: {str(e)}")
+            return
+
+        if wait < 0:
+            stats.rejected += 1
+            if -wait <= Config.RATE_LIMIT_MAX_WAIT:
+                raise DeadlineExceededError(
+                    f"No '{self.bucket_for(provider)}' rate limit slot before the request deadline"
+                )
+            raise RateLimitError(
+                f"Outbound rate limit for '{self.bucket_for(provider)}' exceeded",
+                retry_after=math.ceil(-wait),
+            )
+        stats.acquired += 1
+        stats.wait_time.observe(wait)
+        if wait > 0:
+            stats.delayed += 1
+            await asyncio.sleep(wait)
+
+    async def penalize(self, provider: Optional[str], seconds: Optional[float] = None) -> None:
+        """
+        Pause a provider's bucket for every worker after an upstream 429.
+
+        Args:
+            provider: Provider name, if any
+            seconds: Pause length (the upstream Retry-After), defaults to
+                one interval of the configured rate
+        """
+        rate = self.rate_for(provider)
+        if rate <= 0:
+            return
+        interval, tolerance = self._shape(rate)
+        pause = seconds if seconds is not None else interval
+        self._bucket_stats(provider).penalties += 1
+        logger.warning(f"Upstream throttled '{self.bucket_for(provider)}', pausing for {pause:.1f}s")
+        try:
+            await asyncio.to_thread(self._store.penalize, self._key(provider), pause, tolerance)
+        except sqlite3.Error as e:
+            logger.warning(f"Rate limit state update failed: {str(e)}")
+
+    async def stats(self) -> dict[str, Any]:
+        """
+        Get rate limiter statistics.
+
+        Counters are per process; the backlog (seconds until the next free
+        slot) reflects the shared state and is read off the event loop.
+
+        Returns:
+            dict: Backend, configured rates, and per-provider counters
+        """
+        providers = {}
+        for name, stats in list(self._stats.items()):
+            rate = self.rate_for(name)
+            backlog = None
+            if rate > 0:
+                _, tolerance = self._shape(rate)
+                try:
+                    tat = await asyncio.to_thread(self._store.tat, self._key(name))
+                except sqlite3.Error:
+                    tat = None
+                backlog = round(max(0.0, tat - tolerance - time.time()), 3) if tat is not None else 0.0
+            providers[name] = {
+                "rate_per_minute": rate,
+                "acquired": stats.acquired,
+                "delayed": stats.delayed,
+                "rejected": stats.rejected,
+                "penalties": stats.penalties,
+                "backlog_seconds": backlog,
+                "wait_time": stats.wait_time.snapshot(),
+            }
+        return {
+            "shared": self._store.shared,
+            "path": self.path if self._store.shared else None,
+            "burst": Config.RATE_LIMIT_BURST,
+            "max_wait": Config.RATE_LIMIT_MAX_WAIT,
+            "providers": providers,
+        }
+
+
+# Global limiter instance
+_rate_limiter: Optional[OutboundRateLimiter] = None
+
+
+def get_rate_limiter() -> OutboundRateLimiter:
+    """
+    Get or create the global outbound rate limiter.
+
+    Returns:
+        OutboundRateLimiter: The global limiter instance
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = OutboundRateLimiter()
+    return _rate_limiter
@@ -0,0 +1,499 @@
+"""
+Content-addressed cache for deterministic inference responses.
+
+This module caches the results of deterministic upstream calls (embeddings,
+transcriptions, seeded images, greedy text generation) keyed by a SHA-256
+of the task, model, normalized parameters and input bytes. Lookups go
+through a byte-bounded in-memory LRU tier, then a size-bounded disk tier
+shared by every worker on the node. Entries expire after a per-task TTL,
+and clients can bypass the cache with Cache-Control: no-cache / no-store.
+"""
+
+import asyncio
+import inspect
+from abc import ABC, abstractmethod
+import json
+import os
+import struct
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Awaitable, Callable, Iterator, Mapping, Optional, TypeVar
+
+from app.utils.coalescing import request_fingerprint
+from app.utils.config import Config
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# Cache-Control directives of the current request
+_skip_lookup: ContextVar[bool] = ContextVar("cache_skip_lookup", default=False)
+_skip_store: ContextVar[bool] = ContextVar("cache_skip_store", default=False)
+
+# Disk entry header: expiry time (Unix time, float64)
+_EXPIRY = struct.Struct("<d")
+
+# Encoded value kinds (first byte of an encoded value)
+_KIND_BYTES = b"B"
+_KIND_JSON = b"J"
+
+
+def _encode(value: Any) -> bytes:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return _KIND_BYTES + bytes(value)
+    return _KIND_JSON + json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def _decode(data: bytes) -> Any:
+    kind, body = data[:1], data[1:]
+    if kind == _KIND_BYTES:
+        return body
+    return json.loads(body)
+
+
+class CacheTier(ABC):
+    """
+    Interface of a cache storage tier.
+
+    Tiers store encoded values with an absolute expiry time and are
+    responsible for their own size bound and eviction.
+    """
+
+    name = "tier"
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[tuple[bytes, float]]:
+        """Get an encoded value and its expiry time, or None if missing or expired."""
+
+    @abstractmethod
+    async def set(self, key: str, data: bytes, expires_at: float) -> None:
+        """Store an encoded value until the given Unix time."""
+
+    @abstractmethod
+    def stats(self) -> dict[str, Any]:
+        """Get the tier's size and eviction counters."""
+
+
+class MemoryTier(CacheTier):
+    """In-process LRU tier bounded by the total size of its values."""
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int):
+        """
+        Initialize the tier.
+
+        Args:
+            max_bytes: Maximum total size of cached values
+        """
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove(self, key: str) -> None:
+        _, data = self._entries.pop(key)
+        self._bytes -= len(data)
+
+    async def get(self, key: str) -> Optional[tuple[bytes, float]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, data = entry
+        if expires_at <= time.time():
+            self._remove(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return data, expires_at
+
+    async def set(self, key: str, data: bytes, expires_at: float) -> None:
+        if len(data) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (expires_at, data)
+        self._bytes += len(data)
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class DiskTier(CacheTier):
+    """
+    File-per-entry tier in a directory shared by every worker on the node.
+
+    Entries are written atomically (temp file, then rename) and their mtime
+    is refreshed on every hit, so eviction removes the least recently used
+    files until the directory is back under its size bound.
+    """
+
+    name = "disk"
+
+    # Eviction brings the directory down to this share of the bound
+    EVICTION_TARGET = 0.9
+
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Initialize the tier.
+
+        Args:
+            directory: Cache directory
+            max_bytes: Maximum total size of the cache files
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        # Scanned on the first write (in a worker thread), not on the event loop
+        self._bytes: Optional[int] = None
+        self.evictions = 0
+        self.expirations = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _read(self, key: str) -> Optional[tuple[bytes, float]]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except OSError:
+            return None
+        if len(data) <= _EXPIRY.size:
+            return None
+        (expires_at,) = _EXPIRY.unpack_from(data)
+        if expires_at <= time.time():
+            self._unlink(path, len(data))
+            self.expirations += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data[_EXPIRY.size:], expires_at
+
+    def _unlink(self, path: str, size: int) -> None:
+        try:
+            os.remove(path)
+            if self._bytes is not None:
+                self._bytes -= size
+        except OSError:
+            pass
+
+    def _write(self, key: str, data: bytes, expires_at: float) -> None:
+        if self._bytes is None:
+            self._bytes = self._scan_size()
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        # Unique per write: threads of one process may write the same key at once
+        temp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(_EXPIRY.pack(expires_at))
+            file.write(data)
+        os.replace(temp_path, path)
+        self._bytes += _EXPIRY.size + len(data) - replaced
+        if self._bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        # Rescan, since other workers write to the same directory
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * self.EVICTION_TARGET
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        self._bytes = total
+
+    async def get(self, key: str) -> Optional[tuple[bytes, float]]:
+        return await asyncio.to_thread(self._read, key)
+
+    async def set(self, key: str, data: bytes, expires_at: float) -> None:
+        if _EXPIRY.size + len(data) > self.max_bytes:
+            return
+        await asyncio.to_thread(self._write, key, data, expires_at)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "directory": self.directory,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class ResponseCache:
+    """
+    Tiered cache of upstream responses.
+
+    Tiers are consulted in order; a hit in a lower tier is copied into the
+    tiers above it with the expiry it has in the lower tier. Only tasks with a TTL in Config.CACHE_TTLS are cached.
+    """
+
+    def __init__(self, tiers: list[CacheTier]):
+        """
+        Initialize the cache.
+
+        Args:
+            tiers: Storage tiers, fastest first
+        """
+        self.tiers = tiers
+        self._stats: dict[str, dict[str, int]] = {}
+
+    @staticmethod
+    def ttl_for(task: str) -> int:
+        """
+        Get the time-to-live of a task's entries.
+
+        Args:
+            task: Inference task name
+
+        Returns:
+            int: Seconds (0 means the task is not cached)
+        """
+        return Config.CACHE_TTLS.get(task, 0)
+
+    def _count(self, task: str, counter: str) -> None:
+        counters = self._stats.setdefault(
+            task, {"hits": 0, "misses": 0, "bypassed": 0, "stores": 0, "errors": 0}
+        )
+        counters[counter] = counters.get(counter, 0) + 1
+
+    async def get(self, task: str, key: str) -> tuple[bool, Any]:
+        """
+        Look up a response.
+
+        Args:
+            task: Inference task name
+            key: Request fingerprint
+
+        Returns:
+            tuple: (hit, cached value)
+        """
+        if not cache_lookup_allowed():
+            self._count(task, "bypassed")
+            return False, None
+        for index, tier in enumerate(self.tiers):
+            try:
+                entry = await tier.get(key)
+            except Exception as e:
+                self._count(task, "errors")
+                logger.warning(f"Response cache {tier.name} read failed: {str(e)}")
+                continue
+            if entry is None:
+                continue
+            data, expires_at = entry
+            self._count(task, "hits")
+            self._count(task, f"{tier.name}_hits")
+            # Promotion keeps the entry's remaining lifetime rather than renewing it
+            for upper in self.tiers[:index]:
+                await upper.set(key, data, expires_at)
+            return True, _decode(data)
+        self._count(task, "misses")
+        return False, None
+
+    async def set(self, task: str, key: str, value: Any) -> None:
+        """
+        Store a response in every tier.
+
+        Args:
+            task: Inference task name
+            key: Request fingerprint
+            value: Response (bytes or JSON-serializable)
+        """
+        if not cache_store_allowed():
+            return
+        try:
+            data = _encode(value)
+        except (TypeError, ValueError) as e:
+            self._count(task, "errors")
+            logger.warning(f"Response cache cannot store {task} result: {str(e)}")
+            return
+        expires_at = time.time() + self.ttl_for(task)
+        for tier in self.tiers:
+            try:
+                await tier.set(key, data, expires_at)
+            except Exception as e:
+                self._count(task, "errors")
+                logger.warning(f"Response cache {tier.name} write failed: {str(e)}")
+        self._count(task, "stores")
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            dict: Per-task hit/miss/bypass counters and hit rate, and per-tier
+            size and eviction counters
+        """
+        tasks = {}
+        for task, counters in self._stats.items():
+            lookups = counters["hits"] + counters["misses"]
+            tasks[task] = {
+                **counters,
+                "hit_rate": round(counters["hits"] / lookups, 3) if lookups else None,
+                "ttl": self.ttl_for(task),
+            }
+        return {
+            "tasks": tasks,
+            "tiers": {tier.name: tier.stats() for tier in self.tiers},
+        }
+
+
+def _build_tiers() -> list[CacheTier]:
+    tiers: list[CacheTier] = []
+    if Config.CACHE_MEMORY_MAX_BYTES > 0:
+        tiers.append(MemoryTier(Config.CACHE_MEMORY_MAX_BYTES))
+    if Config.CACHE_DISK_MAX_BYTES > 0 and Config.CACHE_DIR:
+        try:
+            tiers.append(DiskTier(Config.CACHE_DIR, Config.CACHE_DISK_MAX_BYTES))
+        except OSError as e:
+            logger.warning(f"Disk response cache unavailable at {Config.CACHE_DIR}: {str(e)}")
+    return tiers
+
+
+# Global cache instance
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Get or create the global response cache.
+
+    Returns:
+        ResponseCache: The global cache instance
+    """
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache(_build_tiers())
+    return _response_cache
+
+
+def cache_lookup_allowed() -> bool:
+    """Whether the current request allows serving cached responses."""
+    return not _skip_lookup.get()
+
+
+def cache_store_allowed() -> bool:
+    """Whether the current request allows storing its responses."""
+    return not _skip_store.get()
+
+
+@contextmanager
+def cache_control(headers: Mapping[str, str]) -> Iterator[None]:
+    """
+    Apply a request's Cache-Control directives to the calls made within.
+
+    'no-cache' skips lookups but stores the fresh response; 'no-store'
+    skips both.
+
+    Args:
+        headers: Request headers
+    """
+    directives = {
+        part.strip().lower()
+        for part in (headers.get("cache-control") or "").split(",")
+    }
+    no_store = "no-store" in directives
+    lookup_token = _skip_lookup.set(no_store or "no-cache" in directives)
+    store_token = _skip_store.set(no_store)
+    try:
+        yield
+    finally:
+        _skip_lookup.reset(lookup_token)
+        _skip_store.reset(store_token)
+
+
+def cached(
+    task: str,
+    payload: str,
+    when: Optional[Callable[[dict[str, Any]], bool]] = None,
+) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """
+    Decorator that serves a client method's results from the response cache.
+
+    The key is built like the coalescing key: task, the 'model' argument, the
+    payload argument and every other argument of the call. Caching only
+    applies when the task has a TTL in Config.CACHE_TTLS.
+
+    Args:
+        task: Inference task name
+        payload: Name of the argument holding the main input
+        when: Optional predicate on the call arguments; calls for which it
+            returns False (e.g. unseeded or sampled generation) are never cached
+
+    Returns:
+        Callable: Decorated async method
+    """
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            cache = get_response_cache()
+            if cache.ttl_for(task) <= 0 or not cache.tiers:
+                return await func(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = {name: value for name, value in bound.arguments.items() if name != "self"}
+            if when is not None and not when(params):
+                return await func(*args, **kwargs)
+
+            model = params.pop("model", None)
+            body = params.pop(payload, None)
+            key = request_fingerprint(task, model, params, body)
+
+            hit, value = await cache.get(task, key)
+            if hit:
+                logger.debug(f"Response cache hit for {task} {key[:12]}")
+                return value
+            result = await func(*args, **kwargs)
+            await cache.set(task, key, result)
+            return result
+
+        return wrapper
+
+    return decorator
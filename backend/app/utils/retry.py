@@ -2,15 +2,32 @@
 Retry logic with exponential backoff for API calls.
 
 This module provides decorators and utilities for implementing
-robust retry mechanisms with exponential backoff.
+robust retry mechanisms with exponential backoff. Delays use decorrelated
+jitter, and upstream Retry-After / "model loading" estimated_time hints
+are honored when present. All retries draw from a process-wide budget so
+a provider brownout does not multiply upstream load.
 """
 
 import asyncio
+import math
+import random
+import threading
 import time
+from collections import deque
 from functools import wraps
 from typing import Any, Callable, Optional, TypeVar
 
 from app.utils.config import Config
+from app.utils.deadline import can_finish_within
+from app.utils.error_classifier import classify_upstream_error
+from app.utils.exceptions import (
+    AIServiceException,
+    DeadlineExceededError,
+    FileSizeError,
+    RateLimitError,
+    ServiceUnavailableError,
+    TimeoutError,
+)
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -28,10 +45,35 @@ def should_retry(exception: Exception) -> bool:
     Returns:
         bool: True if the exception is retryable, False otherwise
     """
+    # Don't retry requests rejected by local load shedding or an open circuit
+    if isinstance(exception, (RateLimitError, ServiceUnavailableError)):
+        return False
+    
+    # The request has run out of time
+    if isinstance(exception, DeadlineExceededError):
+        return False
+    
+    # An oversized upstream payload would be just as large on the next attempt
+    if isinstance(exception, FileSizeError):
+        return False
+    
+    # Don't retry a call whose failure just opened the model's circuit breaker
+    if isinstance(exception, AIServiceException) and exception.details.get("circuit_state") == "open":
+        return False
+    
     # Retry on timeout errors
     if isinstance(exception, TimeoutError):
         return True
     
+    upstream = classify_upstream_error(exception)
+    # Auth, missing model and payload errors would fail the same way again
+    if not upstream.retryable:
+        return False
+    
+    # Don't hold the request for a model that needs longer to load than we'd wait
+    if upstream.delay_hint is not None and upstream.delay_hint > Config.MAX_RETRY_AFTER:
+        return False
+    
     # Retry on connection errors
     if isinstance(exception, (ConnectionError, OSError)):
         return True
@@ -44,6 +86,203 @@ def should_retry(exception: Exception) -> bool:
     return True
 
 
+def next_retry_delay(
+    previous_delay: float,
+    exception: Exception,
+    initial_delay: float,
+    backoff_multiplier: float,
+    max_delay: float,
+) -> float:
+    """
+    Compute the delay before the next retry.
+    
+    Delays grow with decorrelated jitter (uniform between the initial delay
+    and the previous delay times the multiplier, capped at max_delay), so
+    callers that failed together do not retry in lockstep. When the upstream
+    sent Retry-After or a model-loading estimated_time, the retry is
+    scheduled just after that instead, with a small jitter.
+    
+    Args:
+        previous_delay: Delay used before the previous attempt (initial delay for the first retry)
+        exception: The exception that failed the attempt
+        initial_delay: Minimum delay in seconds
+        backoff_multiplier: Upper bound growth factor per retry
+        max_delay: Maximum delay without an upstream hint
+        
+    Returns:
+        float: Seconds to wait
+    """
+    hint = classify_upstream_error(exception).delay_hint
+    if hint is not None:
+        return hint + random.uniform(0, min(1.0, 0.1 * hint + 0.1))
+    upper = max(initial_delay, previous_delay * backoff_multiplier)
+    return min(max_delay, random.uniform(initial_delay, upper))
+
+
+class RetryBudget:
+    """
+    Process-wide cap on retries relative to first attempts.
+    
+    Over a sliding window of Config.RETRY_BUDGET_WINDOW seconds, retries may
+    not exceed Config.RETRY_BUDGET_PERCENT of first attempts, plus a floor of
+    Config.RETRY_BUDGET_MIN_RETRIES so low traffic can still retry. Once the
+    budget is spent, failed calls fail fast instead of retrying.
+    """
+    
+    # Window resolution in seconds
+    SLOT_SECONDS = 1.0
+    
+    def __init__(
+        self,
+        percent: Optional[float] = None,
+        window: Optional[float] = None,
+        min_retries: Optional[int] = None,
+    ):
+        """
+        Initialize the budget.
+        
+        Args:
+            percent: Maximum retries as a percentage of first attempts
+            window: Sliding window length in seconds
+            min_retries: Retries always allowed per window
+        """
+        self.percent = percent if percent is not None else Config.RETRY_BUDGET_PERCENT
+        self.window = window if window is not None else Config.RETRY_BUDGET_WINDOW
+        self.min_retries = min_retries if min_retries is not None else Config.RETRY_BUDGET_MIN_RETRIES
+        # (slot start, first attempts, retries), oldest first
+        self._slots: deque[list[float]] = deque()
+        self._lock = threading.Lock()
+        self.first_attempts_total = 0
+        self.retries_total = 0
+        self.denied_total = 0
+        self._by_function: dict[str, dict[str, int]] = {}
+    
+    def _current_slot(self, now: float) -> list[float]:
+        while self._slots and self._slots[0][0] <= now - self.window:
+            self._slots.popleft()
+        start = math.floor(now / self.SLOT_SECONDS) * self.SLOT_SECONDS
+        if not self._slots or self._slots[-1][0] != start:
+            self._slots.append([start, 0, 0])
+        return self._slots[-1]
+    
+    def _totals(self) -> tuple[int, int]:
+        return (
+            int(sum(slot[1] for slot in self._slots)),
+            int(sum(slot[2] for slot in self._slots)),
+        )
+    
+    def _allowance(self, attempts: int) -> int:
+        return self.min_retries + int(attempts * self.percent / 100)
+    
+    def _count(self, name: str, counter: str) -> None:
+        counters = self._by_function.setdefault(name, {"first_attempts": 0, "retries": 0, "denied": 0})
+        counters[counter] += 1
+    
+    def record_attempt(self, name: str) -> None:
+        """
+        Record the first attempt of a call, which earns retry budget.
+        
+        Args:
+            name: Name of the retried function, used for metrics
+        """
+        with self._lock:
+            self._current_slot(time.monotonic())[1] += 1
+            self.first_attempts_total += 1
+            self._count(name, "first_attempts")
+    
+    def try_spend(self, name: str) -> bool:
+        """
+        Take one retry from the budget.
+        
+        Args:
+            name: Name of the retried function, used for metrics
+            
+        Returns:
+            bool: True if the retry may go ahead, False if the budget is spent
+        """
+        with self._lock:
+            slot = self._current_slot(time.monotonic())
+            attempts, retries = self._totals()
+            if retries >= self._allowance(attempts):
+                self.denied_total += 1
+                self._count(name, "denied")
+                return False
+            slot[2] += 1
+            self.retries_total += 1
+            self._count(name, "retries")
+            return True
+    
+    def stats(self) -> dict[str, Any]:
+        """
+        Get retry budget consumption.
+        
+        Returns:
+            dict: Window counts, remaining retries, lifetime totals and
+            per-function counters
+        """
+        with self._lock:
+            self._current_slot(time.monotonic())
+            attempts, retries = self._totals()
+            allowance = self._allowance(attempts)
+            return {
+                "percent": self.percent,
+                "window_seconds": self.window,
+                "min_retries": self.min_retries,
+                "window": {
+                    "first_attempts": attempts,
+                    "retries": retries,
+                    "allowance": allowance,
+                    "remaining": max(0, allowance - retries),
+                    "utilization": round(retries / allowance, 3) if allowance else None,
+                },
+                "totals": {
+                    "first_attempts": self.first_attempts_total,
+                    "retries": self.retries_total,
+                    "denied": self.denied_total,
+                },
+                "functions": {name: dict(counters) for name, counters in self._by_function.items()},
+            }
+
+
+# Global budget instance
+_retry_budget: Optional[RetryBudget] = None
+
+
+def get_retry_budget() -> RetryBudget:
+    """
+    Get or create the global retry budget.
+    
+    Returns:
+        RetryBudget: The global budget instance
+    """
+    global _retry_budget
+    if _retry_budget is None:
+        _retry_budget = RetryBudget()
+    return _retry_budget
+
+
+def _deadline_allows_retry(name: str, exception: Exception, attempt: int, delay: float) -> bool:
+    """Check that a retry after the given delay could still finish before the request deadline."""
+    if can_finish_within(delay + Config.DEADLINE_MIN_ATTEMPT):
+        return True
+    logger.error(
+        f"Function {name} failed on attempt {attempt + 1}, no time left for a retry before the request deadline",
+        extra={"error": str(exception), "attempt": attempt + 1, "delay": delay},
+    )
+    return False
+
+
+def _budget_allows_retry(name: str, exception: Exception, attempt: int) -> bool:
+    """Spend retry budget for a retry, logging when the call must fail fast instead."""
+    if get_retry_budget().try_spend(name):
+        return True
+    logger.error(
+        f"Function {name} failed on attempt {attempt + 1}, retry budget exhausted",
+        extra={"error": str(exception), "attempt": attempt + 1},
+    )
+    return False
+
+
 def retry(
     max_retries: Optional[int] = None,
     initial_delay: Optional[float] = None,
@@ -73,7 +312,11 @@ def retry(
             last_exception = None
             delay = initial_delay
             
+            budget = get_retry_budget()
+            
             for attempt in range(max_retries + 1):
+                if attempt == 0:
+                    budget.record_attempt(func.__name__)
                 try:
                     return func(*args, **kwargs)
                 except Exception as e:
@@ -86,17 +329,22 @@ def retry(
                         )
                         raise
                     
+                    delay = next_retry_delay(delay, e, initial_delay, backoff_multiplier, max_delay)
+                    
+                    if not _deadline_allows_retry(func.__name__, e, attempt, delay):
+                        raise
+                    
+                    if not _budget_allows_retry(func.__name__, e, attempt):
+                        raise
+                    
                     # Log retry attempt
                     logger.warning(
-                        f"Function {func.__name__} failed on attempt {attempt + 1}, retrying in {delay}s",
+                        f"Function {func.__name__} failed on attempt {attempt + 1}, retrying in {delay:.2f}s",
                         extra={"error": str(e), "attempt": attempt + 1, "delay": delay}
                     )
                     
                     # Wait before retrying
                     time.sleep(delay)
-                    
-                    # Calculate next delay with exponential backoff
-                    delay = min(delay * backoff_multiplier, max_delay)
             
             # This should never be reached, but just in case
             raise last_exception or RuntimeError("Retry failed for unknown reason")
@@ -106,7 +354,7 @@ def retry(
     return decorator
 
 
-async def async_retry(
+def async_retry(
     max_retries: Optional[int] = None,
     initial_delay: Optional[float] = None,
     backoff_multiplier: Optional[float] = None,
@@ -135,7 +383,11 @@ async def async_retry(
             last_exception = None
             delay = initial_delay
             
+            budget = get_retry_budget()
+            
             for attempt in range(max_retries + 1):
+                if attempt == 0:
+                    budget.record_attempt(func.__name__)
                 try:
                     return await func(*args, **kwargs)
                 except Exception as e:
@@ -148,17 +400,22 @@ async def async_retry(
                         )
                         raise
                     
+                    delay = next_retry_delay(delay, e, initial_delay, backoff_multiplier, max_delay)
+                    
+                    if not _deadline_allows_retry(func.__name__, e, attempt, delay):
+                        raise
+                    
+                    if not _budget_allows_retry(func.__name__, e, attempt):
+                        raise
+                    
                     # Log retry attempt
                     logger.warning(
-                        f"Function {func.__name__} failed on attempt {attempt + 1}, retrying in {delay}s",
+                        f"Function {func.__name__} failed on attempt {attempt + 1}, retrying in {delay:.2f}s",
                         extra={"error": str(e), "attempt": attempt + 1, "delay": delay}
                     )
                     
                     # Wait before retrying
                     await asyncio.sleep(delay)
-                    
-                    # Calculate next delay with exponential backoff
-                    delay = min(delay * backoff_multiplier, max_delay)
             
             # This should never be reached, but just in case
             raise last_exception or RuntimeError("Retry failed for unknown reason")
@@ -205,6 +462,8 @@ def retry_with_fallback(
                 delay = initial_delay
                 
                 for attempt in range(max_retries + 1):
+                    if attempt == 0:
+                        get_retry_budget().record_attempt(func.__name__)
                     try:
                         # Update the first positional argument with fallback value
                         new_args = (fallback_value,) + args[1:] if args else (fallback_value,)
@@ -219,9 +478,16 @@ def retry_with_fallback(
                             )
                             break
                         
+                        delay = next_retry_delay(delay, e, initial_delay, backoff_multiplier, max_delay)
+                        
+                        if not _deadline_allows_retry(func.__name__, e, attempt, delay):
+                            break
+                        
+                        if not _budget_allows_retry(func.__name__, e, attempt):
+                            break
+                        
                         # Wait before retrying
                         time.sleep(delay)
-                        delay = min(delay * backoff_multiplier, max_delay)
             
             # All fallbacks exhausted
             logger.error(
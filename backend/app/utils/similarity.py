@@ -0,0 +1,69 @@
+"""
+Vectorized similarity scoring.
+
+This module scores query vectors against candidate vectors by cosine
+similarity or dot product with a single matrix product, and selects the
+top-k candidates of each query without sorting every score.
+"""
+
+import numpy as np
+
+# Similarity metrics a client can request
+SIMILARITY_METRICS = ("cosine", "dot")
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    Scale each row of a matrix to unit length.
+
+    Args:
+        matrix: (rows, dim) float matrix
+
+    Returns:
+        np.ndarray: Unit-norm rows (all-zero rows stay zero)
+    """
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+
+def similarity_scores(queries: np.ndarray, candidates: np.ndarray, metric: str = "cosine") -> np.ndarray:
+    """
+    Score every query against every candidate.
+
+    Args:
+        queries: (queries, dim) float matrix
+        candidates: (candidates, dim) float matrix
+        metric: One of SIMILARITY_METRICS
+
+    Returns:
+        np.ndarray: (queries, candidates) float32 scores
+    """
+    queries = np.asarray(queries, dtype=np.float32)
+    candidates = np.asarray(candidates, dtype=np.float32)
+    if metric == "cosine":
+        queries, candidates = normalize_rows(queries), normalize_rows(candidates)
+    elif metric != "dot":
+        raise ValueError(f"Unsupported similarity metric '{metric}'")
+    return queries @ candidates.T
+
+
+def select_top_k(scores: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Select the k best scores of each row of a score matrix.
+
+    Args:
+        scores: (queries, candidates) scores
+        k: Number of results per query
+
+    Returns:
+        tuple: (queries, k') candidate positions and scores, best first
+    """
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.zeros((len(scores), 0), dtype=np.int64), np.zeros((len(scores), 0), dtype=np.float32)
+    if k < scores.shape[1]:
+        positions = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        positions = np.broadcast_to(np.arange(scores.shape[1]), (len(scores), scores.shape[1]))
+    selected = np.take_along_axis(scores, positions, axis=1)
+    order = np.argsort(-selected, axis=1)
+    return np.take_along_axis(positions, order, axis=1), np.take_along_axis(selected, order, axis=1)
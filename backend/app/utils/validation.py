@@ -7,7 +7,10 @@ providing type safety and automatic validation.
 
 from typing import Optional
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from app.utils.embedding_codec import EMBEDDING_DTYPES, ENCODING_FORMATS
+from app.utils.similarity import SIMILARITY_METRICS
 
 
 # ============================================================================
@@ -44,6 +47,7 @@ class ImageGenerationRequest(BaseModel):
     width: Optional[int] = Field(512, ge=256, le=1024, description="Image width in pixels")
     num_inference_steps: Optional[int] = Field(50, ge=1, le=100, description="Number of inference steps")
     guidance_scale: Optional[float] = Field(7.5, ge=1.0, le=20.0, description="Guidance scale for prompt adherence")
+    seed: Optional[int] = Field(None, ge=0, description="Random seed for reproducible generation (seeded requests are cached)")
 
 
 # ============================================================================
@@ -161,13 +165,85 @@ class LLMResponse(BaseModel):
 # Embeddings Models
 # ============================================================================
 
-class EmbeddingRequest(BaseModel):
+class EmbeddingEncodingOptions(BaseModel):
+    """Response encoding options shared by the embedding requests."""
+    
+    encoding_format: str = Field(
+        "float",
+        description="Vector encoding in JSON responses: 'float' (number lists) or 'base64' (packed little-endian bytes)",
+    )
+    dtype: str = Field(
+        "float32",
+        description="Element type: 'float32', 'float16', 'int8' (with per-vector scales) or 'binary' (sign bits)",
+    )
+    
+    @field_validator("encoding_format")
+    @classmethod
+    def validate_encoding_format(cls, v: str) -> str:
+        """Validate the JSON vector encoding."""
+        if v not in ENCODING_FORMATS:
+            raise ValueError(f"Invalid encoding_format '{v}'. Must be one of {ENCODING_FORMATS}")
+        return v
+    
+    @field_validator("dtype")
+    @classmethod
+    def validate_dtype(cls, v: str) -> str:
+        """Validate the element type."""
+        if v not in EMBEDDING_DTYPES:
+            raise ValueError(f"Invalid dtype '{v}'. Must be one of {EMBEDDING_DTYPES}")
+        return v
+    
+    @property
+    def default_encoding(self) -> bool:
+        """Whether the response uses the plain float32 JSON encoding."""
+        return self.encoding_format == "float" and self.dtype == "float32"
+
+
+class EmbeddingDimensionOptions(BaseModel):
+    """Output dimension options shared by the embedding requests."""
+    
+    dimensions: Optional[int] = Field(
+        None, ge=1, le=8192, description="Reduce vectors to this many dimensions (optional)"
+    )
+    projection: str = Field(
+        "auto",
+        description="How to reduce: 'truncate' (Matryoshka models), 'pca' (fitted from stored embeddings) "
+                    "or 'auto' (truncate where supported, else PCA)",
+    )
+    
+    @field_validator("projection")
+    @classmethod
+    def validate_projection(cls, v: str) -> str:
+        """Validate the dimension reduction method."""
+        valid_projections = ("auto", "truncate", "pca")
+        if v not in valid_projections:
+            raise ValueError(f"Invalid projection '{v}'. Must be one of {valid_projections}")
+        return v
+
+
+class EmbeddingRequest(EmbeddingEncodingOptions, EmbeddingDimensionOptions):
     """Request model for embeddings."""
     
     text: str = Field(..., min_length=1, max_length=5000, description="Text to embed")
     model: Optional[str] = Field(None, description="Model to use (optional, uses default if not specified)")
 
 
+class EmbeddingBatchRequest(EmbeddingEncodingOptions, EmbeddingDimensionOptions):
+    """Request model for batch embeddings."""
+    
+    texts: list[str] = Field(..., min_length=1, max_length=4096, description="Texts to embed")
+    model: Optional[str] = Field(None, description="Model to use (optional, uses default if not specified)")
+    
+    @field_validator("texts")
+    @classmethod
+    def validate_texts(cls, v: list[str]) -> list[str]:
+        """Validate that every text fits the single-text limits."""
+        for position, text in enumerate(v):
+            if not text or len(text) > 5000:
+                raise ValueError(f"Text {position} must be between 1 and 5000 characters")
+        return v
+
+
 class EmbeddingResponse(BaseModel):
     """Response model for embeddings."""
     
@@ -175,6 +251,205 @@ class EmbeddingResponse(BaseModel):
     dimension: int = Field(..., description="Dimension of embedding vector")
     model: str = Field(..., description="Model used for embedding")
     tokens_used: Optional[int] = Field(None, description="Number of tokens used")
+    projection: Optional[str] = Field(None, description="How dimensions were reduced, if they were")
+
+
+class EmbeddingBatchResponse(BaseModel):
+    """Response model for batch embeddings."""
+    
+    embeddings: list[list[float]] = Field(..., description="Embedding vectors, in input order")
+    dimension: int = Field(..., description="Dimension of embedding vectors")
+    model: str = Field(..., description="Model used for embedding")
+    count: int = Field(..., description="Number of input texts")
+    unique: int = Field(..., description="Number of distinct input texts")
+    stored: int = Field(..., description="Distinct texts served from the embedding store")
+    projection: Optional[str] = Field(None, description="How dimensions were reduced, if they were")
+
+
+class ProjectionFitRequest(BaseModel):
+    """Request model for fitting a PCA projection."""
+    
+    model: Optional[str] = Field(None, description="Model to fit (optional, uses default if not specified)")
+    sample: Optional[int] = Field(None, ge=2, description="Maximum stored vectors to fit on")
+
+
+class ProjectionFitResponse(BaseModel):
+    """Response model for a fitted PCA projection."""
+    
+    model: str = Field(..., description="Model the projection was fitted for")
+    rows: int = Field(..., description="Stored vectors it was fitted on")
+    dimension: int = Field(..., description="Dimension of the model's vectors")
+    variance_kept: dict[str, float] = Field(..., description="Share of variance kept at common dimensions")
+
+
+class DocumentChunk(BaseModel):
+    """An embedded window of a long document."""
+    
+    index: int = Field(..., description="Position of the window in the document")
+    start: int = Field(..., description="Character offset where the window starts")
+    end: int = Field(..., description="Character offset where the window ends")
+    tokens: int = Field(..., description="Tokens in the window")
+    embedding: list[float] = Field(..., description="Embedding vector of the window")
+
+
+class DocumentEmbeddingResponse(BaseModel):
+    """Response model for long-document embeddings."""
+    
+    embedding: Optional[list[float]] = Field(None, description="Pooled, unit-norm document vector")
+    chunks: Optional[list[DocumentChunk]] = Field(None, description="Windows with their vectors, in order")
+    dimension: int = Field(..., description="Dimension of embedding vectors")
+    model: str = Field(..., description="Model used for embedding")
+    pooling: str = Field(..., description="How window vectors were pooled")
+    chunk_count: int = Field(..., description="Number of windows")
+    tokens: int = Field(..., description="Tokens in the document")
+    approximate_tokens: bool = Field(..., description="Whether tokens were approximated by words")
+    stored: int = Field(..., description="Distinct windows served from the embedding store")
+
+
+class SimilarityRequest(BaseModel):
+    """Request model for scoring candidates against a query."""
+    
+    query: Optional[str] = Field(None, min_length=1, max_length=5000, description="Query text")
+    query_vector: Optional[list[float]] = Field(None, description="Precomputed query embedding")
+    candidates: Optional[list[str]] = Field(None, max_length=4096, description="Candidate texts")
+    candidate_vectors: Optional[list[list[float]]] = Field(
+        None, max_length=4096, description="Precomputed candidate embeddings"
+    )
+    model: Optional[str] = Field(None, description="Model to use (optional, uses default if not specified)")
+    top_k: Optional[int] = Field(None, ge=1, description="Number of candidates to return (default: all)")
+    metric: str = Field("cosine", description="Similarity: 'cosine' or 'dot'")
+    
+    @field_validator("candidates")
+    @classmethod
+    def validate_candidates(cls, v: Optional[list[str]]) -> Optional[list[str]]:
+        """Validate that every candidate fits the single-text limits."""
+        for position, text in enumerate(v or []):
+            if not text or len(text) > 5000:
+                raise ValueError(f"Candidate {position} must be between 1 and 5000 characters")
+        return v
+    
+    @field_validator("metric")
+    @classmethod
+    def validate_metric(cls, v: str) -> str:
+        """Validate the similarity metric."""
+        if v not in SIMILARITY_METRICS:
+            raise ValueError(f"Invalid metric '{v}'. Must be one of {SIMILARITY_METRICS}")
+        return v
+    
+    @model_validator(mode="after")
+    def validate_inputs(self) -> "SimilarityRequest":
+        """Validate that exactly one query and one candidate list are given."""
+        if (self.query is None) == (self.query_vector is None):
+            raise ValueError("Provide exactly one of 'query' and 'query_vector'")
+        if (self.candidates is None) == (self.candidate_vectors is None):
+            raise ValueError("Provide exactly one of 'candidates' and 'candidate_vectors'")
+        if not (self.candidates or self.candidate_vectors):
+            raise ValueError("Provide at least one candidate")
+        return self
+
+
+class SimilarityHit(BaseModel):
+    """A scored candidate."""
+    
+    index: int = Field(..., description="Position of the candidate in the request")
+    score: float = Field(..., description="Cosine similarity or dot product with the query")
+    text: Optional[str] = Field(None, description="Candidate text, for text candidates")
+
+
+class SimilarityResponse(BaseModel):
+    """Response model for candidate scoring."""
+    
+    results: list[SimilarityHit] = Field(..., description="Candidates, best first")
+    model: Optional[str] = Field(None, description="Model used for embedding, if any text was embedded")
+    metric: str = Field(..., description="Similarity metric")
+    count: int = Field(..., description="Number of candidates scored")
+    stored: int = Field(..., description="Distinct texts served from the embedding store")
+
+
+class IndexItem(BaseModel):
+    """An item to insert into a vector collection."""
+    
+    id: str = Field(..., min_length=1, max_length=256, description="Item id (an existing id is replaced)")
+    text: Optional[str] = Field(None, min_length=1, max_length=5000, description="Text to embed and return with hits")
+    vector: Optional[list[float]] = Field(None, description="Precomputed embedding (skips embedding the text)")
+    metadata: Optional[dict] = Field(None, description="Arbitrary metadata returned with hits")
+    
+    @model_validator(mode="after")
+    def validate_source(self) -> "IndexItem":
+        """Validate that the item has a text or a vector."""
+        if self.text is None and self.vector is None:
+            raise ValueError("Each item needs a 'text' or a 'vector'")
+        return self
+
+
+class IndexUpsertRequest(BaseModel):
+    """Request model for inserting items into a vector collection."""
+    
+    collection: str = Field("default", pattern=r"^[A-Za-z0-9_.-]{1,64}$", description="Collection name")
+    model: Optional[str] = Field(None, description="Embedding model (optional, defaults to the collection's model)")
+    items: list[IndexItem] = Field(..., min_length=1, max_length=4096, description="Items to insert or replace")
+
+
+class IndexUpsertResponse(BaseModel):
+    """Response model for vector collection upserts."""
+    
+    collection: str = Field(..., description="Collection name")
+    upserted: int = Field(..., description="Number of items inserted or replaced")
+    count: int = Field(..., description="Collection size after the upsert")
+    dimension: int = Field(..., description="Vector dimension")
+    model: str = Field(..., description="Embedding model of the collection")
+
+
+class SearchRequest(BaseModel):
+    """Request model for nearest-neighbour search."""
+    
+    collection: str = Field("default", pattern=r"^[A-Za-z0-9_.-]{1,64}$", description="Collection name")
+    query: Optional[str] = Field(None, min_length=1, max_length=5000, description="Query text")
+    queries: Optional[list[str]] = Field(None, max_length=256, description="Several query texts, searched together")
+    vectors: Optional[list[list[float]]] = Field(None, max_length=256, description="Precomputed query vectors")
+    top_k: int = Field(10, ge=1, le=1000, description="Results per query")
+    metric: str = Field("cosine", description="Similarity: 'cosine' or 'dot'")
+    exact: bool = Field(False, description="Scan every vector even if an approximate index exists")
+    nprobe: Optional[int] = Field(None, ge=1, description="Clusters scanned per query in the approximate index")
+    
+    @field_validator("metric")
+    @classmethod
+    def validate_metric(cls, v: str) -> str:
+        """Validate the similarity metric."""
+        if v not in SIMILARITY_METRICS:
+            raise ValueError(f"Invalid metric '{v}'. Must be one of {SIMILARITY_METRICS}")
+        return v
+    
+    @model_validator(mode="after")
+    def validate_queries(self) -> "SearchRequest":
+        """Validate that at least one query is given."""
+        if self.query is None and not self.queries and not self.vectors:
+            raise ValueError("Provide 'query', 'queries' or 'vectors'")
+        return self
+    
+    @property
+    def query_texts(self) -> list[str]:
+        """All query texts, 'query' first."""
+        return ([self.query] if self.query is not None else []) + (self.queries or [])
+
+
+class SearchHit(BaseModel):
+    """A nearest-neighbour search result."""
+    
+    id: str = Field(..., description="Item id")
+    score: float = Field(..., description="Cosine similarity or dot product")
+    text: Optional[str] = Field(None, description="Item text, if it was indexed with one")
+    metadata: Optional[dict] = Field(None, description="Item metadata")
+
+
+class SearchResponse(BaseModel):
+    """Response model for nearest-neighbour search."""
+    
+    collection: str = Field(..., description="Collection name")
+    metric: str = Field(..., description="Similarity metric")
+    results: list[list[SearchHit]] = Field(
+        ..., description="Hits per query, best first: text queries in order, then vector queries"
+    )
 
 
 # ============================================================================
@@ -290,3 +565,17 @@ class VideoGenerationResponse(BaseModel):
         default="mp4",
         description="Video file format"
     )
+
+
+# ============================================================================
+# Admin Models
+# ============================================================================
+
+class ProviderRouteOverride(BaseModel):
+    """Request model for pinning a model to specific providers."""
+    
+    providers: list[str] = Field(
+        ...,
+        min_length=1,
+        description="Providers to route the model to, preferred first"
+    )
@@ -0,0 +1,68 @@
+"""Tests for token-window chunking of long documents."""
+
+from tokenizers import Tokenizer
+from tokenizers.models import WordLevel
+from tokenizers.pre_tokenizers import Whitespace
+
+from app.utils import chunking
+from app.utils.chunking import WindowChunker, load_tokenizer, max_window_tokens
+
+MODEL = "test/truncating-model"
+WORDS = [f"w{index}" for index in range(1000)]
+
+
+def _truncating_tokenizer_json() -> str:
+    """A tokenizer.json that truncates at 128 tokens and pads, like all-MiniLM-L6-v2's."""
+    vocab = {"[UNK]": 0, "[PAD]": 1, **{word: index + 2 for index, word in enumerate(WORDS)}}
+    tokenizer = Tokenizer(WordLevel(vocab, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = Whitespace()
+    tokenizer.enable_truncation(max_length=128)
+    tokenizer.enable_padding(length=128, pad_id=1, pad_token="[PAD]")
+    return tokenizer.to_str()
+
+
+class _HubTokenizer:
+    """Stands in for tokenizers.Tokenizer when loading from the Hub."""
+
+    @staticmethod
+    def from_pretrained(model: str, auth_token=None) -> Tokenizer:
+        return Tokenizer.from_str(_truncating_tokenizer_json())
+
+
+def _load(monkeypatch) -> Tokenizer:
+    monkeypatch.setattr(chunking, "Tokenizer", _HubTokenizer)
+    monkeypatch.setattr(chunking, "_tokenizers", {})
+    monkeypatch.setattr(chunking, "_truncation_lengths", {})
+    monkeypatch.setattr(chunking, "_max_windows", {})
+    monkeypatch.setattr(chunking, "hf_hub_download", lambda *args, **kwargs: (_ for _ in ()).throw(OSError()))
+    tokenizer, exact = load_tokenizer(MODEL)
+    assert exact
+    return tokenizer
+
+
+def test_document_longer_than_truncation_is_chunked_whole(monkeypatch):
+    tokenizer = _load(monkeypatch)
+    document = " ".join(WORDS)
+    chunker = WindowChunker(tokenizer, window=100, overlap=20)
+
+    chunks = []
+    # Feed in small pieces with a tiny buffer so non-final splits happen too
+    monkeypatch.setattr(chunking, "CHUNKER_BUFFER_CHARS", 500)
+    for start in range(0, len(document), 300):
+        chunks.extend(chunker.feed(document[start:start + 300]))
+    chunks.extend(chunker.finish())
+
+    assert all(chunk.text for chunk in chunks)
+    assert all(chunk.text == document[chunk.start:chunk.end] for chunk in chunks)
+    assert chunks[0].text.split()[0] == "w0"
+    assert chunks[-1].text.split()[-1] == "w999"
+    assert len(chunks) == 13  # windows start every 80 tokens over 1000 tokens
+    assert len(chunker._buffer) == 0
+
+
+def test_max_window_uses_truncation_length_read_before_disabling(monkeypatch):
+    tokenizer = _load(monkeypatch)
+
+    assert tokenizer.truncation is None
+    assert tokenizer.padding is None
+    assert max_window_tokens(MODEL, tokenizer, exact=True) == 128
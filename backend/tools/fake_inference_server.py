@@ -0,0 +1,424 @@
+"""
+Fake HuggingFace inference server for offline load and integration testing.
+
+This server stands in for the HuggingFace inference providers. It answers
+the requests AsyncInferenceClient sends when the backend runs with
+HF_INFERENCE_ENDPOINT pointing at it, using synthetic but well-formed
+payloads (PNG images, WAV audio, MP4 containers, embeddings, text) with
+configurable latency, error rates and payload sizes.
+
+Usage:
+    python tools/fake_inference_server.py --port 9000 --latency-scale 0.1
+    HF_INFERENCE_ENDPOINT=http://localhost:9000 uvicorn app.main:app
+
+The backend sends each task to {endpoint}/models/{model}/pipeline/{task}
+and chat completions to {endpoint}/models/{model}/v1/chat/completions.
+Settings can be changed while the server runs via PUT /__config, and
+request counters are available at GET /__stats.
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import math
+import random
+import struct
+import time
+import wave
+import zlib
+from dataclasses import asdict, dataclass, field
+from typing import Any, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+# Median and p99 latency in seconds per task, roughly matching real providers
+DEFAULT_LATENCIES = {
+    "feature-extraction": (0.05, 0.3),
+    "text-generation": (1.0, 6.0),
+    "chat-completion": (1.0, 6.0),
+    "automatic-speech-recognition": (1.5, 8.0),
+    "text-to-speech": (1.2, 6.0),
+    "text-to-image": (4.0, 20.0),
+    "image-to-image": (4.0, 20.0),
+    "inpainting": (4.0, 20.0),
+    "text-to-video": (30.0, 120.0),
+    "image-to-video": (30.0, 120.0),
+}
+
+# Response payload size in bytes for binary tasks
+DEFAULT_PAYLOAD_SIZES = {
+    "text-to-image": 400_000,
+    "image-to-image": 400_000,
+    "inpainting": 400_000,
+    "text-to-speech": 200_000,
+    "text-to-video": 2_000_000,
+    "image-to-video": 2_000_000,
+}
+
+TASK_ALIASES = {
+    "text_to_image": "text-to-image",
+    "image_to_image": "image-to-image",
+    "text_to_speech": "text-to-speech",
+    "automatic_speech_recognition": "automatic-speech-recognition",
+    "feature_extraction": "feature-extraction",
+    "text_generation": "text-generation",
+    "chat_completion": "chat-completion",
+    "text_to_video": "text-to-video",
+    "image_to_video": "image-to-video",
+}
+
+
+@dataclass
+class FakeServerConfig:
+    """Behaviour of the fake server."""
+
+    latencies: dict[str, tuple[float, float]] = field(default_factory=lambda: dict(DEFAULT_LATENCIES))
+    latency_scale: float = 1.0
+    error_rate: float = 0.0
+    loading_rate: float = 0.0
+    loading_estimated_time: float = 20.0
+    throttle_rate: float = 0.0
+    throttle_retry_after: int = 1
+    capacity: int = 0
+    payload_sizes: dict[str, int] = field(default_factory=lambda: dict(DEFAULT_PAYLOAD_SIZES))
+    embedding_dim: int = 384
+    seed: Optional[int] = None
+
+    def update(self, values: dict[str, Any]) -> None:
+        """
+        Update settings from a (partial) mapping.
+
+        Args:
+            values: Setting names and new values
+
+        Raises:
+            KeyError: If a setting does not exist
+        """
+        for key, value in values.items():
+            if not hasattr(self, key):
+                raise KeyError(key)
+            if key == "latencies":
+                value = {task: tuple(bounds) for task, bounds in value.items()}
+                value = {**self.latencies, **value}
+            elif key == "payload_sizes":
+                value = {**self.payload_sizes, **value}
+            setattr(self, key, value)
+
+
+class FakeInferenceServer:
+    """Request handling, fault injection and counters for the fake server."""
+
+    def __init__(self, config: FakeServerConfig):
+        """
+        Initialize the server state.
+
+        Args:
+            config: Server behaviour
+        """
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.in_flight: dict[str, int] = {}
+        self.counters: dict[str, dict[str, int]] = {}
+
+    def _count(self, task: str, outcome: str) -> None:
+        counters = self.counters.setdefault(task, {})
+        counters[outcome] = counters.get(outcome, 0) + 1
+
+    def _latency(self, task: str) -> float:
+        median, p99 = self.config.latencies.get(task, (0.5, 2.0))
+        # Log-normal distribution with the given median and p99
+        sigma = max(0.0, math.log(max(p99, median) / median) / 2.326) if median > 0 else 0.0
+        sample = self.random.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+        return sample * self.config.latency_scale
+
+    def _injected_error(self, model: str) -> Optional[Response]:
+        roll = self.random.random()
+        if roll < self.config.loading_rate:
+            return JSONResponse(
+                {
+                    "error": f"Model {model} is currently loading",
+                    "estimated_time": self.config.loading_estimated_time,
+                },
+                status_code=503,
+            )
+        roll -= self.config.loading_rate
+        if roll < self.config.throttle_rate:
+            return JSONResponse(
+                {"error": "Rate limit reached. Please retry later."},
+                status_code=429,
+                headers={"Retry-After": str(self.config.throttle_retry_after)},
+            )
+        roll -= self.config.throttle_rate
+        if roll < self.config.error_rate:
+            return JSONResponse({"error": "Internal server error"}, status_code=500)
+        return None
+
+    async def handle(self, task: str, model: str, body: bytes, content_type: str) -> Response:
+        """
+        Serve one inference request.
+
+        Args:
+            task: Pipeline task name (e.g. 'text-to-image')
+            model: Model ID from the request path
+            body: Raw request body
+            content_type: Request content type
+
+        Returns:
+            Response: Synthetic payload or an injected error
+        """
+        task = TASK_ALIASES.get(task, task)
+        if task not in DEFAULT_LATENCIES:
+            self._count(task, "unknown_task")
+            return JSONResponse({"error": f"Unknown task '{task}'"}, status_code=404)
+
+        if self.config.capacity and self.in_flight.get(model, 0) >= self.config.capacity:
+            self._count(task, "over_capacity")
+            return JSONResponse(
+                {"error": "Model is overloaded"},
+                status_code=429,
+                headers={"Retry-After": str(self.config.throttle_retry_after)},
+            )
+
+        self.in_flight[model] = self.in_flight.get(model, 0) + 1
+        try:
+            await asyncio.sleep(self._latency(task))
+            error = self._injected_error(model)
+            if error is not None:
+                self._count(task, f"status_{error.status_code}")
+                return error
+
+            payload = _parse_json(body) if "json" in content_type or body[:1] in (b"{", b"[") else None
+            response = self._render(task, model, body, payload or {})
+            self._count(task, "ok")
+            return response
+        finally:
+            self.in_flight[model] -= 1
+
+    def _render(self, task: str, model: str, body: bytes, payload: dict[str, Any]) -> Response:
+        parameters = payload.get("parameters") or {}
+        inputs = payload.get("inputs", "")
+        size = self.config.payload_sizes.get(task, 0)
+
+        if task in ("text-to-image", "image-to-image", "inpainting"):
+            width = min(int(parameters.get("width") or 512), 2048)
+            height = min(int(parameters.get("height") or 512), 2048)
+            return Response(_png(width, height, size), media_type="image/png")
+
+        if task == "text-to-speech":
+            return Response(_wav(size), media_type="audio/wav")
+
+        if task in ("text-to-video", "image-to-video"):
+            return Response(_mp4(size), media_type="video/mp4")
+
+        if task == "automatic-speech-recognition":
+            audio = body if payload == {} else base64.b64decode(inputs or b"")
+            return JSONResponse({"text": f"Fake transcription of {len(audio)} bytes of audio."})
+
+        if task == "feature-extraction":
+            if isinstance(inputs, list):
+                return JSONResponse([_embedding(str(text), self.config.embedding_dim) for text in inputs])
+            return JSONResponse(_embedding(str(inputs), self.config.embedding_dim))
+
+        if task == "text-generation":
+            text = _generated_text(int(parameters.get("max_new_tokens") or 20))
+            return JSONResponse([{"generated_text": text}])
+
+        # chat-completion, OpenAI-compatible response
+        max_tokens = int(payload.get("max_tokens") or 20)
+        return JSONResponse({
+            "id": f"fake-{self.random.getrandbits(32):08x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": _generated_text(max_tokens)},
+                "finish_reason": "length",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": max_tokens, "total_tokens": max_tokens},
+        })
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get request counters.
+
+        Returns:
+            dict: Outcome counts per task and in-flight requests per model
+        """
+        return {
+            "requests": {task: dict(counts) for task, counts in self.counters.items()},
+            "in_flight": {model: count for model, count in self.in_flight.items() if count},
+        }
+
+
+def _parse_json(body: bytes) -> Optional[dict[str, Any]]:
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        return None
+    return payload if isinstance(payload, dict) else {"inputs": payload}
+
+
+def _pad(size: int, current: int) -> bytes:
+    return bytes(max(0, size - current))
+
+
+def _png(width: int, height: int, size: int) -> bytes:
+    """Build a solid-colour PNG, padded with a private chunk to about `size` bytes."""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    row = b"\x00" + b"\x80\x80\x80" * width
+    image = (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(row * height))
+    )
+    end = chunk(b"IEND", b"")
+    padding = _pad(size, len(image) + len(end) + 12)
+    if padding:
+        image += chunk(b"fkPd", padding)
+    return image + end
+
+
+def _wav(size: int, sample_rate: int = 22050) -> bytes:
+    """Build a mono 16-bit WAV tone of about `size` bytes."""
+    frames = max(sample_rate // 10, (size - 44) // 2)
+    tone = b"".join(
+        struct.pack("<h", int(8000 * math.sin(2 * math.pi * 440 * i / sample_rate)))
+        for i in range(sample_rate // 10)
+    )
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(sample_rate)
+        writer.writeframes((tone * (frames // (sample_rate // 10) + 1))[:frames * 2])
+    return buffer.getvalue()
+
+
+def _mp4(size: int) -> bytes:
+    """Build an MP4 container (ftyp + mdat) of about `size` bytes."""
+    ftyp = struct.pack(">I", 24) + b"ftypisom" + struct.pack(">I", 0x200) + b"isomiso2"
+    mdat_size = max(8, size - len(ftyp))
+    return ftyp + struct.pack(">I", mdat_size) + b"mdat" + _pad(mdat_size, 8)
+
+
+def _embedding(text: str, dim: int) -> list[float]:
+    """Deterministic unit vector for a text, so repeated inputs embed identically."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    generator = random.Random(seed)
+    vector = [generator.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+def _generated_text(tokens: int) -> str:
+    words = ("lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit")
+    return " ".join(words[i % len(words)] for i in range(max(1, tokens)))
+
+
+def create_app(config: Optional[FakeServerConfig] = None) -> FastAPI:
+    """
+    Create the fake inference server application.
+
+    Args:
+        config: Server behaviour (defaults if None)
+
+    Returns:
+        FastAPI: The application
+    """
+    server = FakeInferenceServer(config or FakeServerConfig())
+    app = FastAPI(title="Fake HuggingFace Inference Server")
+    app.state.server = server
+
+    @app.get("/__stats")
+    async def stats() -> dict:
+        return server.stats()
+
+    @app.get("/__config")
+    async def get_config() -> dict:
+        return asdict(server.config)
+
+    @app.put("/__config")
+    async def put_config(request: Request) -> Response:
+        try:
+            server.config.update(await request.json())
+        except KeyError as e:
+            return JSONResponse({"error": f"Unknown setting {e}"}, status_code=422)
+        return JSONResponse(asdict(server.config))
+
+    @app.post("/models/{model:path}/v1/chat/completions")
+    async def chat_completions(model: str, request: Request) -> Response:
+        body = await request.body()
+        return await server.handle("chat-completion", model, body, "application/json")
+
+    @app.post("/models/{model:path}/pipeline/{task}")
+    async def pipeline(model: str, task: str, request: Request) -> Response:
+        body = await request.body()
+        return await server.handle(task, model, body, request.headers.get("content-type", ""))
+
+    return app
+
+
+def _parse_map(value: str, cast) -> dict[str, Any]:
+    """Parse "task=value,task=value" command-line maps."""
+    result = {}
+    for item in value.split(","):
+        if "=" in item:
+            key, raw = item.split("=", 1)
+            result[TASK_ALIASES.get(key.strip(), key.strip())] = cast(raw.strip())
+    return result
+
+
+def _parse_latency(raw: str) -> tuple[float, float]:
+    """Parse "median:p99" (or a single fixed value) in seconds."""
+    parts = [float(part) for part in raw.split(":")]
+    return parts[0], parts[-1]
+
+
+def main() -> None:
+    """Run the fake server from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument(
+        "--latency", default="",
+        help='Per-task "median:p99" seconds, e.g. "text-to-image=2:8,feature-extraction=0.02:0.1"',
+    )
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Multiplier for all latencies")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 500")
+    parser.add_argument("--loading-rate", type=float, default=0.0, help="Fraction answered 503 model loading")
+    parser.add_argument("--loading-estimated-time", type=float, default=20.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction answered 429")
+    parser.add_argument("--throttle-retry-after", type=int, default=1)
+    parser.add_argument("--capacity", type=int, default=0, help="Max in-flight requests per model (0 = unlimited)")
+    parser.add_argument("--payload-size", default="", help='Per-task response bytes, e.g. "text-to-video=5000000"')
+    parser.add_argument("--embedding-dim", type=int, default=384)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = FakeServerConfig(
+        latency_scale=args.latency_scale,
+        error_rate=args.error_rate,
+        loading_rate=args.loading_rate,
+        loading_estimated_time=args.loading_estimated_time,
+        throttle_rate=args.throttle_rate,
+        throttle_retry_after=args.throttle_retry_after,
+        capacity=args.capacity,
+        embedding_dim=args.embedding_dim,
+        seed=args.seed,
+    )
+    config.latencies.update(_parse_map(args.latency, _parse_latency))
+    config.payload_sizes.update(_parse_map(args.payload_size, int))
+
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
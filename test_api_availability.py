@@ -5,8 +5,9 @@ import time
 from typing import Optional
 
 # --- Configuration ---
-# Updated to use the Render deployment URL
-BASE_URL = "https://mix-7elg.onrender.com"
+# Defaults to the Render deployment; set API_BASE_URL to test a local backend
+# (e.g. one running against tools/fake_inference_server.py)
+BASE_URL = os.getenv("API_BASE_URL", "https://mix-7elg.onrender.com")
 TIMEOUT = 120  # Increased timeout for potentially slow AI model loading/inference
 
 # Public URLs for test files (uploaded from sandbox)